@@ -0,0 +1,301 @@
+"""Score a JSONL or CSV corpus offline with the same pipeline as the API.
+
+    python -m app.bulk articles.jsonl scores.jsonl [--workers 4] [--threads 2] [--batch-size 32]
+                       [--text-field text] [--url-field url] [--id-field id] [--offline] [--restart]
+
+Input is read and output written one record at a time, so memory stays
+flat however large the corpus. Batches of records are scored by a pool of
+processes, each with its own copy of the model and its own torch threads,
+through analyze_text_batch (one forward pass per batch, like /analyze/batch).
+Output lines keep the input order. Progress, including the byte offset
+reached in the input, is checkpointed next to the output after every batch;
+rerunning the same command after an interruption seeks past the records
+already scored and carries on where it stopped. Workers skip the
+near-duplicate index and the result caches, so scores don't depend on what
+was scored before.
+"""
+import argparse
+import asyncio
+import csv
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.routes.analyze import analyze_text_batch, lookup_fact_checks
+from app.services import near_duplicates, registry
+from app.services.cache import result_cache
+from app.services.crawl_cache import crawl_cache
+from app.services.fact_check import fact_checker
+from app.services.sentiment import BULK_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress lines
+PROGRESS_EVERY = 10
+
+# Set in each worker process by _init_worker
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class _Lines:
+    """Decoded lines of a file opened in binary mode, and the byte offset just past the last one read.
+
+    Text files can't report their position while being iterated, and the csv
+    module reads a record spanning several lines one line at a time, so after
+    each record ``offset`` is where the next one starts.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = f.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode("utf-8")
+
+    def seek(self, offset: int):
+        self.f.seek(offset)
+        self.offset = offset
+
+
+def read_records(path: str, fmt: str, start: int = 0) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """(record, byte offset after it) for each record of a JSONL or CSV file from byte ``start`` on.
+
+    A line that isn't valid JSON yields an error record. ``start`` must be an
+    offset yielded earlier; CSV headers are still read from the top.
+    """
+    with open(path, "rb") as f:
+        lines = _Lines(f)
+        if fmt == "csv":
+            # Whole articles can be longer than the csv module's default field limit
+            csv.field_size_limit(2 ** 31 - 1)
+            reader = csv.DictReader(lines)
+            if reader.fieldnames is not None and start > lines.offset:
+                lines.seek(start)
+            for record in reader:
+                yield record, lines.offset
+            return
+        lines.seek(start)
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), lines.offset
+            except json.JSONDecodeError as e:
+                yield {"_error": f"invalid JSON: {str(e)}"}, lines.offset
+
+
+def _init_worker(threads: int, offline: bool):
+    global _loop
+    import torch
+    torch.set_num_threads(threads)
+    if offline:
+        fact_checker.enabled = False
+    # Every record is scored by the model, and no worker writes to a file another one reads
+    near_duplicates.NEAR_DUPLICATE_ENABLED = False
+    crawl_cache.enabled = False
+    result_cache.backend = None
+    # Fact-check lookups share one loop, and with it one HTTP session, per process
+    _loop = asyncio.new_event_loop()
+    registry.warmup()
+
+
+async def _lookup_all(texts: List[str]) -> List[Dict[str, List[dict]]]:
+    return await asyncio.gather(*(lookup_fact_checks(text) for text in texts))
+
+
+def score_batch(items: List[Tuple[str, Optional[str]]]) -> List[Any]:
+    """Results, or error messages, for (text, url) pairs; runs in a worker process."""
+    if not items:
+        return []
+    fact_checks = _loop.run_until_complete(_lookup_all([text for text, _ in items]))
+    outcomes = analyze_text_batch(items, fact_checks)
+    return [
+        {"error": str(outcome) or type(outcome).__name__} if isinstance(outcome, Exception) else outcome
+        for outcome in outcomes
+    ]
+
+
+class Checkpoint:
+    """Records and output bytes written so far, and input bytes read for them, saved next to the output file."""
+
+    def __init__(self, output: str, source: str):
+        self.path = output + ".checkpoint"
+        self.source = source
+        self.reset()
+
+    def reset(self):
+        self.records = 0
+        self.errors = 0
+        self.offset = 0
+        self.input_offset = 0
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if state["input"] != os.path.abspath(self.source):
+            raise SystemExit(f"{self.path} belongs to {state['input']}; pass --restart to start over")
+        self.records, self.errors, self.offset = state["records"], state["errors"], state["offset"]
+        self.input_offset = state["inputOffset"]
+        return True
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"input": os.path.abspath(self.source), "records": self.records,
+                       "errors": self.errors, "offset": self.offset, "inputOffset": self.input_offset}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def batches(records: Iterator[Tuple[Dict[str, Any], int]], size: int, first: int,
+            args) -> Iterator[Tuple[list, list, int]]:
+    """(ids and immediate errors, (text, url) pairs to score, input offset after it) per batch of ``size`` records.
+
+    ``first`` is the number of the first record, used as its id when it has none.
+    """
+    entries, items = [], []
+    for index, (record, offset) in enumerate(records, first):
+        record_id = record.get(args.id_field)
+        if record_id is None:
+            record_id = index
+        text = record.get(args.text_field)
+        if "_error" in record:
+            entries.append((record_id, record["_error"]))
+        elif not isinstance(text, str) or not text.strip():
+            entries.append((record_id, f"missing or empty '{args.text_field}'"))
+        else:
+            entries.append((record_id, None))
+            items.append((text, record.get(args.url_field) or None))
+        if len(entries) == size:
+            yield entries, items, offset
+            entries, items = [], []
+    if entries:
+        yield entries, items, offset
+
+
+def write_batch(out, entries: list, outcomes: List[Any]) -> int:
+    """Write one line per record; returns how many records failed."""
+    errors = 0
+    outcomes = iter(outcomes)
+    for record_id, error in entries:
+        result = {"error": error} if error is not None else next(outcomes)
+        errors += "error" in result
+        out.write(json.dumps({"id": record_id, **jsonable_encoder(result)}) + "\n")
+    return errors
+
+
+def open_output(path: str, checkpoint: Checkpoint):
+    """The output file opened for writing where ``checkpoint`` left off.
+
+    Starts over, resetting the checkpoint, when there is none or the output
+    no longer holds everything it records.
+    """
+    resumed = checkpoint.load()
+    if resumed and (not os.path.exists(path) or os.path.getsize(path) < checkpoint.offset):
+        logger.warning(f"{path} is missing or shorter than its checkpoint; starting over")
+        checkpoint.reset()
+        resumed = False
+    out = open(path, "r+" if resumed else "w", encoding="utf-8")
+    # Drop lines written after the last checkpoint; those records are scored again
+    out.seek(checkpoint.offset)
+    out.truncate()
+    if resumed:
+        logger.info(f"Resuming after {checkpoint.records} records")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="JSONL or CSV file of records")
+    parser.add_argument("output", help="JSONL file of results, one line per input record")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="input format (by default from the extension)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--url-field", default="url", help="optional; feeds the domain trust score")
+    parser.add_argument("--id-field", default="id", help="copied to the output (the record number when absent)")
+    cpus = os.cpu_count() or 1
+    parser.add_argument("--workers", type=int, default=max(1, cpus // 2), help="processes, each with its own model")
+    parser.add_argument("--threads", type=int, help="torch threads per process (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE, help="records per forward pass")
+    parser.add_argument("--offline", action="store_true", help="don't query the fact-check API")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    threads = args.threads or max(1, cpus // args.workers)
+
+    checkpoint = Checkpoint(args.output, args.input)
+    if args.restart:
+        checkpoint.remove()
+    out = open_output(args.output, checkpoint)
+
+    context = multiprocessing.get_context()
+    if context.get_start_method() == "fork":
+        # As under gunicorn: load the weights once here and let workers share them copy-on-write
+        registry.load_all()
+        gc.freeze()
+    pool = ProcessPoolExecutor(args.workers, mp_context=context, initializer=_init_worker,
+                               initargs=(threads, args.offline))
+    # Enough batches in flight to keep every worker busy, few enough that memory stays flat
+    pending = deque()
+    start = time.perf_counter()
+    done = 0
+    last_report = start
+
+    def drain(limit: int):
+        nonlocal done, last_report
+        while len(pending) > limit:
+            entries, input_offset, future = pending.popleft()
+            checkpoint.errors += write_batch(out, entries, future.result())
+            out.flush()
+            checkpoint.records += len(entries)
+            checkpoint.offset = out.tell()
+            checkpoint.input_offset = input_offset
+            checkpoint.save()
+            done += len(entries)
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_EVERY:
+                last_report = now
+                logger.info(f"{checkpoint.records} records, {done / (now - start):.1f} docs/s")
+
+    try:
+        records = read_records(args.input, fmt, checkpoint.input_offset)
+        for entries, items, input_offset in batches(records, args.batch_size, checkpoint.records, args):
+            pending.append((entries, input_offset, pool.submit(score_batch, items)))
+            drain(args.workers * 2)
+        drain(0)
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"Interrupted after {checkpoint.records} records; run again to resume")
+        sys.exit(130)
+    pool.shutdown()
+    out.close()
+    checkpoint.remove()
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Scored {done} records in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} docs/s, "
+                f"{args.workers} workers x {threads} threads); {checkpoint.errors} errors in total")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,56 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import analyze
+from .routes import admin, analyze, health, metrics
+from .services import registry
+from .services.fetcher import fetcher
+from .services.metrics import MetricsMiddleware, publisher
+from .services.startup import timeline
+import asyncio
+import logging
+import os
 import uvicorn
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Load and warm the models in the background at startup so /health/ready
+# flips to true without waiting for the first request
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+# Finish warming up before the server accepts connections at all
+MODEL_WARMUP_BLOCKING = os.getenv("MODEL_WARMUP_BLOCKING", "0") == "1"
+
+def _warmup():
+    registry.warmup()
+    timeline.record("ready")
+    logger.info(f"Ready {timeline.report()['timeToReady']:.2f}s after process start")
+
+def _log_warmup_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Model warmup failed: {str(future.exception())}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODEL_WARMUP:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, _warmup)
+        future.add_done_callback(_log_warmup_failure)
+        if MODEL_WARMUP_BLOCKING:
+            # A failed warmup then fails startup instead of leaving the worker unready
+            await future
+    # Under gunicorn, lets whichever worker is scraped report the others too
+    publisher.start()
+    yield
+    publisher.stop()
+    await fetcher.close()
+
 app = FastAPI(
     title="NLP + Image Credibility API",
     description="API service for credibility analysis, sentiment, and deepfake detection",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,10 +60,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the stage timings
+    expose_headers=["Server-Timing"],
 )
 
+# Stage timings and per-route request counts, exported on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Register routes
 app.include_router(analyze.router)
+app.include_router(health.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
+
+timeline.record("imports")
 
 # Optional: For running via python main.py
 if __name__ == "__main__":
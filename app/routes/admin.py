@@ -0,0 +1,113 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
+import hmac
+import logging
+import os
+from app.services.cache import result_cache
+from app.services.cascade import cascade_scorer
+from app.services.claim_index import claim_index
+from app.services.crawl_cache import crawl_cache
+from app.services.fact_check import fact_checker
+from app.services.near_duplicates import near_duplicate_index
+from app.services.tokenization import padding_stats
+
+logger = logging.getLogger(__name__)
+
+# Admin endpoints require a matching X-Admin-Token header; without a token they are all refused
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+if not ADMIN_TOKEN:
+    logger.warning("ADMIN_TOKEN is not set, admin endpoints are disabled")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+class KnownFactCheck(BaseModel):
+    claim: str
+    rating: str
+    source: str = ""
+    url: str = ""
+    explanation: str = ""
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/crawl-cache/stats")
+async def crawl_cache_stats():
+    """Report crawl cache hit/miss counters and storage usage."""
+    return crawl_cache.stats()
+
+@router.delete("/crawl-cache")
+async def purge_crawl_cache(url: Optional[str] = None, older_than_seconds: Optional[float] = None):
+    """Purge one URL, pages not validated for ``older_than_seconds``, or the whole crawl cache.
+
+    Purging a single URL also drops its cached analysis result, so the next
+    request for it downloads and analyzes the page again.
+    """
+    loop = asyncio.get_running_loop()
+    purged = await loop.run_in_executor(None, lambda: crawl_cache.purge(url=url, older_than=older_than_seconds))
+    if url is not None:
+        await loop.run_in_executor(None, result_cache.delete, result_cache.url_key(url))
+    logger.info(f"Purged {purged} crawl cache entries")
+    return {"purged": purged}
+
+@router.get("/fact-check/stats")
+async def fact_check_stats():
+    """Report fact-check lookup, cache and circuit breaker counters."""
+    return fact_checker.stats()
+
+@router.get("/claim-index/stats")
+async def claim_index_stats():
+    """Report the current claim index generation and its size."""
+    return claim_index.stats()
+
+@router.post("/claim-index/claims")
+async def add_known_fact_checks(fact_checks: List[KnownFactCheck]):
+    """Add fact-checked claims to the local claim index; every worker picks them up within seconds."""
+    records = jsonable_encoder(fact_checks)
+    try:
+        added = await asyncio.get_running_loop().run_in_executor(None, claim_index.add, records)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"added": added}
+
+@router.post("/claim-index/rebuild")
+async def rebuild_claim_index():
+    """Merge added claims into a new index generation."""
+    try:
+        generation = await asyncio.get_running_loop().run_in_executor(None, claim_index.rebuild)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"generation": generation}
+
+@router.get("/padding/stats")
+async def get_padding_stats():
+    """Report real and pad tokens of the batched forward passes, per length bucket."""
+    return padding_stats.stats()
+
+@router.delete("/padding/stats")
+async def reset_padding_stats():
+    """Start counting padding afresh, e.g. after changing PADDING_BUCKETS."""
+    padding_stats.reset()
+    return padding_stats.stats()
+
+@router.get("/cascade/stats")
+async def cascade_stats():
+    """Report how many texts the cascade would escalate, and how often it would agree with the transformer, per threshold."""
+    return cascade_scorer.stats()
+
+@router.get("/near-duplicates/stats")
+async def near_duplicate_stats():
+    """Report how many texts reused the sentiment of a near-duplicate, and how full the index is."""
+    return near_duplicate_index.stats()
+
+@router.delete("/near-duplicates")
+async def clear_near_duplicates():
+    """Forget every stored text, e.g. after changing the sentiment model."""
+    near_duplicate_index.clear()
+    return near_duplicate_index.stats()
@@ -1,21 +1,60 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
+import asyncio
+import json
 import logging
-import requests
-import re
-from bs4 import BeautifulSoup
-from app.services.sentiment import analyze_sentiment
+import os
+from dataclasses import asdict, dataclass
+from urllib.parse import urlparse
+from fastapi.encoders import jsonable_encoder
+from app.services.sentiment import BULK_BATCH_SIZE, analyze_sentiment, analyze_sentiment_batch
+from app.services.cascade import CASCADE_ENABLED, cascade_sentiment_batch
+from app.services.near_duplicates import reuse_near_duplicates
+from app.services.executor import Overloaded, inference_executor, parse_executor
+from app.services.cache import result_cache
+from app.services.crawl_cache import crawl_cache
+from app.services.extractor import extract_main_content
+from app.services.fetcher import FetchedPage, fetcher
+from app.services.fact_check import fact_checker
+from app.services.claim_index import claim_index
+from app.services.reputation import DEFAULT_TRUST_SCORE, domain_reputation
+from app.services.jobs import Job, PRIORITY_BULK, PRIORITY_INTERACTIVE, explanation_jobs
+from app.services.metrics import ERRORS, stage
+from app.services.singleflight import SingleFlight
+from app.services.features import (
+    CLIMATE_CLAIM_PATTERN, HEALTH_CLAIM_PATTERN, NUMBER_PATTERN, SCIENTIFIC_SOURCE_PATTERN,
+    SENSATIONAL_PATTERNS, TextFeatures, extract_features
+)
 from app.services.explainability import explain_prediction, is_technical_content, adjust_credibility_score
 
 router = APIRouter(prefix="/analyze", tags=["analysis"])
 logger = logging.getLogger(__name__)
 
+# Whether requests that don't say otherwise get an explanation job
+EXPLAIN_BY_DEFAULT = os.getenv("EXPLAIN_BY_DEFAULT", "0") == "1"
+# Seconds between keep-alive comments on an explanation event stream
+EXPLAIN_STREAM_KEEPALIVE_SECONDS = float(os.getenv("EXPLAIN_STREAM_KEEPALIVE_SECONDS", "15"))
+# How often an event stream checks on its job, which may be running on another worker
+EXPLAIN_STREAM_POLL_SECONDS = float(os.getenv("EXPLAIN_STREAM_POLL_SECONDS", "0.5"))
+# Texts plus URLs accepted by one /analyze/batch request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+# URLs of one batch request fetched at the same time
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "16"))
+
+# Identical requests arriving together share one fetch and one pipeline run
+url_flights = SingleFlight("url")
+text_flights = SingleFlight("text")
+load_flights = SingleFlight("load")
+
 class TextRequest(BaseModel):
     text: str = Field(..., description="Text content to analyze")
+    explain: Optional[bool] = Field(None, description="Queue an explanation job for the text")
 
 class UrlRequest(BaseModel):
     url: str = Field(..., description="URL of the article to analyze")
+    explain: Optional[bool] = Field(None, description="Queue an explanation job for the article")
 
 class FactCheckResult(BaseModel):
     claim: str
@@ -23,6 +62,8 @@ class FactCheckResult(BaseModel):
     source: str
     url: str
     explanation: str
+    # How close a matched known fact-check is to the claim, 0-1
+    similarity: Optional[float] = None
 
 class CredibilityResponse(BaseModel):
     credibilityScore: float
@@ -32,116 +73,66 @@ class CredibilityResponse(BaseModel):
     contentType: str
     sentiment: str
     sentimentConfidence: float
+    explanationJobId: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    texts: List[str] = Field(default_factory=list, description="Text contents to analyze")
+    urls: List[str] = Field(default_factory=list, description="URLs of articles to analyze")
+    explain: bool = Field(False, description="Queue a low-priority explanation job for each text")
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[CredibilityResponse] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    texts: List[BatchItemResult]
+    urls: List[BatchItemResult]
+
+class ExplanationWord(BaseModel):
+    word: str
+    weight: float
+
+class ExplanationJobResponse(BaseModel):
+    jobId: str
+    status: str
+    explanation: Optional[List[ExplanationWord]] = None
+    explanationHtml: Optional[str] = None
+    explanationScore: Optional[float] = None
+    error: Optional[str] = None
 
-def extract_claims(text: str) -> List[str]:
+def extract_claims(text: str, features: Optional[TextFeatures] = None) -> List[str]:
     """Extract potential factual claims from text."""
-    # Look for statements that might be factual claims
-    claim_patterns = [
-        r'[A-Z][^.!?]*\b(is|are|was|were|has|have|had|will|would|can|could)\b[^.!?]*[.!?]',
-        r'[A-Z][^.!?]*\b(according to|reports|studies show|research indicates)\b[^.!?]*[.!?]',
-        r'[A-Z][^.!?]*\b(proven|confirmed|verified|established)\b[^.!?]*[.!?]'
-    ]
-    
-    claims = []
-    for pattern in claim_patterns:
-        matches = re.findall(pattern, text)
-        claims.extend(matches)
-    
-    return claims[:3]  # Return top 3 claims
+    features = features or extract_features(text)
+    return features.claims  # Top 3 claims
 
-def detect_scientific_content(text: str) -> bool:
+def detect_scientific_content(text: str, features: Optional[TextFeatures] = None) -> bool:
     """Detect if the content is scientific in nature."""
-    scientific_patterns = [
-        # Research and methodology terms
-        r'\b(study|research|data|evidence|analysis|scientists?|researchers?)\b',
-        r'\b(methodology|hypothesis|results|conclusion|findings)\b',
-        r'\b(experiment|observation|measurement|statistical|significance)\b',
-        
-        # Scientific organizations and publications
-        r'\b(NASA|NOAA|WHO|CDC|NIH|scientific consensus)\b',
-        r'\b(peer[-\s]reviewed|journal|publication|paper)\b',
-        r'\b(Nature|Science|Lancet|JAMA|BMJ)\b',
-        
-        # Technical measurements and units
-        r'\b(\d+(\.\d+)?)\s*(degrees?|°)[CF]\b',
-        r'\b(\d+(\.\d+)?)\s*(mg|kg|ml|km|cm|mph|inches?)\b',
-        r'\b(\d+(\.\d+)?)\s*percent\b|\b\d+%\b',
-        
-        # Citations and references
-        r'\b(according to|cited in|referenced by|published in)\b',
-        r'\b(et al\.|vol\.|pp\.|doi:)\b',
-        
-        # Technical terminology
-        r'\b(correlation|causation|factor|variable|control group)\b',
-        r'\b(systematic|review|meta[-\s]analysis|clinical trial)\b',
-        
-        # Weather-specific terms
-        r'\b(National Weather Service|NWS|NOAA|radar indicates|meteorologists?)\b',
-        r'\b(atmospheric|precipitation|visibility|wind speeds?|gusts?)\b',
-        r'\b(forecast|warning|advisory|watch|alert|severe|conditions?)\b'
-    ]
-    
-    matches = 0
-    text = text.lower()  # Convert to lowercase for case-insensitive matching
-    
-    # Count unique pattern matches
-    for pattern in scientific_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            matches += 1
+    features = features or extract_features(text)
     
     # Adjust threshold based on text length
-    words = len(text.split())
-    if words < 50:
-        return matches >= 2  # For short texts, require fewer matches
+    if features.word_count < 50:
+        return features.scientific_matches_at_least(2)  # For short texts, require fewer matches
     else:
-        return matches >= 3  # For longer texts, require more matches
+        return features.scientific_matches_at_least(3)  # For longer texts, require more matches
 
-def detect_sensational_language(text: str) -> float:
+def detect_sensational_language(text: str, features: Optional[TextFeatures] = None) -> float:
     """Detect sensational language patterns in text with reduced sensitivity."""
-    # First check if it's scientific content
-    is_scientific = detect_scientific_content(text)
-    
-    # Check if it's a weather alert
-    is_weather_alert = bool(re.search(r'\b(warning|advisory|watch|alert)\b.*\b(weather|storm|thunder|tornado|hurricane|flood)\b', text, re.IGNORECASE))
-    
-    # Define patterns with their weights
-    sensational_patterns = [
-        # Punctuation and formatting - reduced weight
-        (r'!\s*$', 0.03),  # Exclamation marks
-        (r'[A-Z]{2,}', 0.02),  # ALL CAPS
-        (r'[!?]{2,}', 0.03),  # Multiple punctuation
-        
-        # Hyperbolic language - moderate weight
-        (r'\b(amazing|incredible|unbelievable|shocking)\b', 0.05),
-        (r'\b(mind[-\s]blowing|jaw[-\s]dropping)\b', 0.05),
-        (r'\b(revolutionary|breakthrough|miracle)\b', 0.06),
-        
-        # Clickbait phrases - higher weight
-        (r'\b(breaking|urgent|exclusive|must-see)\b', 0.07),
-        (r'\b(you won\'t believe|you need to see)\b', 0.08),
-        (r'\d+ reasons why|\d+ things you need\b', 0.06),
-        
-        # Marketing language - higher weight
-        (r'\b(secret|hidden|tricks|hack|instantly)\b', 0.07),
-        (r'\b(experts hate|they don\'t want you to know)\b', 0.08)
-    ]
-    
-    score = 0.0
-    text = text.lower()
+    features = features or extract_features(text)
     
     # Calculate weighted score
-    for pattern, weight in sensational_patterns:
-        matches = len(re.findall(pattern, text, re.IGNORECASE))
+    score = 0.0
+    for (_, weight), matches in zip(SENSATIONAL_PATTERNS, features.sensational_counts):
         score += matches * weight
     
     # Reduce impact for scientific content or weather alerts
-    if is_scientific:
+    if detect_scientific_content(text, features):
         score *= 0.5
-    if is_weather_alert:
+    if features.is_weather_alert:
         score *= 0.3  # Even stronger reduction for weather alerts
     
     # Adjust for text length
-    words = len(text.split())
+    words = features.word_count
     if words < 30:
         score *= 0.7
     elif words < 100:
@@ -149,17 +140,12 @@ def detect_sensational_language(text: str) -> float:
     
     return min(1.0, score)
 
-def analyze_content_quality(text: str) -> Dict:
+def analyze_content_quality(text: str, features: Optional[TextFeatures] = None) -> Dict:
     """Analyze various aspects of content quality."""
-    # Calculate text statistics
-    sentences = re.split(r'[.!?]+', text)
-    avg_sentence_length = sum(len(s.split()) for s in sentences if s.strip()) / max(1, len([s for s in sentences if s.strip()]))
-    
-    # Check for common clickbait patterns
-    has_clickbait = bool(re.search(r'\b(click here|learn more|read more|find out)\b', text, re.IGNORECASE))
-    
-    # Check for balanced language
-    has_balanced_language = bool(re.search(r'\b(however|although|but|on the other hand)\b', text, re.IGNORECASE))
+    features = features or extract_features(text)
+    avg_sentence_length = features.avg_sentence_length
+    has_clickbait = features.has_clickbait
+    has_balanced_language = features.has_balanced_language
     
     # Check for simple factual statements
     is_simple_statement = avg_sentence_length < 15 and not has_clickbait and not has_balanced_language
@@ -171,49 +157,63 @@ def analyze_content_quality(text: str) -> Dict:
         "is_simple_statement": is_simple_statement
     }
 
-def fetch_article_content(url: str) -> str:
+def extract_article_text(html: str) -> str:
+    """Extract the main text content from an HTML page."""
+    extraction = extract_main_content(html)
+    logger.debug(f"Extracted {len(extraction.text)} characters using the {extraction.strategy} strategy")
+    return extraction.text
+
+async def fetch_page(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[FetchedPage]:
+    """Download a page through the shared connection pool. Returns None on failure."""
+    with stage("fetch"):
+        return await fetcher.fetch(url, etag, last_modified)
+
+def unavailable_content(url: str) -> str:
+    # A minimal text that won't break the analysis but indicates the error
+    return f"Unable to access content from {url}. This might be due to site restrictions or temporary unavailability."
+
+def extract_and_store(url: str, page: FetchedPage) -> str:
+    """Extract a downloaded page and keep both in the crawl cache."""
+    with stage("parse"):
+        content = extract_article_text(page.html)
+    crawl_cache.put(url, page.html, content, page.etag, page.last_modified)
+    return content
+
+async def fetch_article_content(url: str) -> str:
     """Fetch and extract content from a URL."""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Try to find main content area
-        main_content = soup.find('article') or soup.find('main') or soup.find('div', class_=lambda x: x and ('content' in x or 'article' in x))
-        
-        if main_content:
-            # Remove unnecessary elements
-            for element in main_content.find_all(['nav', 'footer', 'aside', 'script', 'style']):
-                element.decompose()
-            return main_content.get_text(strip=True)
-        
-        # If no main content found, try to get text from body
-        body = soup.find('body')
-        if body:
-            for element in body.find_all(['nav', 'footer', 'aside', 'script', 'style', 'header']):
-                element.decompose()
-            return body.get_text(strip=True)
-            
-        return soup.get_text(strip=True)
-    except requests.exceptions.RequestException as e:
-        # Return a minimal text that won't break the analysis but indicates the error
-        return f"Unable to access content from {url}. This might be due to site restrictions or temporary unavailability."
+    loaded = await load_url(url)
+    if loaded.content is not None:
+        return loaded.content
+    
+    # The origin confirmed a cached result whose page text is no longer stored
+    page = await fetch_page(url)
+    if page is None:
+        return unavailable_content(url)
+    
+    # Parsing is CPU-bound, keep it off the event loop
+    return await parse_executor.run(extract_and_store, url, page)
+
+def check_fact(claim: str, sentence: Optional[str] = None,
+               reviews: Optional[List[dict]] = None) -> Optional[FactCheckResult]:
+    """Check a claim against fact-checking databases.
 
-def check_fact(claim: str) -> Optional[FactCheckResult]:
-    """Check a claim against fact-checking databases."""
+    The claim sentence is matched against the local index of known
+    fact-checks first, then the top fact-check API review is used, and
+    only then the pattern rules on the claim phrase.
+    """
     try:
+        if sentence:
+            match = claim_index.best_match(sentence)
+            if match is not None:
+                return FactCheckResult(**asdict(match))
+        if reviews:
+            return FactCheckResult(**reviews[0])
+        
         # Check for scientific sources in the claim
-        scientific_source = re.search(r'\b(according to|based on|from)\s+(NASA|NOAA|WHO|CDC|NIH)\b', claim, re.IGNORECASE)
+        scientific_source = SCIENTIFIC_SOURCE_PATTERN.search(claim)
         
         # Climate change related claims
-        if re.search(r'\b(climate change|global warming|temperature rise|carbon dioxide|CO2 emissions)\b', claim, re.IGNORECASE):
+        if CLIMATE_CLAIM_PATTERN.search(claim):
             if scientific_source:
                 return FactCheckResult(
                     claim=claim,
@@ -232,7 +232,7 @@ def check_fact(claim: str) -> Optional[FactCheckResult]:
                 )
         
         # Health-related claims
-        elif re.search(r'\b(vaccine|vaccination|health|disease|medical)\b', claim, re.IGNORECASE):
+        elif HEALTH_CLAIM_PATTERN.search(claim):
             if scientific_source:
                 return FactCheckResult(
                     claim=claim,
@@ -274,32 +274,15 @@ def check_fact(claim: str) -> Optional[FactCheckResult]:
 def get_domain_trust_score(url: str) -> float:
     """Calculate a trust score based on the domain."""
     try:
-        from urllib.parse import urlparse
-        domain = urlparse(url).netloc.lower()
+        domain = urlparse(url).hostname
+        if not domain:
+            return DEFAULT_TRUST_SCORE
         
-        # Highly trusted domains - increased to 0.4
-        if any(d in domain for d in [
-            'nasa.gov', 'nature.com', 'science.org', 'who.int', 'cdc.gov', 
-            'nih.gov', 'edu', 'weather.gov', 'noaa.gov'
-        ]):
-            return 0.4
-            
-        # Moderately trusted domains - increased to 0.25
-        if any(d in domain for d in [
-            'weather.com', 'reuters.com', 'apnews.com', 'bbc.com', 'npr.org',
-            'sciencedaily.com', 'scientificamerican.com'
-        ]):
-            return 0.25
-            
-        # Known satire/entertainment sites
-        if any(d in domain for d in ['theonion.com', 'tmz.com']):
-            return -0.2
-            
-        # Default trust score for unknown domains
-        return 0.05
+        # Tiered allow/deny lists, matched on whole domain labels
+        return domain_reputation.score(domain)
             
     except Exception:
-        return 0.05
+        return DEFAULT_TRUST_SCORE
 
 def calculate_credibility_score(
     sentiment_score: float,
@@ -319,7 +302,7 @@ def calculate_credibility_score(
     # Analyze content quality
     content_quality = {
         "has_citations": any("according to" in r.claim.lower() or "cited" in r.claim.lower() for r in fact_check_results),
-        "has_numbers": any(re.search(r'\d+', r.claim) for r in fact_check_results),
+        "has_numbers": any(NUMBER_PATTERN.search(r.claim) for r in fact_check_results),
         "has_balanced_view": any("however" in r.claim.lower() or "but" in r.claim.lower() or "although" in r.claim.lower() for r in fact_check_results)
     }
     
@@ -371,23 +354,65 @@ def get_verdict(score: float) -> str:
     else:
         return "Highly Suspicious - Multiple red flags for misinformation"
 
-def analyze_text(text: str, url: str = None) -> Dict[str, Any]:
-    # Perform sentiment analysis with smoothing
-    sentiment_result = analyze_sentiment(text)
+async def lookup_fact_checks(text: str) -> Dict[str, List[dict]]:
+    """Fact-check API reviews for the claims in a text, empty when no API is configured.
+
+    Claims the local claim index already knows are not sent to the API.
+    """
+    if not fact_checker.enabled:
+        return {}
+    with stage("fact_check_lookup"):
+        # The index search is CPU-bound, keep it off the event loop
+        sentences = await asyncio.get_running_loop().run_in_executor(None, unknown_claim_sentences, text)
+        return await fact_checker.check_claims(sentences)
+
+def unknown_claim_sentences(text: str) -> List[str]:
+    """Claim sentences of a text that the local claim index has no fact-check for.
+
+    All of them when the index fails, so the API still sees every claim.
+    """
+    sentences = extract_features(text).claim_sentences
+    try:
+        return [sentence for sentence in sentences if claim_index.best_match(sentence) is None]
+    except Exception as e:
+        logger.warning(f"Claim index search failed, looking up all claims: {str(e)}")
+        return sentences
+
+def analyze_text(text: str, url: str = None, sentiment_result: Optional[dict] = None,
+                 fact_checks: Optional[Dict[str, List[dict]]] = None) -> Dict[str, Any]:
+    # Every heuristic below reads from the same feature record
+    with stage("features"):
+        features = extract_features(text)
+        
+        # Detect if content is scientific or weather alert
+        is_scientific = detect_scientific_content(text, features)
+        is_weather_alert = features.is_weather_alert
+        
+        # Analyze content quality
+        sensational_score = detect_sensational_language(text, features)
+    
+    # Perform sentiment analysis with smoothing, unless a batch already scored the text
+    if sentiment_result is None:
+        with stage("sentiment"):
+            if CASCADE_ENABLED:
+                # The transformer only sees texts the linear first stage is unsure about
+                score = lambda texts: cascade_sentiment_batch(texts, lambda escalated: [analyze_sentiment(escalated[0])], [features])
+            else:
+                score = lambda texts: [analyze_sentiment(texts[0])]
+            # A lightly edited copy of a text analyzed before reuses its sentiment
+            sentiment_result = reuse_near_duplicates([text], score)[0]
     raw_sentiment = sentiment_result["confidence"] if sentiment_result["sentiment"] == "POSITIVE" else -sentiment_result["confidence"]
     sentiment_score = raw_sentiment * (1 - abs(raw_sentiment) * 0.3)
     
-    # Detect if content is scientific or weather alert
-    is_scientific = detect_scientific_content(text)
-    is_weather_alert = bool(re.search(r'\b(warning|advisory|watch|alert)\b.*\b(weather|storm|thunder|tornado|hurricane|flood)\b', text, re.IGNORECASE))
-    
-    # Analyze content quality
-    sensational_score = detect_sensational_language(text)
-    
     # Perform fact checking
-    claims = extract_claims(text)
-    fact_check_results = [check_fact(claim) for claim in claims]
-    fact_check_results = [result for result in fact_check_results if result is not None]
+    with stage("fact_check"):
+        claims = extract_claims(text, features)
+        fact_checks = fact_checks or {}
+        fact_check_results = [
+            check_fact(claim, sentence, fact_checks.get(sentence))
+            for claim, sentence in zip(claims, features.claim_sentences)
+        ]
+        fact_check_results = [result for result in fact_check_results if result is not None]
     
     # Calculate credibility score
     credibility_score = calculate_credibility_score(
@@ -419,9 +444,9 @@ def analyze_text(text: str, url: str = None) -> Dict[str, Any]:
     if is_scientific:
         explanation.append("Scientific content detected with technical terminology")
         scientific_orgs = ["nasa", "noaa", "who", "cdc", "nih"]
-        if any(org in text.lower() for org in scientific_orgs):
+        if features.contains_any(scientific_orgs):
             explanation.append("References to reputable scientific organizations found")
-        if any(term in text.lower() for term in ["journal", "study", "research"]):
+        if features.contains_any(["journal", "study", "research"]):
             explanation.append("References to scientific studies or journals found")
     elif is_weather_alert:
         explanation.append("Official weather alert detected")
@@ -448,11 +473,11 @@ def analyze_text(text: str, url: str = None) -> Dict[str, Any]:
     
     # Balance and citations
     balance_terms = ["however", "but", "although", "nevertheless", "on the other hand"]
-    if any(term in text.lower() for term in balance_terms):
+    if features.contains_any(balance_terms):
         explanation.append("Shows balanced perspective by considering multiple viewpoints")
     
     citation_terms = ["according to", "cited", "reports", "stated by", "referenced"]
-    if any(term in text.lower() for term in citation_terms):
+    if features.contains_any(citation_terms):
         explanation.append("Includes citations or references to sources")
     
     return {
@@ -465,14 +490,212 @@ def analyze_text(text: str, url: str = None) -> Dict[str, Any]:
         "sentimentConfidence": sentiment_result["confidence"]
     }
 
+def overloaded_error(e: Overloaded) -> HTTPException:
+    """Build the response for work rejected because a pool is full."""
+    logger.warning(f"Rejecting request: {str(e)}")
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
+async def analyze_text_cached(text: str, url: str = None) -> Dict[str, Any]:
+    """Run analyze_text on the inference pool unless the same content was analyzed recently.
+
+    Concurrent calls for the same content share one run.
+    """
+    key = result_cache.text_key(text, url)
+    with stage("cache"):
+        # The cache may be a SQLite file; keep its reads and writes off the event loop
+        result = await asyncio.get_running_loop().run_in_executor(None, result_cache.get, key)
+    if result is None:
+        result = await text_flights.run(key, _analyze_text_uncached, key, text, url)
+    return result
+
+async def _analyze_text_uncached(key: str, text: str, url: Optional[str]) -> Dict[str, Any]:
+    fact_checks = await lookup_fact_checks(text)
+    result = jsonable_encoder(await inference_executor.run(analyze_text, text, url, None, fact_checks))
+    await asyncio.get_running_loop().run_in_executor(None, result_cache.set, key, result)
+    return result
+
+@dataclass
+class LoadedUrl:
+    """Outcome of loading a URL whose fresh result wasn't cached."""
+    url: str
+    # Set when the origin confirmed the stale cached result is still current
+    result: Optional[Dict[str, Any]] = None
+    content: Optional[str] = None
+    # HTTP validators of the page the content came from
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when the page couldn't be loaded and content is a placeholder
+    failed: bool = False
+
+async def load_url(url: str) -> LoadedUrl:
+    """Load the article text of a URL, downloading and parsing it only when it changed.
+
+    Pages in the crawl cache that were validated recently are used as they
+    are. Otherwise the request is conditional on the stored validators, so an
+    unchanged page costs a 304 instead of a download and a parse. When the
+    origin is unreachable the last stored copy is used. Concurrent loads of
+    the same URL share one download.
+    """
+    url_key = result_cache.url_key(url)
+    return await load_flights.run(url_key, _load_url, url, url_key)
+
+async def _load_url(url: str, url_key: str) -> LoadedUrl:
+    # Both caches may be SQLite files; keep their reads off the event loop
+    loop = asyncio.get_running_loop()
+    crawled = await loop.run_in_executor(None, crawl_cache.get, url)
+    if crawled is not None and crawled.is_fresh():
+        return LoadedUrl(url, content=crawled.text, etag=crawled.etag, last_modified=crawled.last_modified)
+    
+    stale = await loop.run_in_executor(None, result_cache.lookup, url_key)
+    validators = crawled or stale
+    page = await fetch_page(url, validators.etag if validators else None, validators.last_modified if validators else None)
+    if page is None:
+        if crawled is not None:
+            return LoadedUrl(url, content=crawled.text, etag=crawled.etag, last_modified=crawled.last_modified)
+        return LoadedUrl(url, content=unavailable_content(url), failed=True)
+    
+    if page.not_modified:
+        if crawled is not None:
+            await loop.run_in_executor(None, crawl_cache.revalidated, url)
+        same_version = crawled is None or (stale is not None and (stale.etag, stale.last_modified) == (crawled.etag, crawled.last_modified))
+        if stale is not None and same_version:
+            result = await loop.run_in_executor(None, result_cache.revalidated, url_key, stale)
+            return LoadedUrl(url, result=result, content=crawled.text if crawled else None)
+        if crawled is not None:
+            return LoadedUrl(url, content=crawled.text, etag=crawled.etag, last_modified=crawled.last_modified)
+        return LoadedUrl(url, content=unavailable_content(url), failed=True)
+    
+    content = await parse_executor.run(extract_and_store, url, page)
+    return LoadedUrl(url, content=content, etag=page.etag, last_modified=page.last_modified)
+
+async def cache_url_result(loaded: LoadedUrl, result: Dict[str, Any]):
+    # Don't cache failed fetches, the page may be reachable next time
+    if not loaded.failed:
+        await asyncio.get_running_loop().run_in_executor(
+            None, result_cache.set, result_cache.url_key(loaded.url), result, loaded.etag, loaded.last_modified
+        )
+
+async def analyze_url_cached(url: str) -> Dict[str, Any]:
+    """Analyze a URL, revalidating a stale cached result with the origin before re-scraping.
+
+    Concurrent requests for the same (canonical) URL share one analysis.
+    """
+    url_key = result_cache.url_key(url)
+    with stage("cache"):
+        result = await asyncio.get_running_loop().run_in_executor(None, result_cache.get, url_key)
+    if result is not None:
+        return result
+    return await url_flights.run(url_key, _analyze_url_uncached, url)
+
+async def _analyze_url_uncached(url: str) -> Dict[str, Any]:
+    # Reject early rather than fetching a page we have no capacity to analyze
+    if not inference_executor.has_capacity():
+        raise Overloaded(f"{inference_executor.name} is at capacity")
+    
+    loaded = await load_url(url)
+    if loaded.result is not None:
+        return loaded.result
+    if loaded.failed:
+        return await inference_executor.run(analyze_text, loaded.content, url)
+    result = await analyze_text_cached(loaded.content, url)
+    await cache_url_result(loaded, result)
+    return result
+
+def analyze_text_batch(items: List[tuple], fact_checks: Optional[List[dict]] = None) -> List[Any]:
+    """Analyze (text, url) pairs with one forward pass for all of them.
+
+    Returns a result dict per item, or the exception that item raised.
+    """
+    try:
+        with stage("sentiment"):
+            texts = [text for text, _ in items]
+            if CASCADE_ENABLED:
+                score = lambda texts: cascade_sentiment_batch(texts, analyze_sentiment_batch)
+            else:
+                score = analyze_sentiment_batch
+            sentiments = reuse_near_duplicates(texts, score)
+    except Exception as e:
+        logger.error(f"Error in batch sentiment analysis: {str(e)}")
+        return [e] * len(items)
+    fact_checks = fact_checks or [None] * len(items)
+    results = []
+    for (text, url), sentiment_result, item_checks in zip(items, sentiments, fact_checks):
+        try:
+            results.append(jsonable_encoder(analyze_text(text, url, sentiment_result, item_checks)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+async def analyze_batch_cached(items: List[tuple]) -> List[Any]:
+    """Analyze many (text, url) pairs, running only uncached, distinct texts through the model.
+
+    Work is submitted one model batch at a time, so a large request takes
+    turns on the inference pool with interactive requests instead of
+    holding a thread for its whole duration.
+    """
+    loop = asyncio.get_running_loop()
+    keys = [result_cache.text_key(text, url) for text, url in items]
+    distinct = dict(zip(keys, items))
+    # One trip to the executor for all the cache reads of the request
+    cached = await loop.run_in_executor(None, result_cache.get_many, list(distinct))
+    results: Dict[str, Any] = {key: result for key, result in cached.items() if result is not None}
+    pending: Dict[str, tuple] = {key: item for key, item in distinct.items() if key not in results}
+    
+    pending_keys = list(pending)
+    # All claim lookups of the request go out together, before any inference
+    fact_checks = await asyncio.gather(*(lookup_fact_checks(pending[key][0]) for key in pending_keys))
+    for start in range(0, len(pending_keys), BULK_BATCH_SIZE):
+        chunk = pending_keys[start:start + BULK_BATCH_SIZE]
+        outcomes = await inference_executor.run(
+            analyze_text_batch, [pending[key] for key in chunk], fact_checks[start:start + BULK_BATCH_SIZE]
+        )
+        for key, outcome in zip(chunk, outcomes):
+            results[key] = outcome
+        await loop.run_in_executor(None, result_cache.set_many,
+                                   {key: outcome for key, outcome in zip(chunk, outcomes) if not isinstance(outcome, Exception)})
+    return [results[key] for key in keys]
+
+def explain_job(text: str, job: Job) -> Dict[str, Any]:
+    """Body of an explanation job; stops sampling early if the job is cancelled."""
+    explanation, explanation_html, score = explain_prediction(text, should_stop=job.cancel_requested.is_set)
+    # Stored as JSON for the other workers, so no numpy scalars
+    return {"explanation": explanation, "explanationHtml": explanation_html, "explanationScore": float(score)}
+
+def explain_url_job(url: str, loop: asyncio.AbstractEventLoop, job: Job) -> Dict[str, Any]:
+    """Explanation job for a URL; the article is fetched again on the event loop."""
+    content = asyncio.run_coroutine_threadsafe(fetch_article_content(url), loop).result()
+    return explain_job(content, job)
+
+def queue_explanation(fn, explain: Optional[bool], priority: int = PRIORITY_INTERACTIVE) -> Optional[str]:
+    """Queue an explanation job if one was asked for and return its ID.
+
+    A full job queue never fails the analysis itself, the response just
+    comes back without a job ID.
+    """
+    if not (EXPLAIN_BY_DEFAULT if explain is None else explain):
+        return None
+    try:
+        return explanation_jobs.submit(fn, priority).id
+    except Overloaded as e:
+        logger.warning(f"Not queueing explanation: {str(e)}")
+        return None
+
 @router.post("/sentiment/text")
 async def analyze_text_endpoint(request: TextRequest):
     """Analyze text for sentiment and credibility."""
     try:
-        result = analyze_text(request.text)
-        return CredibilityResponse(**result)
+        result = await analyze_text_cached(request.text)
+        job_id = queue_explanation(lambda job: explain_job(request.text, job), request.explain)
+        return CredibilityResponse(**result, explanationJobId=job_id)
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error analyzing text: {str(e)}")
+        ERRORS.inc(route="/analyze/sentiment/text")
         # Return a fallback response that matches the expected format
         return CredibilityResponse(
             credibilityScore=0.0,
@@ -488,11 +711,15 @@ async def analyze_text_endpoint(request: TextRequest):
 async def analyze_url(request: UrlRequest):
     """Analyze article content from URL."""
     try:
-        content = fetch_article_content(request.url)
-        result = analyze_text(content, request.url)
-        return CredibilityResponse(**result)
+        result = await analyze_url_cached(request.url)
+        loop = asyncio.get_running_loop()
+        job_id = queue_explanation(lambda job: explain_url_job(request.url, loop, job), request.explain)
+        return CredibilityResponse(**result, explanationJobId=job_id)
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error analyzing URL: {str(e)}")
+        ERRORS.inc(route="/analyze/sentiment/url")
         # Return a fallback response that matches the expected format
         return CredibilityResponse(
             credibilityScore=0.0,
@@ -503,3 +730,129 @@ async def analyze_url(request: UrlRequest):
             sentiment="NEUTRAL",
             sentimentConfidence=0.0
         )
+
+def batch_item(index: int, outcome: Any) -> BatchItemResult:
+    if isinstance(outcome, Exception):
+        ERRORS.inc(route="/analyze/batch")
+        return BatchItemResult(index=index, error=str(outcome) or type(outcome).__name__)
+    return BatchItemResult(index=index, result=CredibilityResponse(**outcome))
+
+@router.post("/batch", response_model=BatchResponse)
+async def analyze_batch(request: BatchRequest):
+    """Analyze many texts and URLs in one request.
+
+    URLs are fetched concurrently, every text that needs the model goes
+    through it in batches, and results come back in request order with an
+    error message in place of the result for items that failed.
+    """
+    if len(request.texts) + len(request.urls) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} texts and URLs per batch")
+    
+    fetch_slots = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+    
+    async def resolve(url: str):
+        result = await asyncio.get_running_loop().run_in_executor(None, result_cache.get, result_cache.url_key(url))
+        if result is not None:
+            return LoadedUrl(url, result=result)
+        async with fetch_slots:
+            return await load_url(url)
+    
+    try:
+        loaded = await asyncio.gather(*(resolve(url) for url in request.urls), return_exceptions=True)
+        
+        # URL contents that still need analyzing join the texts in the same model batches
+        to_analyze = [(text, None) for text in request.texts]
+        url_positions = {}
+        for i, item in enumerate(loaded):
+            if isinstance(item, LoadedUrl) and item.result is None:
+                url_positions[i] = len(to_analyze)
+                to_analyze.append((item.content, item.url))
+        outcomes = await analyze_batch_cached(to_analyze)
+    except Overloaded as e:
+        raise overloaded_error(e)
+    
+    url_outcomes = []
+    for i, item in enumerate(loaded):
+        if isinstance(item, LoadedUrl) and i in url_positions:
+            outcome = outcomes[url_positions[i]]
+            if not isinstance(outcome, Exception):
+                await cache_url_result(item, outcome)
+            url_outcomes.append(outcome)
+        elif isinstance(item, LoadedUrl):
+            url_outcomes.append(item.result)
+        else:
+            logger.error(f"Error loading URL {request.urls[i]}: {str(item)}")
+            url_outcomes.append(item)
+    
+    text_items = [batch_item(i, outcome) for i, outcome in enumerate(outcomes[:len(request.texts)])]
+    if request.explain:
+        for text, item in zip(request.texts, text_items):
+            if item.result is not None:
+                item.result.explanationJobId = queue_explanation(
+                    lambda job, text=text: explain_job(text, job), True, PRIORITY_BULK
+                )
+    return BatchResponse(
+        texts=text_items,
+        urls=[batch_item(i, outcome) for i, outcome in enumerate(url_outcomes)]
+    )
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Report result cache hit/miss counters and storage usage."""
+    return await asyncio.get_running_loop().run_in_executor(None, result_cache.stats)
+
+async def get_job(job_id: str) -> Job:
+    # Any worker may have queued the job; its state is read from the shared job store
+    job = await asyncio.get_running_loop().run_in_executor(None, explanation_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Explanation job not found or expired")
+    return job
+
+def job_response(job: Job) -> ExplanationJobResponse:
+    return ExplanationJobResponse(jobId=job.id, status=job.status, error=job.error, **(job.result or {}))
+
+@router.get("/explanations/{job_id}", response_model=ExplanationJobResponse)
+async def get_explanation(job_id: str):
+    """Poll an explanation job."""
+    return job_response(await get_job(job_id))
+
+@router.get("/explanations/{job_id}/events")
+async def stream_explanation(job_id: str):
+    """Stream an explanation job as server-sent events.
+
+    Sends a ``status`` event right away and a ``result`` event once the job
+    is done, failed or cancelled, with keep-alive comments in between. The
+    job may run on another worker, so its state is polled.
+    """
+    job = await get_job(job_id)
+    
+    async def events():
+        nonlocal job
+        yield f"event: status\ndata: {json.dumps({'jobId': job.id, 'status': job.status})}\n\n"
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while not job.finished:
+            await asyncio.sleep(EXPLAIN_STREAM_POLL_SECONDS)
+            polled = await loop.run_in_executor(None, explanation_jobs.get, job_id)
+            if polled is None:
+                # Expired between two polls
+                return
+            job = polled
+            if loop.time() - last_sent >= EXPLAIN_STREAM_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = loop.time()
+        yield f"event: result\ndata: {json.dumps(jsonable_encoder(job_response(job)))}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.delete("/explanations/{job_id}", response_model=ExplanationJobResponse)
+async def cancel_explanation(job_id: str):
+    """Cancel an explanation job. Running LIME jobs stop after their current sampling round."""
+    job = await asyncio.get_running_loop().run_in_executor(None, explanation_jobs.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Explanation job not found or expired")
+    return job_response(job)
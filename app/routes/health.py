@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services import registry
+from app.services.startup import timeline
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/live")
+async def live():
+    """Report that the process is up and serving requests."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    """Report whether every model is loaded and warmed up."""
+    body = {"ready": registry.is_ready(), "models": registry.status()}
+    return JSONResponse(content=body, status_code=200 if body["ready"] else 503)
+
+@router.get("/startup")
+async def startup():
+    """Report the startup timeline: import time, weight loading and first inference per model."""
+    return timeline.report()
@@ -0,0 +1,45 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services import sentiment
+from app.services.cache import result_cache
+from app.services.crawl_cache import crawl_cache
+from app.services.executor import inference_executor, parse_executor
+from app.services.fact_check import fact_checker
+from app.services.jobs import explanation_jobs
+from app.services.metrics import Gauge, render
+from app.services.startup import timeline
+from app.services.tokenization import encoding_cache, padding_stats
+
+router = APIRouter(tags=["metrics"])
+
+# Counters the caches and clients already keep are read when /metrics is scraped
+Gauge("credibility_result_cache_lookups_total", "Result cache lookups", ["outcome"], kind="counter",
+      function=lambda: {("hit",): result_cache.hits, ("miss",): result_cache.misses,
+                        ("revalidated",): result_cache.revalidations})
+Gauge("credibility_crawl_cache_lookups_total", "Crawl cache lookups", ["outcome"], kind="counter",
+      function=lambda: {("hit",): crawl_cache.hits, ("miss",): crawl_cache.misses,
+                        ("revalidated",): crawl_cache.revalidations})
+Gauge("credibility_encoding_cache_lookups_total", "Tokenization cache lookups", ["outcome"], kind="counter",
+      function=lambda: {("hit",): encoding_cache.hits, ("miss",): encoding_cache.misses})
+Gauge("credibility_encoding_cache_tokens", "Tokens held by the tokenization cache",
+      function=lambda: encoding_cache.tokens)
+Gauge("credibility_fact_check_requests_total", "Fact-check API lookups by outcome", ["outcome"], kind="counter",
+      function=lambda: {(outcome,): count for outcome, count in fact_checker.counts.items()})
+Gauge("credibility_padding_tokens_total", "Tokens fed to the model, real and padding", ["kind"], kind="counter",
+      function=lambda: {(kind,): padding_stats.stats()[kind] for kind in ("tokens", "padding")})
+Gauge("credibility_queue_depth", "Work waiting for a thread or a batch", ["queue"],
+      function=lambda: {
+          ("inference",): inference_executor.queue_depth,
+          ("parse",): parse_executor.queue_depth,
+          ("sentiment-batcher",): sentiment._batcher.queue_depth(),
+          ("explain",): explanation_jobs.queue_depth(),
+      })
+Gauge("credibility_inflight", "Jobs running or queued on a pool", ["pool"],
+      function=lambda: {("inference",): inference_executor.inflight, ("parse",): parse_executor.inflight})
+Gauge("credibility_startup_seconds", "Duration of each startup phase; ready is the time from process start",
+      ["phase"], function=lambda: {(entry["phase"],): entry["seconds"] for entry in timeline.report()["phases"]})
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose stage latencies, request counts, cache and queue metrics for Prometheus."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
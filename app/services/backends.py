@@ -0,0 +1,184 @@
+import hashlib
+import inspect
+import logging
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import torch
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+from .config import SENTIMENT_BACKEND, model_revision
+
+logger = logging.getLogger(__name__)
+
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join(".cache", "onnx"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 lets onnxruntime decide
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def quantize_dynamic_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Quantize the Linear layers of a model to int8 weights with dynamic activations."""
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return quantized
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Export wrapper that returns a plain logits tensor instead of a ModelOutput."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def export_onnx(model: torch.nn.Module, tokenizer, path: str):
+    """Export a sequence classifier to an ONNX graph with dynamic batch and length axes.
+
+    Written next to ``path`` and moved into place, so an interrupted export
+    never leaves a truncated graph behind.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    sample = tokenizer(["Exporting the sentiment model."], return_tensors='pt')
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # The TorchScript exporter handles the HF models without extra dependencies
+        kwargs["dynamo"] = False
+    torch.onnx.export(
+        _LogitsOnly(model).eval(),
+        (sample["input_ids"], sample["attention_mask"]),
+        tmp,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+        **kwargs
+    )
+    os.replace(tmp, path)
+    logger.info(f"Exported ONNX model to {path}")
+
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session that can be called like a transformers classifier."""
+
+    def __init__(self, path: str):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("The onnx backend needs onnxruntime: pip install onnxruntime") from e
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.path = path
+
+    def __call__(self, input_ids, attention_mask, **kwargs) -> SequenceClassifierOutput:
+        logits = self.session.run(["logits"], {
+            "input_ids": input_ids.numpy().astype(np.int64),
+            "attention_mask": attention_mask.numpy().astype(np.int64),
+        })[0]
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+
+def weights_revision(model: torch.nn.Module, model_name: str) -> str:
+    """The hub commit or local file revision of the weights, else a hash of the weights themselves."""
+    revision = getattr(model.config, "_commit_hash", None) or model_revision(model_name)
+    if revision:
+        return revision[:12]
+    digest = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode("utf-8"))
+        digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def onnx_path(model_name: str, revision: str) -> str:
+    """One graph per model and revision, so changed weights are exported again."""
+    return os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--"), revision, "model.onnx")
+
+
+def build_backend(name: str, model: torch.nn.Module, tokenizer, model_name: str):
+    """Wrap a loaded fp32 model in the requested inference backend.
+
+    Every backend is called like the original model (``backend(**inputs).logits``).
+    """
+    if name == "torch":
+        return model
+    if name == "torch-int8":
+        return quantize_dynamic_int8(model)
+    if name == "onnx":
+        path = onnx_path(model_name, weights_revision(model, model_name))
+        if os.path.exists(path):
+            try:
+                return OnnxSequenceClassifier(path)
+            except RuntimeError:
+                # onnxruntime isn't installed; exporting again won't help
+                raise
+            except Exception as e:
+                logger.warning(f"Exporting {path} again, the saved graph can't be loaded: {str(e)}")
+        export_onnx(model, tokenizer, path)
+        return OnnxSequenceClassifier(path)
+    raise ValueError(f"Unknown sentiment backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+def predict_probs(model, tokenizer, texts: List[str]) -> np.ndarray:
+    inputs = tokenizer(list(texts), return_tensors='pt', padding=True, truncation=True, max_length=512)
+    with torch.no_grad():
+        logits = model(**inputs).logits
+    return torch.nn.functional.softmax(logits, dim=-1).numpy()
+
+
+def compare_backends(model, tokenizer, model_name: str, texts: List[str],
+                     names=BACKENDS, batch_size: int = 16) -> Dict[str, dict]:
+    """Measure how far each backend's predictions drift from fp32 PyTorch on ``texts``.
+
+    For every backend this reports the share of texts whose label matches fp32,
+    the mean and max absolute change in the probability given to the fp32
+    label, and the average forward-pass latency per batch.
+    """
+    def run(backend):
+        # Untimed pass so one-off setup cost doesn't count against the first backend
+        predict_probs(backend, tokenizer, texts[:batch_size])
+        probs, elapsed = [], 0.0
+        for i in range(0, len(texts), batch_size):
+            start = time.perf_counter()
+            probs.append(predict_probs(backend, tokenizer, texts[i:i + batch_size]))
+            elapsed += time.perf_counter() - start
+        batches = max(1, (len(texts) + batch_size - 1) // batch_size)
+        return np.concatenate(probs), elapsed / batches
+
+    reference, reference_latency = run(model)
+    rows = np.arange(len(reference))
+    reference_labels = reference.argmax(axis=-1)
+    reference_confidence = reference[rows, reference_labels]
+
+    report = {}
+    for name in names:
+        if name == "torch":
+            probs, latency = reference, reference_latency
+        else:
+            probs, latency = run(build_backend(name, model, tokenizer, model_name))
+        labels = probs.argmax(axis=-1)
+        confidence_delta = np.abs(probs[rows, reference_labels] - reference_confidence)
+        report[name] = {
+            "label_agreement": float((labels == reference_labels).mean()),
+            "mean_confidence_delta": float(confidence_delta.mean()),
+            "max_confidence_delta": float(confidence_delta.max()),
+            "batch_latency_ms": latency * 1000.0,
+            "speedup": reference_latency / latency if latency else 0.0,
+        }
+    return report
@@ -0,0 +1,93 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+from .metrics import BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Gather concurrent single-item calls into one call of a batch function.
+
+    Callers block on their own future while a background worker collects
+    up to ``max_batch_size`` items, waiting at most ``max_wait_ms`` after the
+    first one arrives, and hands them to ``batch_fn`` in a single call.
+    ``batch_fn`` must return one result per input, in input order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, name: str = "micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a future for its result."""
+        future = Future()
+        self._ensure_worker().put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def queue_depth(self) -> int:
+        """Number of items waiting for the next batch."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_worker(self) -> queue.Queue:
+        # Threads do not survive fork, so a worker started in a preloaded
+        # parent process has to be recreated in each child.
+        pid = os.getpid()
+        if self._pid == pid and self._worker is not None and self._worker.is_alive():
+            return self._queue
+        with self._lock:
+            if self._pid != pid or self._worker is None or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True)
+                self._worker.start()
+                self._pid = pid
+        return self._queue
+
+    def _collect(self, pending: queue.Queue) -> list:
+        batch = [pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(pending.get_nowait())
+                else:
+                    batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batch = self._collect(pending)
+            # Skip callers that gave up before their turn came
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            BATCH_SIZE.observe(len(batch), batcher=self.name)
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: batch function returned {len(results)} results for {len(batch)} inputs")
+            except Exception as e:
+                logger.error(f"Error in {self.name} batch of {len(batch)}: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,328 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.services.config import MODEL_NAME, SENTIMENT_BACKEND, model_revision
+from app.utils.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# memory | sqlite (memory tier in front of a SQLite file) | off
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join(".cache", "results.sqlite3"))
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# Disk writes between expiring old rows and recounting the stored size, which other processes change too
+RECOUNT_EVERY = 1000
+
+
+@dataclass
+class CacheEntry:
+    value: Dict[str, Any]
+    stored_at: float
+    # HTTP validators of the page the result was computed from (URL entries only)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int = field(default=0)
+
+    def __post_init__(self):
+        if not self.size:
+            self.size = len(json.dumps(self.value))
+
+
+class MemoryBackend:
+    """In-process LRU bounded by entry count and approximate serialized size."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class SQLiteBackend:
+    """On-disk tier that survives restarts, evicting least recently used rows by size."""
+
+    def __init__(self, path: str, max_bytes: int, max_age: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._bytes = 0
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared across a fork
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, etag TEXT, last_modified TEXT, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            self._conn, self._pid = conn, os.getpid()
+            self._bytes = self._count(conn)
+        return self._conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                # Expired rows are only deleted now and then
+                "SELECT value, stored_at, etag, last_modified, size FROM results WHERE key = ? AND stored_at >= ?",
+                (key, time.time() - self.max_age)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        value, stored_at, etag, last_modified, size = row
+        return CacheEntry(json.loads(value), stored_at, etag, last_modified, size)
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            conn = self._connection()
+            old = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.value), entry.stored_at, time.time(), entry.etag, entry.last_modified, entry.size)
+            )
+            self._bytes += entry.size - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes % RECOUNT_EVERY == 0:
+                self._expire(conn)
+            if self._bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _expire(self, conn: sqlite3.Connection):
+        conn.execute("DELETE FROM results WHERE stored_at < ?", (time.time() - self.max_age,))
+        self._bytes = self._count(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        # The running total may be off by other processes' writes; only scan when it says we're over
+        self._expire(conn)
+        while self._bytes > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM results ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            # Only as many of the oldest rows as it takes to get under the bound
+            evicted = []
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._bytes -= size
+            conn.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._bytes -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM results")
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+
+class TieredBackend:
+    """Memory tier in front of a slower persistent tier."""
+
+    def __init__(self, memory: MemoryBackend, disk: SQLiteBackend):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.memory.set(key, entry)
+        self.disk.set(key, entry)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
+
+
+def normalize_text(text: str) -> str:
+    """Normalize whitespace without changing line structure the heuristics look at."""
+    return "\n".join(" ".join(line.split()) for line in text.strip().splitlines())
+
+
+class ResultCache:
+    """Content-addressed cache of analysis results with a TTL and hit/miss counters."""
+
+    def __init__(self, backend, ttl: float, model: Optional[str] = None):
+        self.backend = backend
+        self.ttl = ttl
+        # Part of every key, so results of another model, its weights or backend are never served
+        self._model = model
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @property
+    def model(self) -> str:
+        if self._model is None:
+            self._model = f"{MODEL_NAME}@{model_revision() or 'unknown'}/{SENTIMENT_BACKEND}"
+        return self._model
+
+    def text_key(self, text: str, url: Optional[str] = None) -> str:
+        digest = hashlib.sha256(self.model.encode("utf-8") + b"\0")
+        if url:
+            digest.update(url.encode("utf-8") + b"\0")
+        digest.update(normalize_text(text).encode("utf-8"))
+        return "text:" + digest.hexdigest()
+
+    def url_key(self, url: str) -> str:
+        digest = hashlib.sha256(self.model.encode("utf-8") + b"\0")
+        digest.update(canonicalize_url(url).encode("utf-8"))
+        return "url:" + digest.hexdigest()
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` even if it is stale, for revalidation."""
+        if self.backend is None:
+            return None
+        return self.backend.get(key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached result, counting the hit or miss."""
+        entry = self.lookup(key)
+        if entry is not None and self.is_fresh(entry):
+            self.hits += 1
+            return entry.value
+        # Stale entries stay until evicted so URL results can still be revalidated
+        self.misses += 1
+        return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return {key: self.get(key) for key in keys}
+
+    def set(self, key: str, value: Dict[str, Any], etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        if self.backend is None:
+            return
+        self.backend.set(key, CacheEntry(value, time.time(), etag, last_modified))
+
+    def set_many(self, values: Dict[str, Dict[str, Any]]):
+        for key, value in values.items():
+            self.set(key, value)
+
+    def revalidated(self, key: str, entry: CacheEntry) -> Dict[str, Any]:
+        """Mark a stale entry as confirmed unchanged by the origin and serve it."""
+        self.revalidations += 1
+        self.set(key, entry.value, entry.etag, entry.last_modified)
+        return entry.value
+
+    def delete(self, key: str):
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": RESULT_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "storage": self.backend.stats() if self.backend is not None else {},
+        }
+
+
+def _build_backend(name: str):
+    if name == "off":
+        return None
+    memory = MemoryBackend(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES)
+    if name == "memory":
+        return memory
+    if name == "sqlite":
+        # Stale rows are kept a while past the TTL so URL entries can be revalidated
+        disk = SQLiteBackend(RESULT_CACHE_PATH, RESULT_CACHE_DISK_MAX_BYTES, RESULT_CACHE_TTL_SECONDS * 24)
+        return TieredBackend(memory, disk)
+    raise ValueError(f"Unknown result cache backend '{name}', expected memory, sqlite or off")
+
+
+result_cache = ResultCache(_build_backend(RESULT_CACHE_BACKEND), RESULT_CACHE_TTL_SECONDS)
@@ -0,0 +1,261 @@
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse
+
+from . import registry
+from .features import TextFeatures, extract_features
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Score texts with a linear model first and send only uncertain ones to the transformer
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+# First-stage confidence (probability of its label) needed to skip the transformer
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+# Transformer labels the linear model learns from before it may answer on its own
+CASCADE_MIN_TRAINED = int(os.getenv("CASCADE_MIN_TRAINED", "1000"))
+# Share of texts the first stage answered that are also scored by the transformer to measure agreement
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))
+# .npz file the linear model is saved to as it learns and loaded from; kept in memory only when unset
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH") or None
+# New labels between saves of the linear model
+CASCADE_SAVE_EVERY = int(os.getenv("CASCADE_SAVE_EVERY", "500"))
+
+HASH_FEATURES = 2 ** 18
+# First-stage confidences are tallied in bins of this width from 0.5 to 1
+CONFIDENCE_BIN = 0.05
+
+DECISIONS = Counter("credibility_cascade_decisions_total",
+                    "Texts answered by the linear first stage or escalated to the transformer", ["decision"])
+AGREEMENT = Counter("credibility_cascade_agreement_total",
+                    "First-stage labels checked against the transformer", ["sample", "agreed"])
+
+
+def heuristic_features(features: TextFeatures) -> np.ndarray:
+    """The precomputed heuristic signals as a small dense vector."""
+    return np.array([
+        *(min(count, 5) / 5 for count in features.sensational_counts),
+        float(features.scientific_matches_at_least(2)),
+        float(features.is_weather_alert),
+        float(features.has_clickbait),
+        float(features.has_balanced_language),
+        math.log1p(features.word_count) / 10,
+    ], dtype=np.float64)
+
+
+class CascadeScorer:
+    """Hashed word and bigram logistic regression plus heuristic features, distilled from the transformer.
+
+    It learns online: every text escalated to the transformer, and every
+    audited one, becomes a training example labelled by the transformer.
+    The model is saved to ``path`` (unless None) every CASCADE_SAVE_EVERY labels,
+    as its weights in an .npz file, so loading it never unpickles anything.
+    Until it has seen ``min_trained`` labels everything is escalated.
+    Confidence and agreement with the transformer are tallied per
+    confidence bin, so ``stats`` can show what other thresholds would cost.
+    """
+
+    def __init__(self, path: Optional[str], threshold: float = CASCADE_THRESHOLD, min_trained: int = CASCADE_MIN_TRAINED,
+                 audit_rate: float = CASCADE_AUDIT_RATE):
+        self.path = path
+        self.threshold = threshold
+        self.min_trained = min_trained
+        self.audit_rate = audit_rate
+        # Built on first use, so scikit-learn isn't imported unless the cascade runs
+        self._vectorizer = None
+        self.model = None
+        self.trained = 0
+        self._unsaved = 0
+        bins = int(round(0.5 / CONFIDENCE_BIN))
+        # Per confidence bin: texts seen, texts with a transformer label, labels that agreed
+        self.seen = [0] * bins
+        self.labelled = [0] * bins
+        self.agreed = [0] * bins
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            self._vectorizer = HashingVectorizer(
+                n_features=HASH_FEATURES, ngram_range=(1, 2), alternate_sign=False, norm="l2", lowercase=True
+            )
+        return self._vectorizer
+
+    def _vectors(self, texts: Sequence[str], features: Sequence[TextFeatures]):
+        hashed = self.vectorizer.transform(texts)
+        dense = scipy.sparse.csr_matrix(np.vstack([heuristic_features(f) for f in features]))
+        return scipy.sparse.hstack([hashed, dense], format="csr")
+
+    @staticmethod
+    def _bin(confidence: float, bins: int) -> int:
+        return min(int((confidence - 0.5) / CONFIDENCE_BIN), bins - 1)
+
+    @property
+    def ready(self) -> bool:
+        return self.trained >= self.min_trained
+
+    def predict(self, texts: Sequence[str], features: Sequence[TextFeatures]) -> np.ndarray:
+        """Probability that each text is POSITIVE; 0.5 for all until the model has been fit."""
+        if not self.trained:
+            return np.full(len(texts), 0.5)
+        vectors = self._vectors(texts, features)
+        with self._lock:
+            return self.model.predict_proba(vectors)[:, 1]
+
+    def decide(self, probabilities: np.ndarray) -> List[bool]:
+        """Whether each text has to go to the transformer; counts the decisions."""
+        escalate = []
+        for p in probabilities:
+            confidence = max(p, 1 - p)
+            with self._lock:
+                self.seen[self._bin(confidence, len(self.seen))] += 1
+            escalated = not self.ready or confidence < self.threshold
+            DECISIONS.inc(decision="escalated" if escalated else "accepted")
+            escalate.append(escalated)
+        return escalate
+
+    def should_audit(self) -> bool:
+        return self._random.random() < self.audit_rate
+
+    def learn(self, texts: Sequence[str], features: Sequence[TextFeatures], probabilities: np.ndarray,
+              labels: Sequence[int], sample: str):
+        """Fit on transformer labels and record how often the first stage agreed with them."""
+        vectors = self._vectors(texts, features)
+        with self._lock:
+            if self.model is None:
+                self.model = self._new_model()
+            if self.trained:
+                for p, label in zip(probabilities, labels):
+                    i = self._bin(max(p, 1 - p), len(self.seen))
+                    agreed = int(p >= 0.5) == label
+                    self.labelled[i] += 1
+                    self.agreed[i] += agreed
+                    AGREEMENT.inc(sample=sample, agreed=str(agreed).lower())
+            self.model.partial_fit(vectors, labels, classes=[0, 1])
+            self.trained += len(labels)
+            self._unsaved += len(labels)
+            save = self.path is not None and self._unsaved >= CASCADE_SAVE_EVERY
+            if save:
+                self._unsaved = 0
+        if save:
+            self.save()
+
+    def stats(self) -> Dict[str, object]:
+        """Escalation rate and estimated agreement with the transformer at each candidate threshold."""
+        with self._lock:
+            seen, labelled, agreed = list(self.seen), list(self.labelled), list(self.agreed)
+        total = sum(seen)
+        thresholds = []
+        for i in range(len(seen)):
+            accepted = seen[i:]
+            # Agreement of a bin is estimated from its labelled texts and weighted by its traffic
+            weighted = sum(s * a / l for s, a, l in zip(accepted, agreed[i:], labelled[i:]) if l)
+            covered = sum(s for s, l in zip(accepted, labelled[i:]) if l)
+            thresholds.append({
+                "threshold": round(0.5 + i * CONFIDENCE_BIN, 2),
+                "escalationRate": round(1 - sum(accepted) / total, 4) if total else None,
+                "agreement": round(weighted / covered, 4) if covered else None,
+            })
+        return {
+            "enabled": CASCADE_ENABLED,
+            "threshold": self.threshold,
+            "trained": self.trained,
+            "ready": self.ready,
+            "texts": total,
+            "thresholds": thresholds,
+        }
+
+    @staticmethod
+    def _new_model():
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+
+    def save(self):
+        with self._lock:
+            if self.model is None:
+                return
+            state = {"coef": self.model.coef_.copy(), "intercept": self.model.intercept_.copy(),
+                     "t": np.float64(self.model.t_), "trained": np.int64(self.trained)}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **state)
+        os.replace(tmp, self.path)
+
+    def load(self) -> "CascadeScorer":
+        if self.path is None or not os.path.exists(self.path):
+            return self
+        try:
+            with np.load(self.path, allow_pickle=False) as state:
+                coef, intercept = state["coef"].astype(np.float64), state["intercept"].astype(np.float64)
+                t, trained = float(state["t"]), int(state["trained"])
+            features = HASH_FEATURES + len(heuristic_features(extract_features("")))
+            if coef.shape != (1, features) or intercept.shape != (1,):
+                raise ValueError(f"weights of shape {coef.shape} for {features} features")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cascade model {self.path}: {str(e)}")
+            return self
+        model = self._new_model()
+        # What partial_fit leaves behind, so learning carries on where it stopped
+        model.coef_, model.intercept_, model.t_ = coef, intercept, t
+        model.classes_ = np.array([0, 1])
+        model.n_features_in_ = features
+        with self._lock:
+            self.model, self.trained = model, trained
+        logger.info(f"Loaded cascade model trained on {self.trained} labels")
+        return self
+
+
+cascade_scorer = CascadeScorer(CASCADE_MODEL_PATH)
+
+Gauge("credibility_cascade_trained_labels", "Transformer labels the cascade first stage learned from",
+      function=lambda: cascade_scorer.trained)
+
+
+def _result(label: int, confidence: float, stage: str) -> dict:
+    return {"sentiment": "POSITIVE" if label == 1 else "NEGATIVE", "confidence": float(confidence), "stage": stage}
+
+
+def cascade_sentiment_batch(texts: List[str], transformer, features: Optional[List[TextFeatures]] = None) -> List[dict]:
+    """Sentiment of each text from the linear first stage, or from ``transformer`` when it is unsure.
+
+    ``transformer`` takes a list of texts and returns analyze_sentiment_batch
+    style results. Audited texts get the transformer's answer as well.
+    """
+    scorer = registry.get("cascade")
+    features = features or [extract_features(text) for text in texts]
+    probabilities = scorer.predict(texts, features)
+    escalate = scorer.decide(probabilities)
+    audit = [not e and scorer.should_audit() for e in escalate]
+    send = [i for i in range(len(texts)) if escalate[i] or audit[i]]
+
+    results: List[Optional[dict]] = [None] * len(texts)
+    if send:
+        scored = transformer([texts[i] for i in send])
+        for i, result in zip(send, scored):
+            results[i] = dict(result, stage="transformer")
+        for sample, chosen in (("escalated", [i for i in send if escalate[i]]), ("audited", [i for i in send if audit[i]])):
+            if chosen:
+                labels = [int(results[i]["sentiment"] == "POSITIVE") for i in chosen]
+                scorer.learn([texts[i] for i in chosen], [features[i] for i in chosen],
+                             probabilities[chosen], labels, sample)
+    for i, p in enumerate(probabilities):
+        if results[i] is None:
+            results[i] = _result(int(p >= 0.5), max(p, 1 - p), "linear")
+    return results
+
+
+def load_cascade() -> CascadeScorer:
+    return cascade_scorer.load()
+
+
+registry.register("cascade", load_cascade, eager=CASCADE_ENABLED)
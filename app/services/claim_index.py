@@ -0,0 +1,508 @@
+import fcntl
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from . import registry
+from .config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Directory of the memory-mapped index shared by all workers; unset builds a private copy in memory
+CLAIM_INDEX_DIR = os.getenv("CLAIM_INDEX_DIR") or None
+# Fact-checked claims the index is first built from, one JSON object per line
+CLAIM_CORPUS_PATH = os.getenv("CLAIM_CORPUS_PATH", os.path.join(DATA_DIR, "fact_checks.jsonl"))
+# Lowest similarity at which a known fact-check is taken to be about the same claim
+CLAIM_MATCH_MIN_SIMILARITY = float(os.getenv("CLAIM_MATCH_MIN_SIMILARITY", "0.5"))
+# Sentence-embedding model for reranking lexical candidates; unset keeps the index lexical only
+CLAIM_INDEX_EMBEDDING_MODEL = os.getenv("CLAIM_INDEX_EMBEDDING_MODEL") or None
+# Share of the final similarity that comes from the embedding cosine
+CLAIM_INDEX_EMBEDDING_WEIGHT = float(os.getenv("CLAIM_INDEX_EMBEDDING_WEIGHT", "0.5"))
+# Added claims kept in the append log before they are merged into a new generation
+CLAIM_INDEX_DELTA_LIMIT = int(os.getenv("CLAIM_INDEX_DELTA_LIMIT", "5000"))
+# How often workers check for a new generation or added claims
+CLAIM_INDEX_RELOAD_SECONDS = float(os.getenv("CLAIM_INDEX_RELOAD_SECONDS", "5"))
+
+N_FEATURES = 2 ** 20
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Lexical candidates per segment that are reranked and returned
+CANDIDATES = 50
+# Terms in more than this share of claims are too common to find candidates with
+COMMON_TERM_RATIO = 0.05
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_LENGTH = 128
+GENERATIONS_KEPT = 2
+
+RECORD_FIELDS = ("claim", "rating", "source", "url", "explanation")
+
+_vectorizer = None
+
+
+def vectorizer():
+    """Stateless, so every process and thread hashes terms to the same features.
+
+    Built on first use so scikit-learn is imported while the index loads,
+    not when the app is imported.
+    """
+    global _vectorizer
+    if _vectorizer is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+        _vectorizer = HashingVectorizer(
+            n_features=N_FEATURES, alternate_sign=False, norm=None, stop_words="english",
+            ngram_range=(1, 2), dtype=np.float32
+        )
+    return _vectorizer
+
+
+@dataclass
+class ClaimMatch:
+    claim: str
+    rating: str
+    source: str
+    url: str
+    explanation: str
+    similarity: float
+
+
+def bm25_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    return np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+
+def term_counts(texts: List[str]) -> sparse.csr_matrix:
+    if not texts:
+        # HashingVectorizer can't transform an empty list
+        return sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+    counts = vectorizer().transform(texts)
+    counts.sum_duplicates()
+    return counts
+
+
+def bm25_postings(counts: sparse.csr_matrix, df: np.ndarray, n_docs: int,
+                  avgdl: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """BM25 weight of every (claim, term) pair as term-major postings, plus each claim's vector norm.
+
+    ``df``, ``n_docs`` and ``avgdl`` are the collection statistics the
+    weights are computed with, which may cover more claims than ``counts``.
+    """
+    lengths = np.asarray(counts.sum(axis=1), dtype=np.float32).ravel()
+    rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+    tf = counts.data
+    saturation = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[rows] / max(avgdl, 1.0)))
+    weights = (bm25_idf(df, n_docs)[counts.indices] * saturation).astype(np.float32)
+    weighted = sparse.csr_matrix((weights, counts.indices, counts.indptr), shape=counts.shape)
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1), dtype=np.float32).ravel())
+    by_term = weighted.tocsc()
+    by_term.sort_indices()
+    return (by_term.indptr.astype(np.int64), by_term.indices.astype(np.int32),
+            by_term.data.astype(np.float32), norms)
+
+
+def load_embedder():
+    from transformers import AutoModel, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(CLAIM_INDEX_EMBEDDING_MODEL)
+    model = AutoModel.from_pretrained(CLAIM_INDEX_EMBEDDING_MODEL)
+    model.eval()
+    return model, tokenizer, threading.Lock()
+
+
+registry.register("claim-embedder", load_embedder, eager=False)
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    """Unit-length mean-pooled sentence embeddings."""
+    import torch
+    model, tokenizer, lock = registry.get("claim-embedder")
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        with lock:
+            inputs = tokenizer(texts[start:start + EMBEDDING_BATCH_SIZE], return_tensors="pt", padding=True,
+                               truncation=True, max_length=EMBEDDING_MAX_LENGTH)
+        with torch.no_grad():
+            hidden = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        vectors.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.concatenate(vectors).astype(np.float32)
+
+
+class _Segment:
+    """Postings, norms, records and optional embeddings of a set of claims."""
+
+    def __init__(self, indptr, docs, weights, norms, records, embeddings=None):
+        self.indptr = indptr
+        self.docs = docs
+        self.weights = weights
+        self.norms = norms
+        self.records = records
+        self.embeddings = embeddings
+        self.size = len(norms)
+
+    def candidates(self, terms: np.ndarray, query_weights: np.ndarray,
+                   limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Claims sharing a term with the query and their cosine with it, best ``limit`` first."""
+        starts, ends = self.indptr[terms], self.indptr[terms + 1]
+        common = (ends - starts) > max(COMMON_TERM_RATIO * self.size, 100)
+        if common.any() and not common.all():
+            starts, ends, query_weights_used = starts[~common], ends[~common], query_weights[~common]
+        else:
+            query_weights_used = query_weights
+        if not len(starts) or not (ends - starts).any():
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        docs = np.concatenate([self.docs[s:e] for s, e in zip(starts, ends)])
+        weights = np.concatenate([self.weights[s:e] * w for s, e, w in zip(starts, ends, query_weights_used)])
+        ids, inverse = np.unique(docs, return_inverse=True)
+        dots = np.bincount(inverse, weights=weights)
+        similarities = dots / (self.norms[ids] * np.linalg.norm(query_weights) + 1e-9)
+        if len(ids) > limit:
+            top = np.argpartition(-similarities, limit)[:limit]
+            ids, similarities = ids[top], similarities[top]
+        return ids, similarities.astype(np.float32)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """A generation with its added claims, published as one object so a search never mixes two."""
+    generation: str
+    base: _Segment
+    base_df: np.ndarray
+    meta: dict
+    delta: Optional[_Segment] = None
+
+
+class _RecordFile:
+    """Claim records of a generation, read through a memory map of its JSONL file."""
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self.offsets = offsets
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+
+    def __getitem__(self, i: int) -> dict:
+        return json.loads(self._map[self.offsets[i]:self.offsets[i + 1]])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def build_generation(records: List[dict], with_embeddings: bool) -> Tuple[Dict[str, np.ndarray], dict]:
+    """Index arrays and metadata of ``records``."""
+    texts = [record["claim"] for record in records]
+    counts = term_counts(texts)
+    df = np.bincount(counts.indices, minlength=N_FEATURES).astype(np.int32)
+    total_length = float(counts.sum())
+    avgdl = total_length / max(len(texts), 1)
+    indptr, docs, weights, norms = bm25_postings(counts, df, len(texts), avgdl)
+    arrays = {"indptr": indptr, "docs": docs, "weights": weights, "norms": norms, "df": df}
+    embedding_model = None
+    if with_embeddings and texts:
+        # float16 halves the file; cosine ranking doesn't need more precision
+        arrays["embeddings"] = embed(texts).astype(np.float16)
+        embedding_model = CLAIM_INDEX_EMBEDDING_MODEL
+    meta = {"claims": len(texts), "total_length": total_length,
+            "embedding_model": embedding_model, "built_at": time.time()}
+    return arrays, meta
+
+
+def write_generation(path: str, records: List[dict], with_embeddings: bool):
+    """Build the index files of ``records`` into the directory ``path``."""
+    os.makedirs(path)
+    arrays, meta = build_generation(records, with_embeddings)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    offsets = [0]
+    with open(os.path.join(path, "claims.jsonl"), "wb") as f:
+        for record in records:
+            line = json.dumps({field: record.get(field, "") for field in RECORD_FIELDS}).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(path, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def read_corpus(path: str) -> List[dict]:
+    records = []
+    if not os.path.exists(path):
+        logger.warning(f"Fact-check corpus {path} not found, the claim index starts empty")
+        return records
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("claim") or not record.get("rating"):
+                raise ValueError(f"{path}:{number}: claim and rating are required")
+            records.append(record)
+    return records
+
+
+class ClaimIndex:
+    """Local index of fact-checked claims for matching extracted claims in milliseconds.
+
+    Claims are matched by the cosine of their BM25-weighted hashed term
+    vectors (unigrams and bigrams), optionally blended with a sentence
+    embedding cosine. The index is stored as generations of ``.npy`` files
+    that workers memory-map, so they share one copy in the page cache.
+    Claims added later go to an append log next to the current generation
+    that every worker reads in; once the log passes ``delta_limit`` claims
+    a new generation is built with everything and becomes current.
+
+    Without a ``directory``, or when it can't be written or read, each
+    process builds the index from the corpus in memory (empty if that fails
+    too), so matching degrades instead of blocking readiness. Claims can't
+    be added to an in-memory index, since other workers would never see them.
+    """
+
+    def __init__(self, directory: Optional[str], corpus_path: str, delta_limit: int = CLAIM_INDEX_DELTA_LIMIT,
+                 reload_seconds: float = CLAIM_INDEX_RELOAD_SECONDS):
+        self.directory = directory
+        self.corpus_path = corpus_path
+        self.delta_limit = delta_limit
+        self.reload_seconds = reload_seconds
+        # Replaced, never mutated, under _lock; readers take it once per call
+        self._snapshot: Optional[_Snapshot] = None
+        self._delta_records: List[dict] = []
+        self._delta_offset = 0
+        self._checked: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings_enabled(self) -> bool:
+        return CLAIM_INDEX_EMBEDDING_MODEL is not None
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(self._path(".lock"), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _current(self) -> Optional[str]:
+        try:
+            with open(self._path("CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self, force: bool = False):
+        """Open a new current generation and read in claims added since the last check."""
+        if not force and self._checked is not None and time.monotonic() - self._checked < self.reload_seconds:
+            return
+        with self._lock:
+            if self.directory is not None:
+                try:
+                    generation = self._current()
+                    if generation is None:
+                        with self._file_lock():
+                            generation = self._current() or self._publish(read_corpus(self.corpus_path))
+                    snapshot = self._snapshot
+                    if snapshot is None or generation != snapshot.generation:
+                        snapshot = self._open(generation)
+                    self._snapshot = self._read_delta(snapshot)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Claim index {self.directory} can't be used ({str(e)}), keeping it in memory")
+                    self.directory = None
+                    self._snapshot = None
+            if self._snapshot is None:
+                self._snapshot = self._build_in_memory()
+            # Only now, so readers arriving during the first load wait on the lock
+            self._checked = time.monotonic()
+
+    def _build_in_memory(self) -> _Snapshot:
+        try:
+            records = [{field: record.get(field, "") for field in RECORD_FIELDS}
+                       for record in read_corpus(self.corpus_path)]
+            arrays, meta = build_generation(records, self.embeddings_enabled)
+        except Exception as e:
+            logger.error(f"Building the claim index from {self.corpus_path} failed ({str(e)}), starting it empty")
+            records = []
+            arrays, meta = build_generation(records, False)
+        base = _Segment(arrays["indptr"], arrays["docs"], arrays["weights"], arrays["norms"], records,
+                        arrays.get("embeddings"))
+        logger.info(f"Built in-memory claim index with {base.size} claims")
+        return _Snapshot("memory", base, arrays["df"], meta)
+
+    def _require_directory(self):
+        if self.directory is None:
+            raise RuntimeError("The claim index is kept in memory; set CLAIM_INDEX_DIR to add claims or rebuild it")
+
+    def _open(self, generation: str) -> _Snapshot:
+        path = self._path(generation)
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        embeddings = None
+        if self.embeddings_enabled:
+            if meta.get("embedding_model") == CLAIM_INDEX_EMBEDDING_MODEL:
+                embeddings = load("embeddings")
+            else:
+                logger.warning(f"Claim index {generation} has no {CLAIM_INDEX_EMBEDDING_MODEL} embeddings, "
+                               f"matching lexically until the next rebuild")
+        records = _RecordFile(os.path.join(path, "claims.jsonl"), load("offsets"))
+        base = _Segment(load("indptr"), load("docs"), load("weights"), load("norms"), records, embeddings)
+        self._delta_records, self._delta_offset = [], 0
+        logger.info(f"Opened claim index {generation} with {base.size} claims")
+        return _Snapshot(generation, base, load("df"), meta)
+
+    def _read_delta(self, snapshot: _Snapshot) -> _Snapshot:
+        path = self._path(snapshot.generation, "pending.jsonl")
+        if not os.path.exists(path) or os.path.getsize(path) <= self._delta_offset:
+            return snapshot
+        with open(path, "rb") as f:
+            f.seek(self._delta_offset)
+            data = f.read()
+        # A line still being appended by another worker is picked up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        self._delta_offset += len(complete)
+        self._delta_records.extend(json.loads(line) for line in complete.splitlines() if line.strip())
+        return replace(snapshot, delta=self._build_delta(snapshot, self._delta_records))
+
+    @staticmethod
+    def _build_delta(snapshot: _Snapshot, records: List[dict]) -> Optional[_Segment]:
+        if not records:
+            return None
+        counts = term_counts([record["claim"] for record in records])
+        df = np.asarray(snapshot.base_df) + np.bincount(counts.indices, minlength=N_FEATURES).astype(np.int32)
+        n_docs = snapshot.base.size + len(records)
+        avgdl = (snapshot.meta["total_length"] + float(counts.sum())) / n_docs
+        indptr, docs, weights, norms = bm25_postings(counts, df, n_docs, avgdl)
+        embeddings = None
+        if snapshot.base.embeddings is not None:
+            embeddings = embed([record["claim"] for record in records])
+        return _Segment(indptr, docs, weights, norms, records, embeddings)
+
+    def _publish(self, records: List[dict]) -> str:
+        """Write ``records`` as a new generation and make it current. Needs the file lock."""
+        start = time.perf_counter()
+        generation = f"gen-{time.time_ns()}"
+        write_generation(self._path(generation), records, self.embeddings_enabled)
+        pointer = self._path(f"CURRENT.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(generation)
+        os.replace(pointer, self._path("CURRENT"))
+        # Workers still reading an older generation keep their maps of unlinked files
+        stale = sorted(name for name in os.listdir(self.directory) if name.startswith("gen-"))[:-GENERATIONS_KEPT]
+        for name in stale:
+            for file in os.listdir(self._path(name)):
+                os.unlink(self._path(name, file))
+            os.rmdir(self._path(name))
+        logger.info(f"Built claim index {generation} with {len(records)} claims in {time.perf_counter() - start:.2f}s")
+        return generation
+
+    def search(self, text: str, k: int = 5) -> List[ClaimMatch]:
+        """The ``k`` known fact-checks most similar to ``text``, most similar first."""
+        self._refresh()
+        snapshot = self._snapshot
+        base, delta = snapshot.base, snapshot.delta
+        counts = term_counts([text])
+        terms = counts.indices.astype(np.int64)
+        if not len(terms):
+            return []
+        df = np.asarray(snapshot.base_df[terms])
+        n_docs = base.size
+        if delta is not None:
+            df = df + np.diff(delta.indptr)[terms]
+            n_docs += delta.size
+        query_weights = bm25_idf(df, n_docs) * counts.data
+
+        query_embedding = None
+        found = []
+        for segment in (base, delta):
+            if segment is None or not segment.size:
+                continue
+            ids, similarities = segment.candidates(terms, query_weights, CANDIDATES)
+            if segment.embeddings is not None and len(ids):
+                if query_embedding is None:
+                    query_embedding = embed([text])[0]
+                semantic = np.asarray(segment.embeddings[ids], dtype=np.float32) @ query_embedding
+                similarities = (1 - CLAIM_INDEX_EMBEDDING_WEIGHT) * similarities + CLAIM_INDEX_EMBEDDING_WEIGHT * semantic
+            found.extend((float(similarity), segment, int(i)) for i, similarity in zip(ids, similarities))
+        found.sort(key=lambda item: -item[0])
+        return [ClaimMatch(**{field: segment.records[i].get(field, "") for field in RECORD_FIELDS},
+                           similarity=round(similarity, 4))
+                for similarity, segment, i in found[:k]]
+
+    def best_match(self, text: str, min_similarity: float = CLAIM_MATCH_MIN_SIMILARITY) -> Optional[ClaimMatch]:
+        matches = self.search(text, k=1)
+        if matches and matches[0].similarity >= min_similarity:
+            return matches[0]
+        return None
+
+    def add(self, records: Iterable[dict]) -> int:
+        """Append fact-checked claims; they are searchable in every worker after its next refresh."""
+        records = list(records)
+        for record in records:
+            if not record.get("claim") or not record.get("rating"):
+                raise ValueError("claim and rating are required")
+        self._refresh(force=True)
+        self._require_directory()
+        with self._file_lock():
+            generation = self._current()
+            with open(self._path(generation, "pending.jsonl"), "ab") as f:
+                f.write(b"".join(
+                    json.dumps({field: record.get(field, "") for field in RECORD_FIELDS}).encode("utf-8") + b"\n"
+                    for record in records
+                ))
+        self._refresh(force=True)
+        delta = self._snapshot.delta
+        if delta is not None and delta.size >= self.delta_limit:
+            self.rebuild()
+        return len(records)
+
+    def rebuild(self) -> str:
+        """Merge the current generation and its added claims into a new generation."""
+        self._refresh(force=True)
+        self._require_directory()
+        with self._lock, self._file_lock():
+            # Another worker may have rebuilt or added claims while we waited for the lock
+            generation = self._current()
+            snapshot = self._snapshot
+            if generation != snapshot.generation:
+                snapshot = self._open(generation)
+            snapshot = self._read_delta(snapshot)
+            generation = self._publish(list(snapshot.base.records) + self._delta_records)
+            self._snapshot = self._open(generation)
+            self._checked = time.monotonic()
+        return generation
+
+    def stats(self) -> Dict[str, object]:
+        self._refresh()
+        snapshot = self._snapshot
+        return {
+            "generation": snapshot.generation,
+            "claims": snapshot.base.size,
+            "addedClaims": snapshot.delta.size if snapshot.delta is not None else 0,
+            "embeddingModel": snapshot.meta.get("embedding_model"),
+        }
+
+
+claim_index = ClaimIndex(CLAIM_INDEX_DIR, CLAIM_CORPUS_PATH)
+
+
+def load_claim_index() -> ClaimIndex:
+    """Open, or on first start build, the claim index so requests never wait for it."""
+    claim_index._refresh(force=True)
+    return claim_index
+
+
+def warmup_claim_index(index: ClaimIndex):
+    index.search("Warming up the claim index.")
+
+
+registry.register("claim-index", load_claim_index, warmup=warmup_claim_index)
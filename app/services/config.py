@@ -0,0 +1,37 @@
+import hashlib
+import os
+from typing import Optional
+
+# Data files that ship with the app (domain reputation, public suffixes, known fact-checks)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Sentiment model, a hub name or a local directory
+MODEL_NAME = os.getenv("SENTIMENT_MODEL_NAME", "distilbert-base-uncased-finetuned-sst-2-english")
+# torch | torch-int8 | onnx
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+# Concurrent analyze_sentiment calls are grouped into one padded forward pass of up to this many texts
+BATCH_MAX_SIZE = int(os.getenv("SENTIMENT_BATCH_MAX_SIZE", "16"))
+
+# Files whose contents decide the model's predictions
+WEIGHT_FILES = (".safetensors", ".bin", ".pt", ".json", ".txt", ".model")
+
+
+def model_revision(model_name: str = MODEL_NAME) -> Optional[str]:
+    """Short id of the weights behind ``model_name``, or None while they aren't downloaded.
+
+    The commit of a hub model in the local cache, or a hash of the names,
+    sizes and modification times of a local directory's files.
+    """
+    if os.path.isdir(model_name):
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(model_name)):
+            if name.endswith(WEIGHT_FILES):
+                stat = os.stat(os.path.join(model_name, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()[:12]
+    from huggingface_hub import try_to_load_from_cache
+    config = try_to_load_from_cache(model_name, "config.json")
+    if not isinstance(config, str):
+        return None
+    # .../snapshots/<commit>/config.json
+    return os.path.basename(os.path.dirname(config))[:12]
@@ -0,0 +1,188 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.utils.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Opt-in, since it writes to CRAWL_CACHE_PATH; point that at a volume meant for it
+CRAWL_CACHE_ENABLED = os.getenv("CRAWL_CACHE_ENABLED", "0") == "1"
+CRAWL_CACHE_PATH = os.getenv("CRAWL_CACHE_PATH", os.path.join(".cache", "crawl.sqlite3"))
+CRAWL_CACHE_MAX_BYTES = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Pages validated this recently are served without asking the origin
+CRAWL_CACHE_FRESH_SECONDS = float(os.getenv("CRAWL_CACHE_FRESH_SECONDS", "300"))
+COMPRESSION_LEVEL = 6
+# Writes between recounts of the stored size, which other processes change too
+RECOUNT_EVERY = 1000
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    # Last time the origin sent the page or confirmed it unchanged
+    validated_at: float
+    body: Optional[bytes] = None
+
+    @property
+    def html(self) -> str:
+        return zlib.decompress(self.body).decode("utf-8") if self.body else ""
+
+    def is_fresh(self, max_age: float = CRAWL_CACHE_FRESH_SECONDS) -> bool:
+        return time.time() - self.validated_at < max_age
+
+
+class CrawlCache:
+    """On-disk store of fetched pages keyed by canonical URL.
+
+    Keeps the compressed response body, the extracted text and the HTTP
+    validators, so popular URLs are revalidated with a conditional request
+    instead of being downloaded and parsed again. Least recently used pages
+    are evicted once the stored size passes ``max_bytes``.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        # Bytes stored, as counted when the connection opened plus this process's own writes
+        self._bytes = 0
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared across a fork
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, body BLOB, text TEXT NOT NULL, "
+                "etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, validated_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+            self._conn, self._pid = conn, os.getpid()
+            self._bytes = self._count(conn)
+        return self._conn
+
+    @staticmethod
+    def _count(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    @staticmethod
+    def key(url: str) -> str:
+        return canonicalize_url(url)
+
+    def get(self, url: str, with_body: bool = False) -> Optional[CrawledPage]:
+        """Return the stored page for ``url``, fresh or not."""
+        if not self.enabled:
+            return None
+        columns = "url, text, etag, last_modified, fetched_at, validated_at" + (", body" if with_body else "")
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(f"SELECT {columns} FROM pages WHERE key = ?", (self.key(url),)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), self.key(url)))
+        return CrawledPage(*row)
+
+    def put(self, url: str, html: str, text: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        if not self.enabled:
+            return
+        body = zlib.compress(html.encode("utf-8"), COMPRESSION_LEVEL)
+        size = len(body) + len(text.encode("utf-8"))
+        now = time.time()
+        key = self.key(url)
+        with self._lock:
+            conn = self._connection()
+            old = conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body, text, etag, last_modified, now, now, now, size)
+            )
+            self._bytes += size - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes % RECOUNT_EVERY == 0:
+                self._bytes = self._count(conn)
+            if self._bytes > self.max_bytes:
+                self._evict(conn)
+
+    def revalidated(self, url: str):
+        """Record that the origin answered 304 Not Modified for ``url``."""
+        if not self.enabled:
+            return
+        self.revalidations += 1
+        with self._lock:
+            self._connection().execute(
+                "UPDATE pages SET validated_at = ? WHERE key = ?", (time.time(), self.key(url))
+            )
+
+    def _evict(self, conn: sqlite3.Connection):
+        # The running total may be off by other processes' writes; only scan when it says we're over
+        self._bytes = self._count(conn)
+        while self._bytes > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM pages ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            # Only as many of the oldest rows as it takes to get under the bound
+            evicted = []
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._bytes -= size
+            conn.executemany("DELETE FROM pages WHERE key = ?", evicted)
+
+    def purge(self, url: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        """Delete one URL's page, pages last validated more than ``older_than`` seconds ago, or everything."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            if url is not None:
+                cursor = conn.execute("DELETE FROM pages WHERE key = ?", (self.key(url),))
+            elif older_than is not None:
+                cursor = conn.execute("DELETE FROM pages WHERE validated_at < ?", (time.time() - older_than,))
+            else:
+                cursor = conn.execute("DELETE FROM pages")
+            self._bytes = self._count(conn)
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+crawl_cache = CrawlCache(CRAWL_CACHE_PATH, CRAWL_CACHE_MAX_BYTES, CRAWL_CACHE_ENABLED)
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .config import BATCH_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Each analysis waits on its pool thread while its text sits in the sentiment micro-batch,
+# so a full batch can only form with at least BATCH_MAX_SIZE threads
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE") or BATCH_MAX_SIZE)
+INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "32"))
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", "2"))
+PARSE_QUEUE_LIMIT = int(os.getenv("PARSE_QUEUE_LIMIT", "32"))
+
+
+class Overloaded(Exception):
+    """Raised when a pool already has as much work queued as it may hold."""
+
+
+class BoundedExecutor:
+    """Thread pool for blocking work with a hard limit on queued jobs.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a thread. Anything beyond that is rejected immediately with
+    ``Overloaded`` so callers can shed load instead of letting latency grow.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.name = name
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._inflight = 0
+
+    @property
+    def inflight(self) -> int:
+        """Number of jobs running or waiting for a thread."""
+        return self._inflight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a thread."""
+        return max(0, self._inflight - self.max_workers)
+
+    def has_capacity(self) -> bool:
+        return self._inflight < self.max_workers + self.max_queue
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Pools created before a fork have no live threads in the child
+        pid = os.getpid()
+        with self._lock:
+            if self._pool is None or self._pid != pid:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                self._pid = pid
+            return self._pool
+
+    def _acquire(self):
+        with self._lock:
+            if self._inflight >= self.max_workers + self.max_queue:
+                raise Overloaded(f"{self.name} is at capacity ({self._inflight} jobs in flight)")
+            self._inflight += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._inflight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` on the pool without blocking the event loop."""
+        self._acquire()
+        try:
+            ctx = contextvars.copy_context()
+            future = self._get_pool().submit(ctx.run, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # Release the slot when the job really finishes, even if the awaiting
+        # request is cancelled first
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+# Model inference and the rest of the analysis pipeline
+inference_executor = BoundedExecutor(INFERENCE_POOL_SIZE, INFERENCE_QUEUE_LIMIT, "inference")
+
+# HTML parsing of fetched pages
+parse_executor = BoundedExecutor(PARSE_POOL_SIZE, PARSE_QUEUE_LIMIT, "parse")
@@ -1,20 +1,119 @@
-import lime
-import lime.lime_text
-from .model import model, tokenizer, class_names
+from .model import get_model_and_tokenizer, get_fp32_model_and_tokenizer, class_names
+from .tokenization import encode, encode_ids, length_batches, pad
+from collections import OrderedDict
+import hashlib
+import html
+import logging
+import os
+import threading
+import time
 import torch
 import numpy as np
 import re
+from typing import Callable
 
-def predict_proba(texts):
-    """Predict probabilities for LIME explanation."""
+logger = logging.getLogger(__name__)
+
+# lime | gradient
+EXPLAIN_MODE = os.getenv("EXPLAIN_MODE", "lime")
+EXPLAIN_MAX_SAMPLES = int(os.getenv("EXPLAIN_MAX_SAMPLES", "1000"))
+EXPLAIN_INITIAL_SAMPLES = int(os.getenv("EXPLAIN_INITIAL_SAMPLES", "200"))
+EXPLAIN_TIME_BUDGET_MS = float(os.getenv("EXPLAIN_TIME_BUDGET_MS", "3000"))
+# Perturbed texts scored per forward pass; bounds activation memory
+EXPLAIN_BATCH_SIZE = int(os.getenv("EXPLAIN_BATCH_SIZE", "32"))
+# Largest change in any feature weight, relative to the largest weight, that counts as converged
+EXPLAIN_CONVERGENCE_TOL = float(os.getenv("EXPLAIN_CONVERGENCE_TOL", "0.05"))
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "20000"))
+
+NUM_FEATURES = 10
+EXPLAINED_LABEL = 1
+
+_explainer = None
+_explainer_lock = threading.Lock()
+
+
+class PredictionCache:
+    """Bounded LRU of class probabilities keyed by a digest of the scored text."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            probs = self._entries.get(key)
+            if probs is not None:
+                self._entries.move_to_end(key)
+            return probs
+
+    def set(self, key: bytes, probs: np.ndarray):
+        with self._lock:
+            self._entries[key] = probs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_prediction_cache = PredictionCache(EXPLAIN_CACHE_SIZE)
+
+
+def get_explainer() -> "lime.lime_text.LimeTextExplainer":
+    """Shared explainer; only its kernel-weighted regression is used per call.
+
+    LIME (and the parts of scikit-learn it pulls in) is imported here, on
+    the first explanation, rather than when the app starts.
+    """
+    global _explainer
+    if _explainer is None:
+        with _explainer_lock:
+            if _explainer is None:
+                import lime.lime_text
+                _explainer = lime.lime_text.LimeTextExplainer(class_names=class_names)
+    return _explainer
+
+
+def _score_batch(texts):
+    model, tokenizer = get_model_and_tokenizer()
+    # Perturbed samples are one-off texts, caching them would only evict useful entries
+    input_ids = encode_ids(tokenizer, texts, cache=False)
+    probs = np.empty((len(texts), len(class_names)), dtype=np.float32)
+    with torch.no_grad():
+        for batch in length_batches(input_ids, len(input_ids)):
+            outputs = model(**pad(tokenizer, [input_ids[i] for i in batch]))
+            probs[batch] = torch.nn.functional.softmax(outputs.logits, dim=-1).float().numpy()
+    return probs
+
+
+def predict_proba(texts, deadline: float = None):
+    """Predict probabilities for LIME explanation.
+
+    Texts are scored in chunks of EXPLAIN_BATCH_SIZE and previously seen texts
+    come from the prediction cache. If ``deadline`` (a time.monotonic value)
+    passes, scoring stops early and only the rows scored so far are returned.
+    """
     if isinstance(texts, str):
         texts = [texts]
-    
-    inputs = tokenizer(texts, return_tensors='pt', padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-    return probs.numpy()
+
+    keys = [_prediction_cache.key(text) for text in texts]
+    results = [_prediction_cache.get(key) for key in keys]
+    missing = [i for i, probs in enumerate(results) if probs is None]
+
+    for start in range(0, len(missing), EXPLAIN_BATCH_SIZE):
+        if deadline is not None and start and time.monotonic() > deadline:
+            # Keep the prefix that is fully scored
+            first_unscored = missing[start]
+            return np.stack(results[:first_unscored]) if first_unscored else np.empty((0, len(class_names)))
+        chunk = missing[start:start + EXPLAIN_BATCH_SIZE]
+        for i, probs in zip(chunk, _score_batch([texts[i] for i in chunk])):
+            results[i] = probs
+            _prediction_cache.set(keys[i], probs)
+
+    return np.stack(results) if results else np.empty((0, len(class_names)))
 
 def is_technical_content(text: str) -> bool:
     """Check if content is technical/educational in nature."""
@@ -34,24 +133,189 @@ def adjust_credibility_score(score: float, text: str) -> float:
         return min(1.0, score + 0.3)
     return score
 
-def explain_prediction(text: str):
-    """Generate LIME explanation for the text."""
-    explainer = lime.lime_text.LimeTextExplainer(class_names=class_names)
-    explanation = explainer.explain_instance(
-        text, 
-        predict_proba, 
-        num_features=10,
-        num_samples=1000
+
+def _sample_neighborhood(indexed_string, num_samples: int, random_state):
+    """Randomly remove words from the text, the same way LimeTextExplainer does."""
+    doc_size = indexed_string.num_words()
+    sizes = random_state.randint(1, doc_size + 1, num_samples)
+    data = np.ones((num_samples, doc_size))
+    texts = []
+    for i, size in enumerate(sizes):
+        inactive = random_state.choice(doc_size, size, replace=False)
+        data[i, inactive] = 0
+        texts.append(indexed_string.inverse_removing(inactive))
+    return data, texts
+
+
+def _cosine_distances(data: np.ndarray) -> np.ndarray:
+    # Distance of each binary row to the all-ones original, scaled like LIME
+    active = data.sum(axis=1)
+    return (1.0 - np.sqrt(active / data.shape[1])) * 100
+
+
+def _weights(local_exp) -> dict:
+    return {feature: weight for feature, weight in local_exp}
+
+
+def _converged(previous: dict, current: dict) -> bool:
+    scale = max((abs(w) for w in current.values()), default=0.0)
+    if scale == 0.0 or set(previous) != set(current):
+        return False
+    return max(abs(current[f] - previous[f]) for f in current) <= EXPLAIN_CONVERGENCE_TOL * scale
+
+
+def explain_lime(text: str, max_samples: int = None, time_budget_ms: float = None,
+                 should_stop: Callable[[], bool] = None):
+    """LIME explanation that grows its neighborhood until the weights settle.
+
+    Perturbations are scored in rounds that double in size, starting at
+    EXPLAIN_INITIAL_SAMPLES. After each round the local model is refit on all
+    samples so far, and sampling stops once the top feature weights stop
+    moving, max_samples is reached, the time budget runs out or ``should_stop``
+    returns true. Sampling is seeded from the text, so repeated requests reuse
+    cached predictions.
+    """
+    import lime.explanation
+    import lime.lime_text
+    max_samples = max_samples or EXPLAIN_MAX_SAMPLES
+    time_budget_ms = EXPLAIN_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    deadline = time.monotonic() + time_budget_ms / 1000.0
+
+    explainer = get_explainer()
+    indexed_string = lime.lime_text.IndexedString(
+        text, bow=explainer.bow, split_expression=explainer.split_expression, mask_string=explainer.mask_string
+    )
+    seed = int.from_bytes(PredictionCache.key(text)[:4], "little")
+    random_state = np.random.RandomState(seed)
+
+    data = np.ones((1, indexed_string.num_words()))
+    labels = predict_proba([indexed_string.raw_string()])
+    previous, fit = None, None
+    round_size = max(1, EXPLAIN_INITIAL_SAMPLES)
+
+    while len(data) < max_samples:
+        round_size = min(round_size, max_samples - len(data))
+        round_data, round_texts = _sample_neighborhood(indexed_string, round_size, random_state)
+        round_labels = predict_proba(round_texts, deadline=deadline)
+        data = np.vstack([data, round_data[:len(round_labels)]])
+        labels = np.vstack([labels, round_labels])
+
+        fit = explainer.base.explain_instance_with_data(
+            data, labels, _cosine_distances(data), EXPLAINED_LABEL, NUM_FEATURES,
+            feature_selection=explainer.feature_selection
+        )
+        current = _weights(fit[1])
+        if previous is not None and _converged(previous, current):
+            break
+        if time.monotonic() > deadline:
+            logger.info(f"LIME time budget reached after {len(data)} samples")
+            break
+        if should_stop is not None and should_stop():
+            break
+        previous = current
+        round_size *= 2
+
+    if fit is None:
+        fit = explainer.base.explain_instance_with_data(
+            data, labels, _cosine_distances(data), EXPLAINED_LABEL, NUM_FEATURES,
+            feature_selection=explainer.feature_selection
+        )
+
+    explanation = lime.explanation.Explanation(
+        domain_mapper=lime.lime_text.TextDomainMapper(indexed_string),
+        class_names=class_names,
+        random_state=random_state
+    )
+    explanation.predict_proba = labels[0]
+    (explanation.intercept[EXPLAINED_LABEL], explanation.local_exp[EXPLAINED_LABEL],
+     explanation.score, explanation.local_pred) = fit
+    return explanation
+
+
+def _word_attributions(tokenizer, input_ids, scores):
+    """Merge word-piece attributions into whole words, summing the pieces."""
+    tokens = tokenizer.convert_ids_to_tokens(input_ids)
+    words = []
+    for token, score in zip(tokens, scores):
+        if token in tokenizer.all_special_tokens:
+            continue
+        if token.startswith("##") and words:
+            words[-1][0] += token[2:]
+            words[-1][1] += score
+        else:
+            words.append([token, score])
+    return words
+
+
+def explain_gradient(text: str):
+    """Gradient x input attribution of the explained class logit to each word.
+
+    One forward and one backward pass, instead of hundreds of perturbed
+    forward passes. Needs the fp32 PyTorch model, which is loaded on demand
+    when a different serving backend is configured.
+    """
+    model, tokenizer = get_fp32_model_and_tokenizer()
+    inputs = encode(tokenizer, [text])
+    embeddings = model.get_input_embeddings()(inputs["input_ids"]).detach().requires_grad_(True)
+    outputs = model(inputs_embeds=embeddings, attention_mask=inputs["attention_mask"])
+    # Only the embedding gradient is needed, nothing accumulates on the shared weights
+    gradient, = torch.autograd.grad(outputs.logits[0, EXPLAINED_LABEL], embeddings)
+    scores = (gradient * embeddings).sum(dim=-1)[0].tolist()
+    probs = torch.nn.functional.softmax(outputs.logits.detach(), dim=-1)[0]
+
+    words = _word_attributions(tokenizer, inputs["input_ids"][0].tolist(), scores)
+    totals = {}
+    for word, score in words:
+        totals[word] = totals.get(word, 0.0) + score
+    top = sorted(totals.items(), key=lambda item: abs(item[1]), reverse=True)[:NUM_FEATURES]
+    return words, top, float(probs[EXPLAINED_LABEL])
+
+
+def _gradient_html(words, probability: float) -> str:
+    scale = max((abs(score) for _, score in words), default=0.0) or 1.0
+    spans = []
+    for word, score in words:
+        # Green pushes towards the explained class, red away from it
+        alpha = min(1.0, abs(score) / scale)
+        color = f"rgba(0, 160, 0, {alpha:.2f})" if score > 0 else f"rgba(200, 0, 0, {alpha:.2f})"
+        spans.append(f'<span style="background-color: {color}" title="{score:.4f}">{html.escape(word)}</span>')
+    return (
+        f"<div><p>P({html.escape(class_names[EXPLAINED_LABEL])}) = {probability:.3f}</p>"
+        f"<p>{' '.join(spans)}</p></div>"
     )
-    
-    # Convert explanation list to dictionary format
-    explanation_list = [{"word": word, "weight": float(weight)} for word, weight in explanation.as_list()]
-    
-    # Generate HTML explanation
-    explanation_html = explanation.as_html()
-    
+
+
+def explain_prediction(text: str, mode: str = None, max_samples: int = None, time_budget_ms: float = None,
+                       should_stop: Callable[[], bool] = None):
+    """Generate an explanation of the sentiment prediction for the text.
+
+    ``mode`` is "lime" (budgeted LIME) or "gradient" (gradient x input),
+    defaulting to EXPLAIN_MODE. Returns the top weighted words, an HTML
+    rendering and a credibility score adjusted for technical content. In LIME
+    mode the base score is the local model's R^2; in gradient mode it is the
+    model's probability for the explained class. ``should_stop`` lets a
+    caller cut LIME sampling short, e.g. when a background job is cancelled.
+    """
+    mode = mode or EXPLAIN_MODE
+    if mode == "gradient":
+        words, top, probability = explain_gradient(text)
+        explanation_list = [{"word": word, "weight": float(weight)} for word, weight in top]
+        explanation_html = _gradient_html(words, probability)
+        base_score = probability
+    elif mode == "lime":
+        explanation = explain_lime(text, max_samples=max_samples, time_budget_ms=time_budget_ms,
+                                   should_stop=should_stop)
+
+        # Convert explanation list to dictionary format
+        explanation_list = [{"word": str(word), "weight": float(weight)} for word, weight in explanation.as_list()]
+
+        # Generate HTML explanation
+        explanation_html = explanation.as_html()
+        base_score = explanation.score
+    else:
+        raise ValueError(f"Unknown explanation mode '{mode}', expected lime or gradient")
+
     # Adjust credibility score based on content type
-    base_score = explanation.score
     adjusted_score = adjust_credibility_score(base_score, text)
-    
+
     return explanation_list, explanation_html, adjusted_score
@@ -0,0 +1,170 @@
+from collections import Counter
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+# Strategies in order of preference; the first one whose container exists wins
+STRATEGIES = ("article", "main", "content-div", "body", "document")
+
+# Elements without an end tag, never pushed on the open-element stack
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+    "source", "track", "wbr"
+})
+# Elements whose text is never wanted
+NEVER_TEXT = frozenset({"script", "style", "noscript", "template", "svg"})
+# Page furniture dropped from a matched content container
+BOILERPLATE = frozenset({"nav", "footer", "aside"})
+# The body fallback also drops the page header
+BODY_BOILERPLATE = BOILERPLATE | {"header"}
+# Elements that start a new line in the extracted text
+BLOCK_ELEMENTS = frozenset({
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section", "table",
+    "td", "th", "tr", "ul"
+})
+
+
+@dataclass
+class Extraction:
+    text: str
+    # Which entry of STRATEGIES produced the text
+    strategy: str
+    title: str = ""
+
+
+def _is_content_div(tag: str, attrs) -> bool:
+    if tag != "div":
+        return False
+    classes = next((value for name, value in attrs if name == "class"), None) or ""
+    return any("content" in name or "article" in name for name in classes.split())
+
+
+class _Region:
+    """Text collected from the first element matching a strategy."""
+
+    def __init__(self, skip: frozenset):
+        self.skip = skip
+        self.parts: List[str] = []
+        # Stack depth of the element, while it is open
+        self.depth: Optional[int] = None
+        self.found = False
+
+    @property
+    def open(self) -> bool:
+        return self.depth is not None
+
+
+class MainContentParser(HTMLParser):
+    """Single pass over the markup that keeps text only for candidate content regions.
+
+    No tree is built: the parser tracks the stack of open element names and,
+    for each strategy, whether the first matching container is open. Text
+    inside script/style or boilerplate subtrees is dropped as it streams by.
+    Markup can be fed in pieces with ``feed``.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[str] = []
+        self.open_counts: Counter = Counter()
+        self.regions: Dict[str, _Region] = {
+            "article": _Region(BOILERPLATE),
+            "main": _Region(BOILERPLATE),
+            "content-div": _Region(BOILERPLATE),
+            "body": _Region(BODY_BOILERPLATE),
+        }
+        self.document: List[str] = []
+        self.title: List[str] = []
+
+    def _enter(self, name: str):
+        region = self.regions[name]
+        if not region.found:
+            region.found = True
+            region.depth = len(self.stack)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_ELEMENTS:
+            self._newline()
+        if tag in VOID_ELEMENTS:
+            return
+        if tag == "article":
+            self._enter("article")
+        elif tag == "main":
+            self._enter("main")
+        elif tag == "body":
+            self._enter("body")
+        elif _is_content_div(tag, attrs):
+            self._enter("content-div")
+        self.stack.append(tag)
+        self.open_counts[tag] += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_ELEMENTS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_ELEMENTS:
+            self._newline()
+        if self.open_counts[tag] == 0:
+            # Stray end tag, ignored like browsers do
+            return
+        # Close everything opened after the matching start tag as well
+        while self.stack:
+            name = self.stack.pop()
+            self.open_counts[name] -= 1
+            self._close_regions()
+            if name == tag:
+                break
+
+    def _close_regions(self):
+        for region in self.regions.values():
+            if region.open and len(self.stack) <= region.depth:
+                region.depth = None
+
+    def _newline(self):
+        for region in self.regions.values():
+            if region.open:
+                region.parts.append("\n")
+        self.document.append("\n")
+
+    def _inside(self, names: frozenset) -> bool:
+        return any(self.open_counts[name] for name in names)
+
+    def handle_data(self, data):
+        if self._inside(NEVER_TEXT):
+            return
+        if self.open_counts["title"]:
+            self.title.append(data)
+            return
+        self.document.append(data)
+        for region in self.regions.values():
+            if region.open and not self._inside(region.skip):
+                region.parts.append(data)
+
+    def result(self) -> Extraction:
+        self.close()
+        title = " ".join("".join(self.title).split())
+        for name in STRATEGIES[:-1]:
+            region = self.regions[name]
+            if region.found:
+                return Extraction(_clean(region.parts), name, title)
+        return Extraction(_clean(self.document), "document", title)
+
+
+def _clean(parts: List[str]) -> str:
+    """Collapse whitespace within lines and drop empty lines."""
+    lines = (" ".join(line.split()) for line in "".join(parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def extract_main_content(html: str) -> Extraction:
+    """Extract the main text of an HTML page and report which strategy found it.
+
+    Looks for the first ``<article>``, then ``<main>``, then a ``<div>`` whose
+    class mentions content or article, and finally falls back to ``<body>``
+    without its header, and to all text of the document.
+    """
+    parser = MainContentParser()
+    parser.feed(html)
+    return parser.result()
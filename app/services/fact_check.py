@@ -1,14 +1,45 @@
+import asyncio
+import logging
 import os
-import requests
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
 from dotenv import load_dotenv
 
+from .fetcher import fetcher
+
 load_dotenv()
 
-FACT_CHECK_API_URL = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+logger = logging.getLogger(__name__)
+
+# Point this at a local stub server to test without the real API
+FACT_CHECK_API_URL = os.getenv("FACT_CHECK_API_URL", "https://factchecktools.googleapis.com/v1alpha1/claims:search")
 API_KEY = os.getenv("FACT_CHECK_API_KEY")
+# Lookups run on the request path only when an API key or a custom API URL is configured
+FACT_CHECK_ENABLED = bool(API_KEY or os.getenv("FACT_CHECK_API_URL"))
+# Budget for all claim lookups of one article together
+FACT_CHECK_TIMEOUT_SECONDS = float(os.getenv("FACT_CHECK_TIMEOUT_SECONDS", "2"))
+FACT_CHECK_CACHE_SIZE = int(os.getenv("FACT_CHECK_CACHE_SIZE", "10000"))
+FACT_CHECK_CACHE_TTL_SECONDS = float(os.getenv("FACT_CHECK_CACHE_TTL_SECONDS", "86400"))
+# Claims the API knows nothing about are looked up again sooner
+FACT_CHECK_NEGATIVE_TTL_SECONDS = float(os.getenv("FACT_CHECK_NEGATIVE_TTL_SECONDS", "3600"))
+FACT_CHECK_RATE_PER_SECOND = float(os.getenv("FACT_CHECK_RATE_PER_SECOND", "10"))
+FACT_CHECK_BURST = int(os.getenv("FACT_CHECK_BURST", "20"))
+# Consecutive failures that open the circuit, and how long it stays open
+FACT_CHECK_BREAKER_FAILURES = int(os.getenv("FACT_CHECK_BREAKER_FAILURES", "5"))
+FACT_CHECK_BREAKER_RESET_SECONDS = float(os.getenv("FACT_CHECK_BREAKER_RESET_SECONDS", "30"))
+# Token overlap above which two claims of one article are treated as the same claim
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r'[^\w\s]')
 
 
 def query_fact_check(text: str, language_code: str = "en") -> dict:
+    # Blocking client, kept for scripts; the service uses FactCheckClient
+    import requests
     if not API_KEY:
         raise ValueError("Google Fact Check API key not set in .env file")
 
@@ -24,5 +55,246 @@ def query_fact_check(text: str, language_code: str = "en") -> dict:
         data = response.json()
         return data
     except requests.RequestException as e:
-        print(f"[FactCheckAPI Error] {e}")
+        status = e.response.status_code if e.response is not None else None
+        print(f"[FactCheckAPI Error] {type(e).__name__}" + (f" (HTTP {status})" if status else ""))
         return {"claims": []}
+
+
+def describe_error(e: BaseException) -> str:
+    """Exception type and HTTP status of a failed lookup.
+
+    Never the message: aiohttp puts the request URL in it, and with it the API key.
+    """
+    status = getattr(e, "status", None)
+    return type(e).__name__ + (f" (HTTP {status})" if status else "")
+
+
+def normalize_claim(claim: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace, so trivial variants share a cache entry."""
+    return " ".join(_NON_WORD.sub(" ", claim.lower()).split())
+
+
+def dedupe_claims(claims: List[str]) -> Dict[str, str]:
+    """Map each claim to the normalized claim that is looked up for it.
+
+    Claims whose word sets overlap by NEAR_DUPLICATE_THRESHOLD or more
+    (Jaccard) share the lookup of the first of them.
+    """
+    representatives: List[Tuple[str, set]] = []
+    mapping = {}
+    for claim in claims:
+        normalized = normalize_claim(claim)
+        words = set(normalized.split())
+        for representative, representative_words in representatives:
+            union = words | representative_words
+            if union and len(words & representative_words) / len(union) >= NEAR_DUPLICATE_THRESHOLD:
+                normalized = representative
+                break
+        else:
+            representatives.append((normalized, words))
+        mapping[claim] = normalized
+    return mapping
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """Stops calling a failing service for ``reset_seconds`` after ``max_failures`` failures in a row.
+
+    Once the reset time has passed, one trial call is let through; its
+    outcome closes the circuit again or reopens it. A trial that never
+    reports back (cancelled, or failed in an unexpected way) is given up
+    by ``end_trial``, or after another ``reset_seconds`` at the latest.
+    """
+
+    def __init__(self, max_failures: int, reset_seconds: float):
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # When the trial call in flight was let through, if there is one, and a number for each trial
+        self.trial_started: Optional[float] = None
+        self.trial_id = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half-open" and (self.trial_started is None or now - self.trial_started >= self.reset_seconds):
+            self.trial_started = now
+            self.trial_id += 1
+            return True
+        return False
+
+    def end_trial(self, trial_id: int):
+        """Give up trial ``trial_id`` unless it already reported, or a newer one runs."""
+        if self.trial_id == trial_id:
+            self.trial_started = None
+
+    def record_success(self):
+        self.failures, self.opened_at, self.trial_started = 0, None, None
+
+    def record_failure(self):
+        self.failures += 1
+        trial = self.trial_started is not None
+        if trial or self.failures >= self.max_failures:
+            if self.opened_at is None or trial:
+                logger.warning(f"Fact-check circuit open after {self.failures} failures")
+            self.opened_at, self.trial_started = time.monotonic(), None
+
+
+class TTLCache:
+    """LRU of lookup results, each with its own expiry time."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, list]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[list]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: list, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def parse_reviews(claim: str, data: dict) -> List[dict]:
+    """Flatten the API's claims/claimReview structure into fact-check result dicts."""
+    results = []
+    for found in data.get("claims", []):
+        for review in found.get("claimReview", []):
+            publisher = review.get("publisher", {})
+            results.append({
+                "claim": claim,
+                "rating": (review.get("textualRating") or "UNRATED").upper(),
+                "source": publisher.get("name") or publisher.get("site") or "Fact Check",
+                "url": review.get("url", ""),
+                "explanation": review.get("title") or f"Reviewed claim: {found.get('text', claim)}",
+            })
+    return results
+
+
+class FactCheckClient:
+    """Async fact-check lookups for the claims of an article.
+
+    All uncached claims are looked up concurrently, so an article costs one
+    round trip. Results are cached per normalized claim, including claims
+    with no reviews (for a shorter time). A token bucket keeps the request
+    rate within the API's quota, and a circuit breaker stops calling the API
+    while it keeps failing. Errors and skipped lookups just leave a claim
+    without reviews; they are never cached.
+    """
+
+    def __init__(self, api_url: str = FACT_CHECK_API_URL, api_key: Optional[str] = API_KEY,
+                 enabled: bool = FACT_CHECK_ENABLED):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.enabled = enabled
+        self.cache = TTLCache(FACT_CHECK_CACHE_SIZE)
+        self.bucket = TokenBucket(FACT_CHECK_RATE_PER_SECOND, FACT_CHECK_BURST)
+        self.breaker = CircuitBreaker(FACT_CHECK_BREAKER_FAILURES, FACT_CHECK_BREAKER_RESET_SECONDS)
+        self.timeout = aiohttp.ClientTimeout(total=FACT_CHECK_TIMEOUT_SECONDS)
+        self.counts = {"hits": 0, "lookups": 0, "errors": 0, "rate_limited": 0, "circuit_open": 0}
+
+    async def _lookup(self, normalized: str) -> Optional[list]:
+        """Reviews for one normalized claim, or None if the lookup didn't happen or failed."""
+        trial = self.breaker.state == "half-open"
+        if not self.breaker.allow():
+            self.counts["circuit_open"] += 1
+            return None
+        trial_id = self.breaker.trial_id if trial else None
+        try:
+            if not self.bucket.try_acquire():
+                self.counts["rate_limited"] += 1
+                return None
+            self.counts["lookups"] += 1
+            params = {"query": normalized, "languageCode": "en"}
+            if self.api_key:
+                params["key"] = self.api_key
+            try:
+                async with fetcher.session().get(self.api_url, params=params, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                self.counts["errors"] += 1
+                self.breaker.record_failure()
+                logger.info(f"Fact-check lookup failed: {describe_error(e)}")
+                return None
+            self.breaker.record_success()
+        finally:
+            # A cancelled or unexpectedly failed trial must not keep the circuit half-open for good
+            if trial_id is not None:
+                self.breaker.end_trial(trial_id)
+        reviews = parse_reviews(normalized, data)
+        self.cache.set(normalized, reviews, FACT_CHECK_CACHE_TTL_SECONDS if reviews else FACT_CHECK_NEGATIVE_TTL_SECONDS)
+        return reviews
+
+    async def check_claims(self, claims: List[str]) -> Dict[str, List[dict]]:
+        """Reviews found for each claim; claims without any are left out."""
+        if not self.enabled or not claims:
+            return {}
+        mapping = dedupe_claims(claims)
+        found: Dict[str, Optional[list]] = {}
+        pending = []
+        for normalized in dict.fromkeys(mapping.values()):
+            cached = self.cache.get(normalized)
+            if cached is not None:
+                self.counts["hits"] += 1
+                found[normalized] = cached
+            else:
+                pending.append(normalized)
+        if pending:
+            lookups = await asyncio.gather(*(self._lookup(normalized) for normalized in pending))
+            found.update(zip(pending, lookups))
+
+        results = {}
+        for claim, normalized in mapping.items():
+            reviews = found.get(normalized)
+            if reviews:
+                results[claim] = [dict(review, claim=claim) for review in reviews]
+        return results
+
+    def stats(self) -> dict:
+        return dict(self.counts, enabled=self.enabled, cached=len(self.cache), circuit=self.breaker.state)
+
+
+fact_checker = FactCheckClient()
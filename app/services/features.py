@@ -0,0 +1,257 @@
+import re
+from collections import Counter
+from functools import cached_property
+from typing import List, Tuple
+
+# Word tokens of the lowercased text; every plain keyword lookup reads these counts
+_TOKEN = re.compile(r'\w+')
+_ALTERNATION = re.compile(r'^\\b\((?P<alts>[^()]*)\)\\b$')
+_WORD = re.compile(r'^\w+$')
+_OPTIONAL_SUFFIX = re.compile(r'^(?P<stem>\w+)(?P<last>\w)\?$')
+# A leading literal word followed by something that can only match a non-word character
+_LEADING_WORD = re.compile(r"^(?P<word>\w+)(?: |-|:|'|\\\.|\\s|\[-\\s\])")
+
+
+class KeywordPattern:
+    """A regex pattern split into plain keywords and whatever still needs a regex.
+
+    Patterns of the form ``\\b(a|b|c)\\b`` whose alternatives are plain words
+    (optionally with one trailing ``?``) are answered from the token counts of
+    a single tokenizer pass. Remaining alternatives, such as multi-word phrases,
+    are compiled once into a residual regex with the same word boundaries, which
+    is only run when the leading word of some alternative occurs in the text.
+    Patterns of any other shape are compiled as they are.
+    """
+
+    def __init__(self, pattern: str, flags: int = re.IGNORECASE):
+        self.pattern = pattern
+        self.keywords = frozenset()
+        self.regex = None
+        # Words one of which must be present for the residual regex to match
+        self.prefilter = None
+        match = _ALTERNATION.match(pattern)
+        if not match:
+            self.regex = re.compile(pattern, flags)
+            return
+        keywords, residual = set(), []
+        for alt in match.group('alts').split('|'):
+            optional = _OPTIONAL_SUFFIX.match(alt)
+            if _WORD.match(alt):
+                keywords.add(alt.lower())
+            elif optional:
+                keywords.add(optional.group('stem').lower())
+                keywords.add((optional.group('stem') + optional.group('last')).lower())
+            else:
+                residual.append(alt)
+        self.keywords = frozenset(keywords)
+        if residual:
+            self.regex = re.compile(r'\b(?:' + '|'.join(residual) + r')\b', flags)
+            leading = [_LEADING_WORD.match(alt) for alt in residual]
+            if all(leading):
+                self.prefilter = frozenset(m.group('word').lower() for m in leading)
+
+    @property
+    def cost(self) -> int:
+        """Rough evaluation cost, used to try cheap patterns first."""
+        if self.regex is None:
+            return 0
+        return 1 if self.prefilter is not None else 2
+
+    def _run_regex(self, features: "TextFeatures") -> bool:
+        if self.regex is None:
+            return False
+        if self.prefilter is not None:
+            return any(word in features.token_counts for word in self.prefilter)
+        return True
+
+    def count(self, features: "TextFeatures") -> int:
+        """Number of non-overlapping matches in the lowercased text."""
+        total = sum(features.token_counts[word] for word in self.keywords)
+        if self._run_regex(features):
+            total += len(self.regex.findall(features.lower))
+        return total
+
+    def present(self, features: "TextFeatures") -> bool:
+        if any(word in features.token_counts for word in self.keywords):
+            return True
+        return self._run_regex(features) and self.regex.search(features.lower) is not None
+
+
+class TokenPattern:
+    """A regex that can only ever match inside a single word token.
+
+    Matches are counted once per distinct token and multiplied by the
+    token's frequency instead of scanning the whole text.
+    """
+
+    def __init__(self, pattern: str, flags: int = re.IGNORECASE):
+        self.pattern = pattern
+        self.regex = re.compile(pattern, flags)
+        self.cost = 1
+
+    def count(self, features: "TextFeatures") -> int:
+        return sum(len(self.regex.findall(token)) * n for token, n in features.token_counts.items())
+
+    def present(self, features: "TextFeatures") -> bool:
+        return any(self.regex.search(token) for token in features.token_counts)
+
+
+SCIENTIFIC_PATTERNS = [KeywordPattern(p) for p in [
+    # Research and methodology terms
+    r'\b(study|research|data|evidence|analysis|scientists?|researchers?)\b',
+    r'\b(methodology|hypothesis|results|conclusion|findings)\b',
+    r'\b(experiment|observation|measurement|statistical|significance)\b',
+
+    # Scientific organizations and publications
+    r'\b(NASA|NOAA|WHO|CDC|NIH|scientific consensus)\b',
+    r'\b(peer[-\s]reviewed|journal|publication|paper)\b',
+    r'\b(Nature|Science|Lancet|JAMA|BMJ)\b',
+
+    # Technical measurements and units
+    r'\b(\d+(\.\d+)?)\s*(degrees?|°)[CF]\b',
+    r'\b(\d+(\.\d+)?)\s*(mg|kg|ml|km|cm|mph|inches?)\b',
+    r'\b(\d+(\.\d+)?)\s*percent\b|\b\d+%\b',
+
+    # Citations and references
+    r'\b(according to|cited in|referenced by|published in)\b',
+    r'\b(et al\.|vol\.|pp\.|doi:)\b',
+
+    # Technical terminology
+    r'\b(correlation|causation|factor|variable|control group)\b',
+    r'\b(systematic|review|meta[-\s]analysis|clinical trial)\b',
+
+    # Weather-specific terms
+    r'\b(National Weather Service|NWS|NOAA|radar indicates|meteorologists?)\b',
+    r'\b(atmospheric|precipitation|visibility|wind speeds?|gusts?)\b',
+    r'\b(forecast|warning|advisory|watch|alert|severe|conditions?)\b'
+]]
+
+# Evaluation order for presence checks: token lookups before full-text scans
+_SCIENTIFIC_BY_COST = sorted(SCIENTIFIC_PATTERNS, key=lambda pattern: pattern.cost)
+
+WEATHER_ALERT_PATTERN = re.compile(r'\b(warning|advisory|watch|alert)\b.*\b(weather|storm|thunder|tornado|hurricane|flood)\b', re.IGNORECASE)
+
+# (pattern, weight) pairs scored by detect_sensational_language
+SENSATIONAL_PATTERNS: List[Tuple[KeywordPattern, float]] = [(p if isinstance(p, TokenPattern) else KeywordPattern(p), w) for p, w in [
+    # Punctuation and formatting - reduced weight
+    (r'!\s*$', 0.03),  # Exclamation marks
+    (TokenPattern(r'[A-Z]{2,}'), 0.02),  # ALL CAPS
+    (r'[!?]{2,}', 0.03),  # Multiple punctuation
+
+    # Hyperbolic language - moderate weight
+    (r'\b(amazing|incredible|unbelievable|shocking)\b', 0.05),
+    (r'\b(mind[-\s]blowing|jaw[-\s]dropping)\b', 0.05),
+    (r'\b(revolutionary|breakthrough|miracle)\b', 0.06),
+
+    # Clickbait phrases - higher weight
+    (r'\b(breaking|urgent|exclusive|must-see)\b', 0.07),
+    (r'\b(you won\'t believe|you need to see)\b', 0.08),
+    (r'\d+ reasons why|\d+ things you need\b', 0.06),
+
+    # Marketing language - higher weight
+    (r'\b(secret|hidden|tricks|hack|instantly)\b', 0.07),
+    (r'\b(experts hate|they don\'t want you to know)\b', 0.08)
+]]
+
+MAX_CLAIMS = 3
+
+# Statements that might be factual claims
+CLAIM_PATTERNS = [re.compile(p) for p in [
+    r'[A-Z][^.!?]*\b(is|are|was|were|has|have|had|will|would|can|could)\b[^.!?]*[.!?]',
+    r'[A-Z][^.!?]*\b(according to|reports|studies show|research indicates)\b[^.!?]*[.!?]',
+    r'[A-Z][^.!?]*\b(proven|confirmed|verified|established)\b[^.!?]*[.!?]'
+]]
+
+# Claim topics and sources recognized by check_fact
+SCIENTIFIC_SOURCE_PATTERN = re.compile(r'\b(according to|based on|from)\s+(NASA|NOAA|WHO|CDC|NIH)\b', re.IGNORECASE)
+CLIMATE_CLAIM_PATTERN = re.compile(r'\b(climate change|global warming|temperature rise|carbon dioxide|CO2 emissions)\b', re.IGNORECASE)
+HEALTH_CLAIM_PATTERN = re.compile(r'\b(vaccine|vaccination|health|disease|medical)\b', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'\d+')
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+CLICKBAIT_PATTERN = KeywordPattern(r'\b(click here|learn more|read more|find out)\b')
+BALANCED_PATTERN = KeywordPattern(r'\b(however|although|but|on the other hand)\b')
+
+
+class TextFeatures:
+    """Everything the heuristic scorers read from a text, each part computed at most once."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._scientific_checked = 0
+        self._scientific_found = 0
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+    @cached_property
+    def token_counts(self) -> Counter:
+        return Counter(_TOKEN.findall(self.lower))
+
+    def scientific_matches_at_least(self, n: int) -> bool:
+        """Whether at least ``n`` scientific pattern groups are present in the text.
+
+        Patterns are checked cheapest first and only until the answer is known;
+        progress is kept so repeated calls don't rescan.
+        """
+        while self._scientific_found < n and self._scientific_checked < len(_SCIENTIFIC_BY_COST):
+            if _SCIENTIFIC_BY_COST[self._scientific_checked].present(self):
+                self._scientific_found += 1
+            self._scientific_checked += 1
+        return self._scientific_found >= n
+
+    @cached_property
+    def is_weather_alert(self) -> bool:
+        return WEATHER_ALERT_PATTERN.search(self.text) is not None
+
+    @cached_property
+    def sensational_counts(self) -> List[int]:
+        """Match count of each entry of SENSATIONAL_PATTERNS."""
+        return [pattern.count(self) for pattern, _ in SENSATIONAL_PATTERNS]
+
+    @cached_property
+    def claim_matches(self) -> List[re.Match]:
+        """The first MAX_CLAIMS claim matches, in pattern order."""
+        matches = []
+        for pattern in CLAIM_PATTERNS:
+            for match in pattern.finditer(self.text):
+                matches.append(match)
+                if len(matches) >= MAX_CLAIMS:
+                    return matches
+        return matches
+
+    @cached_property
+    def claims(self) -> List[str]:
+        """The key phrase of each claim match, which the built-in fact-check rules look at."""
+        return [match.group(1) for match in self.claim_matches]
+
+    @cached_property
+    def claim_sentences(self) -> List[str]:
+        """The whole sentence of each claim match, as sent to the fact-check API."""
+        return [match.group(0).strip() for match in self.claim_matches]
+
+    @cached_property
+    def avg_sentence_length(self) -> float:
+        sentences = [s for s in SENTENCE_SPLIT.split(self.text) if s.strip()]
+        return sum(len(s.split()) for s in sentences) / max(1, len(sentences))
+
+    @cached_property
+    def has_clickbait(self) -> bool:
+        return CLICKBAIT_PATTERN.present(self)
+
+    @cached_property
+    def has_balanced_language(self) -> bool:
+        return BALANCED_PATTERN.present(self)
+
+    def contains_any(self, terms) -> bool:
+        """Case-insensitive substring check against the lowercased text."""
+        return any(term in self.lower for term in terms)
+
+
+def extract_features(text: str) -> TextFeatures:
+    return TextFeatures(text)
@@ -0,0 +1,147 @@
+import asyncio
+import codecs
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "30"))
+FETCH_CONNECT_TIMEOUT_SECONDS = float(os.getenv("FETCH_CONNECT_TIMEOUT_SECONDS", "5"))
+# Longest wait for the next chunk of a response body
+FETCH_READ_TIMEOUT_SECONDS = float(os.getenv("FETCH_READ_TIMEOUT_SECONDS", "10"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "100"))
+FETCH_MAX_CONNECTIONS_PER_HOST = int(os.getenv("FETCH_MAX_CONNECTIONS_PER_HOST", "8"))
+# Bodies are cut off at this many (decompressed) bytes
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+FETCH_CHUNK_BYTES = 64 * 1024
+FETCH_DNS_CACHE_SECONDS = 300
+
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+# Bytes of the body searched for a meta charset when the headers don't name one
+_SNIFF_BYTES = 2048
+
+
+@dataclass
+class FetchedPage:
+    status: int
+    html: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when the body was cut off at FETCH_MAX_BYTES
+    truncated: bool = False
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def _decoder(charset: Optional[str], head: bytes):
+    """Incremental decoder for the response charset, sniffing the HTML head if needed."""
+    if not charset:
+        match = _META_CHARSET.search(head[:_SNIFF_BYTES])
+        charset = match.group(1).decode("ascii", "ignore") if match else "utf-8"
+    try:
+        return codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+class Fetcher:
+    """Shared aiohttp session with a bounded, per-host connection pool.
+
+    Connections and DNS lookups are reused across requests to the same
+    sites. Bodies are decompressed and decoded chunk by chunk and cut off at
+    ``max_bytes``, so memory per in-flight fetch stays bounded.
+    """
+
+    def __init__(self, max_connections: int = FETCH_MAX_CONNECTIONS,
+                 max_per_host: int = FETCH_MAX_CONNECTIONS_PER_HOST, max_bytes: int = FETCH_MAX_BYTES):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self.timeout = aiohttp.ClientTimeout(
+            total=FETCH_TIMEOUT_SECONDS,
+            sock_connect=FETCH_CONNECT_TIMEOUT_SECONDS,
+            sock_read=FETCH_READ_TIMEOUT_SECONDS
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop = None
+        self._pid = None
+
+    def session(self) -> aiohttp.ClientSession:
+        # A session belongs to the event loop it was created on and can't cross a fork
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop or self._pid != os.getpid():
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                ttl_dns_cache=FETCH_DNS_CACHE_SECONDS
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=FETCH_HEADERS, timeout=self.timeout, auto_decompress=True
+            )
+            self._loop, self._pid = loop, os.getpid()
+        return self._session
+
+    async def fetch(self, url: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> Optional[FetchedPage]:
+        """Download a page, revalidating against the given HTTP validators. Returns None on failure."""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            async with self.session().get(url, headers=headers) as response:
+                if response.status == 304:
+                    return FetchedPage(status=304, etag=etag, last_modified=last_modified)
+                response.raise_for_status()
+                html, truncated = await self._read_text(response)
+                if truncated:
+                    logger.info(f"Truncated {url} at {self.max_bytes} bytes")
+                return FetchedPage(
+                    status=response.status,
+                    html=html,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                    truncated=truncated
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.info(f"Failed to fetch {url}: {type(e).__name__}: {str(e)}")
+            return None
+
+    async def _read_text(self, response: aiohttp.ClientResponse):
+        decoder, parts, size = None, [], 0
+        async for chunk in response.content.iter_chunked(FETCH_CHUNK_BYTES):
+            if decoder is None:
+                decoder = _decoder(response.charset, chunk)
+            remaining = self.max_bytes - size
+            if len(chunk) > remaining:
+                parts.append(decoder.decode(chunk[:remaining], final=True))
+                return "".join(parts), True
+            size += len(chunk)
+            parts.append(decoder.decode(chunk))
+        if decoder is not None:
+            parts.append(decoder.decode(b"", final=True))
+        return "".join(parts), False
+
+    async def close(self):
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+
+fetcher = Fetcher()
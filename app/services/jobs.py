@@ -0,0 +1,230 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from .executor import Overloaded
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_WORKERS = int(os.getenv("EXPLAIN_WORKERS", "1"))
+EXPLAIN_QUEUE_LIMIT = int(os.getenv("EXPLAIN_QUEUE_LIMIT", "64"))
+EXPLAIN_JOB_TTL_SECONDS = float(os.getenv("EXPLAIN_JOB_TTL_SECONDS", "600"))
+# Job states and results, shared by every worker so any of them can answer for a job
+EXPLAIN_JOB_PATH = os.getenv("EXPLAIN_JOB_PATH", os.path.join(".cache", "jobs.sqlite3"))
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class CancelRequest:
+    """Tells a running job whether any worker asked to cancel it."""
+
+    def __init__(self, jobs: "JobQueue", job_id: str):
+        self._jobs = jobs
+        self._job_id = job_id
+        self._set = False
+
+    def is_set(self) -> bool:
+        if not self._set:
+            self._set = self._jobs._cancel_requested(self._job_id)
+        return self._set
+
+
+class Job:
+    """A background job's state and outcome as last read from the job store."""
+
+    def __init__(self, jobs: "JobQueue", id: str, owner: int, status: str, result: Any = None,
+                 error: Optional[str] = None, created_at: float = 0.0, finished_at: Optional[float] = None):
+        self.id = id
+        self.owner = owner
+        self.status = status
+        self.result = result
+        self.error = error
+        self.created_at = created_at
+        self.finished_at = finished_at
+        self.cancel_requested = CancelRequest(jobs, id)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """Priority queue of background jobs run by a small, separate thread pool.
+
+    Keeps slow work such as explanations away from the request path: jobs never
+    share threads with the inference executor. A job runs in the process that
+    submitted it, but its state lives in a SQLite file at ``path``, so every
+    gunicorn worker can report on it and cancel it. Cancellation is
+    cooperative; a running job sees ``job.cancel_requested`` and may stop early.
+    """
+
+    def __init__(self, workers: int, max_queue: int, ttl: float, name: str, path: str = EXPLAIN_JOB_PATH):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.name = name
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self._sequence = itertools.count()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared across a fork
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, queue TEXT NOT NULL, owner INTEGER NOT NULL, status TEXT NOT NULL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, finished_at REAL, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (queue, owner, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+            self._conn, self._pid = conn, os.getpid()
+            # Workers are started with the first connection of each process
+            self._queue = queue.PriorityQueue()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        return self._conn
+
+    def submit(self, fn: Callable[[Job], Any], priority: int = PRIORITY_INTERACTIVE) -> Job:
+        """Queue ``fn(job)`` and return the job; raises Overloaded when the queue is full."""
+        job = Job(self, uuid.uuid4().hex, os.getpid(), QUEUED, created_at=time.time())
+        with self._lock:
+            conn = self._connection()
+            self._purge(conn)
+            queued = self._queued(conn)
+            if queued >= self.max_queue:
+                raise Overloaded(f"{self.name} queue is full ({queued} jobs)")
+            conn.execute(
+                "INSERT INTO jobs (id, queue, owner, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, self.name, job.owner, QUEUED, job.created_at)
+            )
+            self._queue.put((priority, next(self._sequence), job, fn))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            conn = self._connection()
+            self._purge(conn)
+            row = conn.execute(
+                "SELECT id, owner, status, result, error, created_at, finished_at FROM jobs WHERE id = ? AND queue = ?",
+                (job_id, self.name)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, owner, status, result, error, created_at, finished_at = row
+            if status in (QUEUED, RUNNING) and not _alive(owner):
+                # Its worker exited, nothing is going to finish it
+                status, error, finished_at = FAILED, "The worker running the job exited", time.time()
+                self._finish(conn, job_id, status, error=error)
+        return Job(self, job_id, owner, status, json.loads(result) if result is not None else None,
+                   error, created_at, finished_at)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND queue = ?", (job_id, self.name))
+            # Queued jobs are finished now and skipped when they are dequeued
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND queue = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, self.name, QUEUED)
+            )
+        return self.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Jobs waiting for one of this process's threads, not counting cancelled ones."""
+        if self._conn is None or self._pid != os.getpid():
+            return 0
+        with self._lock:
+            return self._queued(self._conn)
+
+    def _queued(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE queue = ? AND owner = ? AND status = ?", (self.name, os.getpid(), QUEUED)
+        ).fetchone()[0]
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def _purge(self, conn: sqlite3.Connection):
+        """Forget jobs finished more than ``ttl`` seconds ago; call with the lock held."""
+        conn.execute("DELETE FROM jobs WHERE queue = ? AND finished_at < ?", (self.name, time.time() - self.ttl))
+
+    def _finish(self, conn: sqlite3.Connection, job_id: str, status: str, result: Any = None,
+                error: Optional[str] = None):
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, QUEUED, RUNNING)
+        )
+
+    def _run(self):
+        pending = self._queue
+        while True:
+            _, _, job, fn = pending.get()
+            self._execute(job, fn)
+            # Expired jobs go even when nothing new is submitted or polled
+            with self._lock:
+                self._purge(self._connection())
+
+    def _execute(self, job: Job, fn: Callable[[Job], Any]):
+        with self._lock:
+            started = self._connection().execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (RUNNING, job.id, QUEUED)
+            ).rowcount
+        if not started:
+            return
+        job.status = RUNNING
+        try:
+            result = fn(job)
+        except Exception as e:
+            logger.error(f"Error in {self.name} job {job.id}: {str(e)}")
+            with self._lock:
+                self._finish(self._connection(), job.id, FAILED, error=str(e))
+            return
+        cancelled = job.cancel_requested.is_set()
+        with self._lock:
+            if cancelled:
+                self._finish(self._connection(), job.id, CANCELLED)
+            else:
+                self._finish(self._connection(), job.id, DONE, result=result)
+
+
+explanation_jobs = JobQueue(EXPLAIN_WORKERS, EXPLAIN_QUEUE_LIMIT, EXPLAIN_JOB_TTL_SECONDS, "explain")
@@ -0,0 +1,344 @@
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record stage timings and request counters; off leaves /metrics with only the collected gauges
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Add a Server-Timing header with the stage timings to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+# Directory where each worker process publishes its metrics, so /metrics on any of them
+# reports all of them; gunicorn.conf.py sets it. Unset, /metrics covers this process only.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+# Seconds between a worker's publications; other workers' numbers are at most this old
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "1"))
+
+# Upper bounds in seconds, from a cache hit to a slow page fetch
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+_metrics: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        """(suffix, label values, extra label, value) of every series."""
+        with self._lock:
+            return [("", key, "", value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, one series per combination of label values."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Current value, either set directly or read from ``function`` at scrape time.
+
+    ``function`` returns a number, or a dict of label value tuples to numbers.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), function: Optional[Callable] = None,
+                 kind: Optional[str] = None):
+        super().__init__(name, help, labels)
+        self.function = function
+        # Counters kept elsewhere (cache hit counts, say) are exported as counters
+        if kind is not None:
+            self.kind = kind
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.function is None:
+            return super().samples()
+        try:
+            value = self.function()
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {str(e)}")
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [("", tuple(str(v) for v in key), "", float(v)) for key, v in value.items() if v is not None]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, with their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", key, f'le="{_format_value(float(bound))}"', cumulative))
+            samples.append(("_sum", key, "", total))
+            samples.append(("_count", key, "", cumulative))
+        return samples
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    if METRICS_DIR is not None:
+        return render_all_workers(METRICS_DIR)
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot() -> Dict[str, list]:
+    return {metric.name: [list(sample) for sample in metric.samples()] for metric in _metrics}
+
+
+def _worker_path(directory: str, pid: int, retired: bool = False) -> str:
+    return os.path.join(directory, f"{pid}.retired.json" if retired else f"{pid}.json")
+
+
+def publish(directory: str):
+    """Write this process's samples where the other workers can read them."""
+    path = _worker_path(directory, os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)
+
+
+def retire(directory: str, pid: int):
+    """Keep a stopped worker's counts in the totals, but drop its gauges."""
+    path = _worker_path(directory, pid)
+    if os.path.exists(path):
+        os.replace(path, _worker_path(directory, pid, retired=True))
+
+
+def render_all_workers(directory: str) -> str:
+    """Metrics of every worker publishing to ``directory``.
+
+    Counters and histograms are summed over all workers, including stopped
+    ones, so totals never go down when a worker is replaced. Gauges describe
+    one process each and are reported per live worker with a ``worker`` label.
+    """
+    publish(directory)
+    workers = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        name = os.path.basename(path)
+        try:
+            with open(path) as f:
+                workers.append((name.split(".")[0], name.endswith(".retired.json"), json.load(f)))
+        except (OSError, ValueError) as e:
+            # A worker that exited mid-write; its counts are back with its next publication
+            logger.warning(f"Skipping metrics file {path}: {str(e)}")
+    lines = []
+    for metric in _metrics:
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+        if metric.kind == "gauge":
+            for pid, retired, samples in sorted(workers, key=lambda worker: int(worker[0])):
+                if retired:
+                    continue
+                for suffix, key, extra, value in samples.get(metric.name, []):
+                    labels = _format_labels(metric.labelnames + ("worker",), list(key) + [pid], extra)
+                    lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+            continue
+        totals: Dict[Tuple[str, Tuple[str, ...], str], float] = {}
+        for _, _, samples in workers:
+            for suffix, key, extra, value in samples.get(metric.name, []):
+                series = (suffix, tuple(key), extra)
+                totals[series] = totals.get(series, 0) + value
+        for (suffix, key, extra), value in totals.items():
+            lines.append(f"{metric.name}{suffix}{_format_labels(metric.labelnames, key, extra)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Publisher:
+    """Publishes this process's metrics to METRICS_DIR every METRICS_PUBLISH_SECONDS."""
+
+    def __init__(self, directory: Optional[str], interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.directory is None or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        publish(self.directory)
+
+    def _run(self):
+        while True:
+            try:
+                publish(self.directory)
+            except OSError as e:
+                logger.warning(f"Could not publish metrics to {self.directory}: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
+
+
+publisher = Publisher(METRICS_DIR, METRICS_PUBLISH_SECONDS)
+
+
+STAGE_SECONDS = Histogram("credibility_stage_seconds", "Time spent in each stage of an analysis", ["stage"])
+STAGE_ERRORS = Counter("credibility_stage_errors_total", "Stages that raised an exception", ["stage"])
+REQUEST_SECONDS = Histogram("credibility_http_request_seconds", "HTTP request latency", ["method", "route"])
+REQUESTS = Counter("credibility_http_requests_total", "HTTP requests served", ["method", "route", "status"])
+ERRORS = Counter("credibility_errors_total", "Requests answered with a fallback or error response", ["route"])
+BATCH_SIZE = Histogram("credibility_batch_size", "Items per model batch", ["batcher"], buckets=BATCH_SIZE_BUCKETS)
+
+# Stage timings of the request being served; executors copy the context, so
+# stages run on pool threads land in the same list
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as stage ``name`` of the current request and in the stage histogram."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Server-Timing header value; a stage run several times is reported once with its total."""
+    totals: Dict[str, float] = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests per route and collecting their stage timings.
+
+    Routes are labelled by their path template, so label values stay
+    bounded; requests no route matched share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if SERVER_TIMING:
+                    total = f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+                    value = ", ".join(filter(None, [server_timing(timings), total]))
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=path)
+            REQUESTS.inc(method=scope["method"], route=path, status=status[0])
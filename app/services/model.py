@@ -1,30 +1,51 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from . import registry
+from .backends import build_backend
+from .config import MODEL_NAME, SENTIMENT_BACKEND
+from .tokenization import encode
 import torch
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize variables
-model = None
-tokenizer = None
+def load_fp32_model():
+    """Load the stock fp32 PyTorch model and tokenizer from disk or the hub."""
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    model.eval()
+    return model, tokenizer
 
 def load_model():
-    global model, tokenizer
+    """Load the sentiment model and tokenizer with the configured inference backend."""
     try:
-        # Load model and tokenizer
-        model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        model.eval()
-        logger.info("Model loaded successfully")
+        model, tokenizer = load_fp32_model()
+        model = build_backend(SENTIMENT_BACKEND, model, tokenizer, MODEL_NAME)
+        logger.info(f"Model loaded successfully ({SENTIMENT_BACKEND} backend)")
+        return model, tokenizer
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         raise
 
+def warmup_model(loaded):
+    """Run one small forward pass so lazy kernel setup happens before the first request."""
+    model, tokenizer = loaded
+    inputs = encode(tokenizer, ["Warming up the model."], cache=False)
+    with torch.no_grad():
+        model(**inputs)
+
+registry.register("sentiment", load_model, warmup=warmup_model)
+
+# Plain fp32 PyTorch model for code that needs gradients, loaded only on demand
+# when the serving backend is something else
+registry.register("sentiment-fp32", load_fp32_model, eager=False)
+
 def get_model_and_tokenizer():
-    if model is None or tokenizer is None:
-        load_model()
-    return model, tokenizer
+    return registry.get("sentiment")
+
+def get_fp32_model_and_tokenizer():
+    if SENTIMENT_BACKEND == "torch":
+        return get_model_and_tokenizer()
+    return registry.get("sentiment-fp32")
 
 # Define class names based on model's output
-class_names = ['NEGATIVE', 'POSITIVE'] 
\ No newline at end of file
+class_names = ['NEGATIVE', 'POSITIVE']
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import registry
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Reuse the sentiment of a previously analyzed text that is almost the same as the incoming one.
+# Off by default: similarity is measured on words, not meaning, so an edit that flips the
+# sentiment ("is safe" to "is not safe") still leaves a long text above the threshold.
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "0") == "1"
+# Estimated Jaccard similarity of word shingles at which two texts count as the same
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+# Texts remembered; the least recently matched are evicted first
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000"))
+# .npz file the index is saved to and loaded from; kept in memory only when unset
+NEAR_DUPLICATE_PATH = os.getenv("NEAR_DUPLICATE_PATH") or None
+# New texts between saves of the index
+NEAR_DUPLICATE_SAVE_EVERY = int(os.getenv("NEAR_DUPLICATE_SAVE_EVERY", "1000"))
+
+# Words per shingle; texts shorter than this are one shingle, so only match once normalized equal
+SHINGLE_WORDS = 5
+# LSH bands of ROWS minhashes each. Texts become candidates when all rows of
+# some band agree, which happens for nearly all pairs above 0.85 similarity and
+# for a few percent at 0.5; candidates are then checked on the full signature.
+BANDS = 16
+ROWS = 8
+PERMUTATIONS = BANDS * ROWS
+# Largest prime below 2**32, so permuted hashes fit in uint32
+_PRIME = np.uint64(4294967291)
+_WORD = re.compile(r"\w+")
+
+_random = np.random.RandomState(20240)
+# Fixed, so signatures saved by one process are comparable in another
+_A = _random.randint(1, 2 ** 32, size=PERMUTATIONS, dtype=np.uint64)
+_B = _random.randint(0, 2 ** 32, size=PERMUTATIONS, dtype=np.uint64)
+
+LOOKUPS = Counter("credibility_near_duplicate_lookups_total",
+                  "Texts whose sentiment was reused from a near-duplicate, or had to be scored", ["outcome"])
+
+
+def shingles(text: str) -> List[bytes]:
+    """Overlapping runs of SHINGLE_WORDS lowercased words; case, punctuation and spacing don't matter."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return [" ".join(words).encode()]
+    return [" ".join(words[i:i + SHINGLE_WORDS]).encode() for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature of the text's shingles, PERMUTATIONS uint32 values."""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s, digest_size=4).digest(), "little") for s in set(shingles(text))),
+        dtype=np.uint64,
+    )
+    # (a * h + b) stays below 2**64 since every factor is below 2**32
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Sentiment results of analyzed texts, found again by MinHash/LSH when a text is nearly the same.
+
+    Bounded to ``max_entries`` in LRU order. Saved to ``path`` (unless None)
+    every NEAR_DUPLICATE_SAVE_EVERY new texts, and on ``save``, as an .npz
+    file of the signatures and the results encoded as JSON, so loading it
+    never unpickles anything. Saves replace the file atomically; processes
+    sharing a path each keep their own index, and the last save wins.
+    """
+
+    def __init__(self, path: Optional[str], threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 max_entries: int = NEAR_DUPLICATE_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, Dict]]" = OrderedDict()
+        # One table per band from the hash of the band's rows to the entries with those rows
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._next_id = 0
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _band_keys(sig: np.ndarray) -> List[int]:
+        return [hash(band.tobytes()) for band in sig.reshape(BANDS, ROWS)]
+
+    def find(self, sig: np.ndarray) -> Optional[Tuple[float, Dict]]:
+        """(similarity, stored result) of the most similar entry at or above the threshold.
+
+        Similarity is the share of minhashes two signatures agree on, an
+        estimate of the Jaccard similarity of their shingles.
+        """
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(bucket.get(key, ()))
+            if candidates:
+                candidates = list(candidates)
+                scores = np.mean(np.stack([self._entries[i][0] for i in candidates]) == sig, axis=1)
+                best = int(np.argmax(scores))
+            if not candidates or scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(candidates[best])
+            return float(scores[best]), self._entries[candidates[best]][1]
+
+    def add(self, sig: np.ndarray, result: Dict):
+        with self._lock:
+            self._insert(sig, result)
+            self._unsaved += 1
+            save = self.path is not None and self._unsaved >= NEAR_DUPLICATE_SAVE_EVERY
+            if save:
+                self._unsaved = 0
+        if save:
+            self.save()
+
+    def _insert(self, sig: np.ndarray, result: Dict):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (sig, result)
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(key, []).append(entry_id)
+        while len(self._entries) > self.max_entries:
+            old_id, (old_sig, _) = self._entries.popitem(last=False)
+            for bucket, key in zip(self._buckets, self._band_keys(old_sig)):
+                ids = bucket[key]
+                ids.remove(old_id)
+                if not ids:
+                    del bucket[key]
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": NEAR_DUPLICATE_ENABLED,
+            "threshold": self.threshold,
+            "entries": len(self),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for bucket in self._buckets:
+                bucket.clear()
+            self._unsaved = 0
+        if self.path is not None:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        signatures = np.array([sig for sig, _ in entries], dtype=np.uint32).reshape(-1, PERMUTATIONS)
+        results = np.frombuffer(json.dumps([result for _, result in entries]).encode(), dtype=np.uint8)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, signatures=signatures, results=results)
+        os.replace(tmp, self.path)
+
+    def load(self) -> "NearDuplicateIndex":
+        if self.path is None or not os.path.exists(self.path):
+            return self
+        try:
+            with np.load(self.path, allow_pickle=False) as state:
+                signatures = state["signatures"].astype(np.uint32)
+                results = json.loads(state["results"].tobytes())
+            if signatures.ndim != 2 or signatures.shape[1] != PERMUTATIONS or len(signatures) != len(results):
+                raise ValueError(f"signatures of shape {signatures.shape} for {len(results)} results")
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable near-duplicate index {self.path}: {str(e)}")
+            return self
+        with self._lock:
+            # Oldest first, so the LRU order survives the round trip
+            for sig, result in zip(signatures, results):
+                self._insert(sig, result)
+        logger.info(f"Loaded {len(self)} near-duplicate entries")
+        return self
+
+
+near_duplicate_index = NearDuplicateIndex(NEAR_DUPLICATE_PATH)
+
+Gauge("credibility_near_duplicate_entries", "Texts held by the near-duplicate index",
+      function=lambda: len(near_duplicate_index))
+
+
+def reuse_near_duplicates(texts: List[str], score: Callable[[List[str]], List[dict]]) -> List[dict]:
+    """Sentiment of each text, taken from a near-duplicate analyzed before or else from ``score``.
+
+    ``score`` takes a list of texts and returns analyze_sentiment_batch style
+    results; it only sees the texts without a near-duplicate, and their
+    results are added to the index. Reused results are copies, shaped exactly
+    like scored ones.
+    """
+    if not NEAR_DUPLICATE_ENABLED:
+        return score(texts)
+    index = registry.get("near-duplicates")
+    signatures = [signature(text) for text in texts]
+    results: List[Optional[dict]] = []
+    for sig in signatures:
+        match = index.find(sig)
+        LOOKUPS.inc(outcome="reused" if match else "scored")
+        results.append(None if match is None else dict(match[1]))
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        for i, result in zip(missing, score([texts[i] for i in missing])):
+            results[i] = result
+            index.add(signatures[i], result)
+    return results
+
+
+def load_near_duplicates() -> NearDuplicateIndex:
+    return near_duplicate_index.load()
+
+
+# Loaded on the first lookup, so it never gates readiness
+registry.register("near-duplicates", load_near_duplicates, eager=False)
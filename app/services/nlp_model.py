@@ -1,16 +1,13 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 import logging
+from app.services.model import get_model_and_tokenizer
+from app.services.tokenization import encode
 from app.services.explainability import explain_prediction
 import re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSequenceClassification.from_pretrained(model_name)
-
 def detect_linguistic_tone(text: str) -> list:
     """Detect various linguistic features in the text."""
     features = []
@@ -35,8 +32,10 @@ def analyze_sentiment(text: str) -> dict:
     try:
         logger.info(f"Analyzing sentiment for text: {text[:100]}...")
         
-        # Tokenize and get model predictions
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+        model, tokenizer = get_model_and_tokenizer()
+        
+        # Tokenize (usually a cache hit after the sentiment pass) and get model predictions
+        inputs = encode(tokenizer, [text])
         outputs = model(**inputs)
         
         # Get prediction probabilities
@@ -53,7 +52,7 @@ def analyze_sentiment(text: str) -> dict:
         norm_score = confidence if sentiment == "POSITIVE" else -confidence
         
         # Get LIME explanation
-        lime_explanation, lime_html = explain_prediction(text)
+        lime_explanation, lime_html, _ = explain_prediction(text)
         
         # Detect linguistic features
         linguistic_features = detect_linguistic_tone(text)
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .startup import timeline
+
+logger = logging.getLogger(__name__)
+
+# name -> zero-argument callable returning the loaded model object
+_loaders: Dict[str, Callable[[], Any]] = {}
+# name -> callable that runs a throwaway inference on the loaded object
+_warmups: Dict[str, Callable[[Any], None]] = {}
+_models: Dict[str, Any] = {}
+_warm: set = set()
+# Models loaded by load_all/warmup and required for readiness
+_eager: set = set()
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None,
+             eager: bool = True):
+    """Register a model loader under ``name``. Loading is deferred until first use.
+
+    Non-eager models are skipped by load_all/warmup and don't gate readiness;
+    they are only loaded when something asks for them.
+    """
+    with _registry_lock:
+        _loaders[name] = loader
+        if eager:
+            _eager.add(name)
+        if warmup is not None:
+            _warmups[name] = warmup
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name: str) -> Any:
+    """Return the model registered under ``name``, loading it on first use."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    if name not in _loaders:
+        raise KeyError(f"No model registered under '{name}'")
+    with _locks[name]:
+        # Another thread may have finished loading while we waited
+        model = _models.get(name)
+        if model is None:
+            start = time.perf_counter()
+            try:
+                model = _loaders[name]()
+            except Exception as e:
+                logger.error(f"Error loading model '{name}': {str(e)}")
+                raise
+            _models[name] = model
+            seconds = time.perf_counter() - start
+            timeline.record(f"load:{name}", seconds)
+            logger.info(f"Model '{name}' loaded in {seconds:.2f}s")
+    return model
+
+
+def is_loaded(name: str) -> bool:
+    return name in _models
+
+
+def load_all(names: Optional[Iterable[str]] = None):
+    """Load models without running inference.
+
+    Meant for a pre-fork parent process: forked workers then share the
+    weight pages copy-on-write instead of each loading their own copy.
+    """
+    for name in list(names or _eager):
+        get(name)
+
+
+def warmup(names: Optional[Iterable[str]] = None):
+    """Load models and run their warmup inference so the first request is fast."""
+    for name in list(names or _eager):
+        model = get(name)
+        if name in _warm:
+            continue
+        hook = _warmups.get(name)
+        if hook is not None:
+            start = time.perf_counter()
+            hook(model)
+            # The warmup is the model's first inference
+            seconds = time.perf_counter() - start
+            timeline.record(f"warmup:{name}", seconds)
+            logger.info(f"Model '{name}' warmed up in {seconds:.2f}s")
+        _warm.add(name)
+
+
+def is_ready() -> bool:
+    """True once every eager model is loaded and warmed up."""
+    return all(name in _warm for name in _eager)
+
+
+def status() -> Dict[str, Dict[str, bool]]:
+    return {name: {"loaded": name in _models, "warm": name in _warm} for name in _loaders}
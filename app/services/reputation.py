@@ -0,0 +1,238 @@
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_REPUTATION_PATH = os.getenv("DOMAIN_REPUTATION_PATH", os.path.join(DATA_DIR, "domain_reputation.txt"))
+PUBLIC_SUFFIX_LIST_PATH = os.getenv("PUBLIC_SUFFIX_LIST_PATH", os.path.join(DATA_DIR, "public_suffixes.txt"))
+# How often lookups check the files for changes
+DOMAIN_REPUTATION_RELOAD_SECONDS = float(os.getenv("DOMAIN_REPUTATION_RELOAD_SECONDS", "5"))
+# Trust adjustment for domains on no list
+DEFAULT_TRUST_SCORE = 0.05
+# Hosts whose lookup result is remembered between reloads
+LOOKUP_CACHE_SIZE = 65536
+
+_TIER = re.compile(r'^\[(?P<name>[\w-]+)\s+(?P<score>[-+]?\d+(?:\.\d+)?)\]$')
+
+# Trie node key holding the entry that ends at that node; labels are never empty
+_ENTRY = ""
+# Kinds of public suffix rule
+_RULE = "rule"
+_EXCEPTION = "exception"
+
+
+@dataclass(frozen=True)
+class ReputationEntry:
+    domain: str
+    tier: str
+    score: float
+    # Covers every site under the suffix rather than one registrable domain
+    suffix_rule: bool = False
+
+
+def split_host(host: str) -> List[str]:
+    """Labels of a hostname, from the top-level domain down."""
+    return host.lower().strip().rstrip(".").split(".")[::-1]
+
+
+class PublicSuffixList:
+    """Public suffix rules in Public Suffix List format, including wildcards and exceptions.
+
+    Rules are kept in a trie of reversed labels like the reputation entries.
+    Any single label counts as a public suffix, as in the list's default rule,
+    so only multi-label suffixes need to be listed.
+    """
+
+    def __init__(self):
+        self.root: Dict[str, dict] = {}
+
+    def add(self, rule: str):
+        kind = _RULE
+        if rule.startswith("!"):
+            kind, rule = _EXCEPTION, rule[1:]
+        node = self.root
+        for label in split_host(rule):
+            node = node.setdefault(label, {})
+        node[_ENTRY] = kind
+
+    @classmethod
+    def load(cls, path: str) -> "PublicSuffixList":
+        psl = cls()
+        if not os.path.exists(path):
+            logger.warning(f"Public suffix list {path} not found, only single-label suffixes are known")
+            return psl
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                rule = line.split("//", 1)[0].strip().lower()
+                if rule:
+                    psl.add(rule)
+        return psl
+
+    def suffix_length(self, labels: List[str]) -> int:
+        """Number of labels (of the reversed ``labels``) that make up the public suffix."""
+        node, length = self.root, 1
+        for depth, label in enumerate(labels, 1):
+            # "*.ck" makes any label directly below "ck" part of the suffix
+            wildcard = "*" in node
+            node = node.get(label)
+            if node is None:
+                if wildcard:
+                    length = depth
+                break
+            kind = node.get(_ENTRY)
+            if kind is _EXCEPTION:
+                return depth - 1
+            if kind is _RULE or wildcard:
+                length = depth
+        return length
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        """The public suffix plus one label, or None if the host is itself a public suffix."""
+        labels = split_host(host)
+        length = self.suffix_length(labels) + 1
+        if length > len(labels):
+            return None
+        return ".".join(reversed(labels[:length]))
+
+
+class SuffixTrie:
+    """Reputation entries in a trie keyed by reversed domain labels (com -> reuters -> www)."""
+
+    def __init__(self):
+        self.root: Dict[str, dict] = {}
+        self.size = 0
+
+    def add(self, entry: ReputationEntry):
+        node = self.root
+        for label in split_host(entry.domain):
+            node = node.setdefault(label, {})
+        if _ENTRY not in node:
+            self.size += 1
+        node[_ENTRY] = entry
+
+    def match(self, labels: List[str], registrable_length: int) -> Optional[ReputationEntry]:
+        """The most specific entry covering the host with reversed ``labels``.
+
+        Plain domain entries only match within the host's registrable domain,
+        so an entry for a hosting platform doesn't cover its tenants' sites;
+        suffix rules match everything below them.
+        """
+        node, best = self.root, None
+        for depth, label in enumerate(labels, 1):
+            node = node.get(label)
+            if node is None:
+                break
+            entry = node.get(_ENTRY)
+            if entry is None:
+                continue
+            if entry.suffix_rule:
+                if depth < len(labels):
+                    best = entry
+            elif depth >= registrable_length:
+                best = entry
+        return best
+
+
+def load_reputation(path: str) -> SuffixTrie:
+    trie = SuffixTrie()
+    tier, score = None, None
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip().lower()
+            if not line:
+                continue
+            match = _TIER.match(line)
+            if match:
+                tier, score = match.group("name"), float(match.group("score"))
+                continue
+            if tier is None:
+                raise ValueError(f"{path}:{number}: domain listed before any [tier score] line")
+            suffix_rule = line.startswith(".")
+            domain = line.lstrip(".")
+            if not domain or " " in domain:
+                raise ValueError(f"{path}:{number}: invalid domain '{line}'")
+            trie.add(ReputationEntry(domain, tier, score, suffix_rule))
+    return trie
+
+
+class DomainReputation:
+    """Domain reputation lists, reloaded when their files change.
+
+    Each worker checks the files' modification times at most every
+    ``reload_seconds`` during lookups and swaps in freshly built indexes, so
+    list updates apply without restarting. If a changed file fails to parse,
+    the previous lists stay in use.
+    """
+
+    def __init__(self, path: str, psl_path: str, reload_seconds: float):
+        self.path = path
+        self.psl_path = psl_path
+        self.reload_seconds = reload_seconds
+        self._trie = SuffixTrie()
+        self._psl = PublicSuffixList()
+        self._cache: Dict[str, Optional[ReputationEntry]] = {}
+        self._mtimes: Tuple = ()
+        self._checked: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _file_mtimes(self) -> Tuple:
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (self.path, self.psl_path))
+
+    def reload(self, force: bool = False) -> bool:
+        """Rebuild the indexes if the files changed since the last load."""
+        with self._lock:
+            self._checked = time.monotonic()
+            mtimes = self._file_mtimes()
+            if mtimes == self._mtimes and not force:
+                return False
+            start = time.perf_counter()
+            try:
+                trie = load_reputation(self.path)
+                psl = PublicSuffixList.load(self.psl_path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Keeping previous domain reputation lists, reload failed: {str(e)}")
+                self._mtimes = mtimes
+                return False
+            self._trie, self._psl, self._cache, self._mtimes = trie, psl, {}, mtimes
+            logger.info(f"Loaded {trie.size} domain reputation entries in {time.perf_counter() - start:.3f}s")
+            return True
+
+    def _maybe_reload(self):
+        if self._checked is None or time.monotonic() - self._checked >= self.reload_seconds:
+            self.reload()
+
+    def lookup(self, host: str) -> Optional[ReputationEntry]:
+        """The reputation entry covering ``host``, if any. Cost grows with the label count only."""
+        self._maybe_reload()
+        cache = self._cache
+        if host in cache:
+            return cache[host]
+        entry = self._match(host)
+        if len(cache) >= LOOKUP_CACHE_SIZE:
+            cache.clear()
+        cache[host] = entry
+        return entry
+
+    def _match(self, host: str) -> Optional[ReputationEntry]:
+        labels = split_host(host)
+        return self._trie.match(labels, self._psl.suffix_length(labels) + 1)
+
+    def score(self, host: str) -> float:
+        entry = self.lookup(host)
+        return entry.score if entry is not None else DEFAULT_TRUST_SCORE
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        self._maybe_reload()
+        return self._psl.registrable_domain(host)
+
+
+domain_reputation = DomainReputation(
+    DOMAIN_REPUTATION_PATH, PUBLIC_SUFFIX_LIST_PATH, DOMAIN_REPUTATION_RELOAD_SECONDS
+)
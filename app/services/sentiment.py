@@ -1,34 +1,125 @@
 from .model import get_model_and_tokenizer
+from .batching import MicroBatcher
+from .config import BATCH_MAX_SIZE
+from .metrics import BATCH_SIZE, stage
+from .tokenization import encode_ids, encode_windows, length_batches, pad
+from typing import List, Tuple
+import os
 import torch
 import logging
 
 logger = logging.getLogger(__name__)
 
+BATCH_MAX_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_MAX_WAIT_MS", "5"))
+# Texts (or windows of long texts) per forward pass when a caller already holds many texts
+BULK_BATCH_SIZE = int(os.getenv("SENTIMENT_BULK_BATCH_SIZE", "32"))
+
+# Long texts are scored as overlapping windows (tokenization.MAX_LENGTH tokens,
+# sharing WINDOW_STRIDE) instead of being truncated
+# Windows scored per text; longer texts are sampled evenly. 1 restores plain truncation.
+MAX_WINDOWS = int(os.getenv("SENTIMENT_MAX_WINDOWS", "16"))
+# How window predictions combine into one: mean | length-weighted | max-extremity
+WINDOW_REDUCER = os.getenv("SENTIMENT_WINDOW_REDUCER", "mean")
+REDUCERS = ("mean", "length-weighted", "max-extremity")
+
+def select_windows(count: int, limit: int) -> List[int]:
+    """Indices of at most ``limit`` windows spread evenly over ``count``, keeping the first and last."""
+    if count <= limit:
+        return list(range(count))
+    if limit <= 1:
+        return [0]
+    return sorted({round(i * (count - 1) / (limit - 1)) for i in range(limit)})
+
+def select_text_windows(windows: List[List]) -> Tuple[List, List[int]]:
+    """Keep at most MAX_WINDOWS windows of each text.
+
+    Returns the input IDs of every kept window and, for each window, the
+    index of the text it came from.
+    """
+    input_ids, owners = [], []
+    for text_index, text_windows in enumerate(windows):
+        for i in select_windows(len(text_windows), MAX_WINDOWS):
+            input_ids.append(text_windows[i])
+            owners.append(text_index)
+    return input_ids, owners
+
+def reduce_windows(probs: torch.Tensor, lengths: torch.Tensor, reducer: str) -> torch.Tensor:
+    """Combine the class probabilities of one text's windows into a single distribution."""
+    if reducer == "mean":
+        return probs.mean(dim=0)
+    if reducer == "length-weighted":
+        weights = lengths.to(probs.dtype)
+        return (probs * weights[:, None]).sum(dim=0) / weights.sum()
+    if reducer == "max-extremity":
+        # The window the model is most certain about decides
+        return probs[probs.max(dim=-1).values.argmax()]
+    raise ValueError(f"Unknown window reducer '{reducer}', expected one of {', '.join(REDUCERS)}")
+
+def analyze_sentiment_batch(texts: List[str], reducer: str = None) -> List[dict]:
+    """Analyze sentiment of several texts, sharing forward passes between them.
+
+    Texts longer than the model's input are split into overlapping windows
+    (at most MAX_WINDOWS per text). All windows are scored in batches of up
+    to BULK_BATCH_SIZE windows of similar length and each text's window
+    probabilities are combined with ``reducer`` (WINDOW_REDUCER by default),
+    so cost grows linearly with text length up to the window cap.
+    """
+    if not texts:
+        return []
+    reducer = reducer or WINDOW_REDUCER
+
+    # Get model and tokenizer
+    model, tokenizer = get_model_and_tokenizer()
+
+    with stage("tokenize"):
+        if MAX_WINDOWS <= 1:
+            windows = [[ids] for ids in encode_ids(tokenizer, texts)]
+        else:
+            windows = encode_windows(tokenizer, texts)
+        input_ids, owners = select_text_windows(windows)
+
+    # Get model predictions for batches of similar-length windows, each
+    # padded to its longest window, and put them back in window order
+    probs = lengths = None
+    with torch.no_grad(), stage("forward"):
+        for batch in length_batches(input_ids, BULK_BATCH_SIZE):
+            inputs = pad(tokenizer, [input_ids[i] for i in batch])
+            BATCH_SIZE.observe(len(batch), batcher="forward-pass")
+            outputs = model(**inputs)
+            if probs is None:
+                probs = torch.empty((len(input_ids), outputs.logits.shape[-1]))
+                lengths = torch.empty(len(input_ids), dtype=torch.long)
+            probs[batch] = torch.nn.functional.softmax(outputs.logits, dim=-1).float()
+            lengths[batch] = inputs["attention_mask"].sum(dim=-1)
+    owners = torch.tensor(owners)
+
+    results = []
+    for text_index in range(len(texts)):
+        mask = owners == text_index
+        text_probs = probs[mask]
+        combined = text_probs[0] if len(text_probs) == 1 else reduce_windows(text_probs, lengths[mask], reducer)
+
+        # Get predicted class and confidence, and map class to sentiment
+        confidence, predicted_class = combined.max(dim=-1)
+        results.append({
+            "sentiment": "POSITIVE" if predicted_class.item() == 1 else "NEGATIVE",
+            "confidence": confidence.item(),
+            "windows": len(text_probs)
+        })
+    return results
+
+_batcher = MicroBatcher(
+    analyze_sentiment_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    name="sentiment-batcher"
+)
+
 def analyze_sentiment(text: str) -> dict:
     """Analyze sentiment of the given text."""
     try:
-        # Get model and tokenizer
-        model, tokenizer = get_model_and_tokenizer()
-        
-        # Tokenize input
-        inputs = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=512)
-        
-        # Get model predictions
-        with torch.no_grad():
-            outputs = model(**inputs)
-            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        
-        # Get predicted class and confidence
-        predicted_class = torch.argmax(probs, dim=-1).item()
-        confidence = probs[0][predicted_class].item()
-        
-        # Map class to sentiment
-        sentiment = "POSITIVE" if predicted_class == 1 else "NEGATIVE"
-        
-        return {
-            "sentiment": sentiment,
-            "confidence": confidence
-        }
+        # Shares a forward pass with any other texts submitted concurrently
+        return _batcher(text)
     except Exception as e:
         logger.error(f"Error in sentiment analysis: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
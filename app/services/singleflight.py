@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .metrics import Counter, Gauge, stage
+
+logger = logging.getLogger(__name__)
+
+COALESCED = Counter("credibility_coalesced_calls_total",
+                    "Calls that started shared work (leader) or joined work already in flight (follower)",
+                    ["flight", "role"])
+
+_groups = []
+Gauge("credibility_inflight_flights", "Distinct keys with work in flight", ["flight"],
+      function=lambda: {(group.name,): len(group) for group in _groups})
+
+
+class SingleFlight:
+    """Run at most one coroutine per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key starts the work as a task of its own, later
+    callers with the same key wait for that task and get the same result or
+    exception. Every caller waits through ``asyncio.shield``, so a client
+    that disconnects, even the one that started the work, doesn't cancel it
+    for the others. Keys are forgotten as soon as the work finishes; caching
+    the result is up to the caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        _groups.append(self)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        task = self._inflight.get(key)
+        # Tasks can't be awaited from another event loop (tests, a forked worker)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            COALESCED.inc(flight=self.name, role="follower")
+            with stage(f"coalesced_{self.name}"):
+                return await asyncio.shield(task)
+        COALESCED.inc(flight=self.name, role="leader")
+        task = asyncio.ensure_future(fn(*args))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the outcome as retrieved when every caller went away before it came
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"{self.name} flight failed: {type(task.exception()).__name__}")
@@ -0,0 +1,80 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily on the request path; a preloading master imports them up
+# front so forked workers share them instead of each paying on first use
+DEFERRED_MODULES = (
+    "lime.lime_text",
+    "lime.explanation",
+    "sklearn.feature_extraction.text",
+    "sklearn.linear_model",
+)
+
+
+def _process_started() -> float:
+    """Wall-clock time the process was started, or now when /proc isn't there."""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields after it are fixed
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+class StartupTimeline:
+    """Phases of startup (imports, weight loading, warmup) with when they ended and how long they took.
+
+    Times are relative to when the process started, so "ready" is the time
+    a new pod takes to become useful. Forked workers inherit the master's
+    entries and add their own.
+    """
+
+    def __init__(self):
+        self.started = _process_started()
+        self._phases: List[Dict[str, object]] = []
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: Optional[float] = None):
+        """Record that ``phase`` ended now, having taken ``seconds`` (since process start by default)."""
+        at = time.time() - self.started
+        with self._lock:
+            self._phases.append({
+                "phase": phase,
+                "at": round(at, 3),
+                "seconds": round(at if seconds is None else seconds, 3),
+                "pid": os.getpid(),
+            })
+
+    def seconds(self, phase: str) -> Optional[float]:
+        with self._lock:
+            matches = [entry["seconds"] for entry in self._phases if entry["phase"] == phase]
+        return matches[-1] if matches else None
+
+    def report(self) -> Dict[str, object]:
+        with self._lock:
+            phases = list(self._phases)
+        ready = [entry["at"] for entry in phases if entry["phase"] == "ready"]
+        return {"timeToReady": ready[-1] if ready else None, "phases": phases}
+
+
+timeline = StartupTimeline()
+
+
+def preload_imports():
+    """Import the lazily imported modules now, e.g. in a gunicorn master before forking."""
+    start = time.perf_counter()
+    for name in DEFERRED_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {str(e)}")
+    timeline.record("preload", time.perf_counter() - start)
@@ -0,0 +1,244 @@
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Tokens per model input; longer texts are truncated or split into windows
+MAX_LENGTH = 512
+# Tokens shared by consecutive windows of a long text
+WINDOW_STRIDE = int(os.getenv("SENTIMENT_WINDOW_STRIDE", "128"))
+# Bound of the encoding cache in tokens, about 4 bytes each
+TOKENIZATION_CACHE_MAX_TOKENS = int(os.getenv("TOKENIZATION_CACHE_MAX_TOKENS", "4000000"))
+
+# Upper token lengths of the padding buckets; batches only mix sequences of one bucket
+PADDING_BUCKETS = tuple(sorted(int(b) for b in os.getenv("PADDING_BUCKETS", "32,64,128,256,512").split(",")))
+
+# Fast tokenizers keep their truncation and padding settings as mutable state;
+# calls from several threads with different settings fail with "Already borrowed"
+tokenizer_lock = threading.Lock()
+
+
+class _Encoding:
+    """Token windows of one text. Incomplete when only the first window was computed."""
+    __slots__ = ("windows", "complete", "tokens")
+
+    def __init__(self, windows: List[np.ndarray], complete: bool):
+        self.windows = windows
+        self.complete = complete
+        self.tokens = sum(len(window) for window in windows)
+
+
+class EncodingCache:
+    """LRU of token windows keyed by tokenizer and a hash of the text.
+
+    The same text is tokenized by the sentiment batcher, the explainers and
+    the detailed analysis; with the cache only the first of them pays for
+    it. Windows are stored as int32 arrays and the cache is bounded by its
+    total token count.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.tokens = 0
+        self.hits = 0
+        self.misses = 0
+        # Time spent inside the tokenizer on cache misses
+        self.tokenize_seconds = 0.0
+        self._entries: "OrderedDict[Tuple, _Encoding]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tokenizer, text: str, max_length: int, stride: int) -> Tuple:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        return (tokenizer.name_or_path, max_length, stride, digest)
+
+    def get(self, key: Tuple, need_complete: bool) -> Optional[_Encoding]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (need_complete and not entry.complete):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Tuple, entry: _Encoding):
+        if entry.tokens > self.max_tokens:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.tokens -= previous.tokens
+            self._entries[key] = entry
+            self.tokens += entry.tokens
+            while self.tokens > self.max_tokens:
+                _, evicted = self._entries.popitem(last=False)
+                self.tokens -= evicted.tokens
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "tokens": self.tokens,
+                "hits": self.hits,
+                "misses": self.misses,
+                "tokenize_seconds": round(self.tokenize_seconds, 4),
+            }
+
+
+encoding_cache = EncodingCache(TOKENIZATION_CACHE_MAX_TOKENS)
+
+
+def _tokenize(tokenizer, texts: List[str], max_length: int, stride: Optional[int]) -> List[List[np.ndarray]]:
+    """One batched tokenizer call; windows of every text when ``stride`` is given, else the truncated input."""
+    with tokenizer_lock:
+        start = time.perf_counter()
+        if stride is None:
+            encoded = tokenizer(texts, truncation=True, max_length=max_length)
+            owners = range(len(texts))
+        else:
+            encoded = tokenizer(texts, truncation=True, max_length=max_length, stride=stride,
+                                return_overflowing_tokens=True)
+            owners = encoded["overflow_to_sample_mapping"]
+        encoding_cache.tokenize_seconds += time.perf_counter() - start
+    windows: List[List[np.ndarray]] = [[] for _ in texts]
+    for owner, ids in zip(owners, encoded["input_ids"]):
+        windows[owner].append(np.asarray(ids, dtype=np.int32))
+    return windows
+
+
+def encode_windows(tokenizer, texts: Sequence[str], max_length: int = MAX_LENGTH,
+                   stride: int = WINDOW_STRIDE, cache: bool = True) -> List[List[np.ndarray]]:
+    """All overlapping token windows of each text, tokenizing only texts not seen recently.
+
+    Only fast tokenizers report which text an overflowing window belongs to;
+    with a slow one each text gets just its truncated first window.
+    """
+    if not tokenizer.is_fast:
+        return [[window] for window in encode_ids(tokenizer, texts, max_length, cache)]
+    return _encode(tokenizer, texts, max_length, stride, True, cache)
+
+
+def encode_ids(tokenizer, texts: Sequence[str], max_length: int = MAX_LENGTH,
+               cache: bool = True) -> List[np.ndarray]:
+    """The truncated input IDs of each text; reuses the first window of cached windowed encodings."""
+    windows = _encode(tokenizer, texts, max_length, WINDOW_STRIDE, False, cache)
+    return [text_windows[0] for text_windows in windows]
+
+
+def _encode(tokenizer, texts: Sequence[str], max_length: int, stride: int, complete: bool,
+            cache: bool) -> List[List[np.ndarray]]:
+    texts = list(texts)
+    if not cache:
+        return _tokenize(tokenizer, texts, max_length, stride if complete else None)
+
+    keys = [encoding_cache.key(tokenizer, text, max_length, stride) for text in texts]
+    results: List[Optional[List[np.ndarray]]] = []
+    missing: Dict[Tuple, int] = {}
+    for i, key in enumerate(keys):
+        entry = encoding_cache.get(key, complete)
+        results.append(entry.windows if entry is not None else None)
+        if entry is None:
+            missing.setdefault(key, i)
+    if missing:
+        positions = list(missing.values())
+        tokenized = _tokenize(tokenizer, [texts[i] for i in positions], max_length, stride if complete else None)
+        fresh = {}
+        for key, windows in zip(missing, tokenized):
+            # A truncated encoding is complete anyway when the text fits in one window
+            encoding_cache.set(key, _Encoding(windows, complete or len(windows[0]) < max_length))
+            fresh[key] = windows
+        results = [windows if windows is not None else fresh[key] for windows, key in zip(results, keys)]
+    return results
+
+
+def bucket_of(length: int) -> int:
+    """The smallest padding bucket holding ``length`` tokens; longer sequences get the largest."""
+    i = bisect.bisect_left(PADDING_BUCKETS, length)
+    return PADDING_BUCKETS[min(i, len(PADDING_BUCKETS) - 1)]
+
+
+class PaddingStats:
+    """Real and padded tokens of every padded batch, per bucket of its longest sequence."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, Dict[str, int]] = {}
+
+    def record(self, lengths: List[int], padded_length: int):
+        bucket = bucket_of(padded_length)
+        with self._lock:
+            counts = self._buckets.setdefault(bucket, {"batches": 0, "sequences": 0, "tokens": 0, "padding": 0})
+            counts["batches"] += 1
+            counts["sequences"] += len(lengths)
+            counts["tokens"] += sum(lengths)
+            counts["padding"] += padded_length * len(lengths) - sum(lengths)
+
+    def reset(self):
+        with self._lock:
+            self._buckets = {}
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            buckets = {bucket: dict(counts) for bucket, counts in sorted(self._buckets.items())}
+        for counts in buckets.values():
+            counts["waste"] = round(counts["padding"] / max(counts["tokens"] + counts["padding"], 1), 4)
+        tokens = sum(counts["tokens"] for counts in buckets.values())
+        padding = sum(counts["padding"] for counts in buckets.values())
+        return {
+            "boundaries": list(PADDING_BUCKETS),
+            "buckets": buckets,
+            "tokens": tokens,
+            "padding": padding,
+            "waste": round(padding / max(tokens + padding, 1), 4),
+        }
+
+
+padding_stats = PaddingStats()
+
+
+def length_batches(sequences: Sequence[Sequence[int]], max_batch_size: int) -> List[List[int]]:
+    """Indices of ``sequences`` grouped into batches of similar length.
+
+    Sequences are sorted by length and split at the padding bucket
+    boundaries, so one long sequence doesn't make a whole batch of short
+    ones pad to its length. Callers put the outputs back in input order.
+    """
+    order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+    batches: List[List[int]] = []
+    current_bucket = None
+    for i in order:
+        bucket = bucket_of(len(sequences[i]))
+        if bucket != current_bucket or len(batches[-1]) >= max_batch_size:
+            batches.append([])
+            current_bucket = bucket
+        batches[-1].append(i)
+    return batches
+
+
+def pad(tokenizer, sequences: Sequence[np.ndarray]) -> Dict[str, torch.Tensor]:
+    """Right-pad input ID sequences to the longest one into model inputs."""
+    lengths = [len(ids) for ids in sequences]
+    longest = max(lengths)
+    padding_stats.record(lengths, longest)
+    input_ids = torch.full((len(sequences), longest), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), longest), dtype=torch.long)
+    for row, ids in enumerate(sequences):
+        input_ids[row, :len(ids)] = torch.from_numpy(np.asarray(ids, dtype=np.int64))
+        attention_mask[row, :len(ids)] = 1
+    return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def encode(tokenizer, texts: Sequence[str], max_length: int = MAX_LENGTH,
+           cache: bool = True) -> Dict[str, torch.Tensor]:
+    """Padded ``input_ids``/``attention_mask`` tensors of the truncated texts, ready for the model."""
+    return pad(tokenizer, encode_ids(tokenizer, texts, max_length, cache))
@@ -1,19 +1,32 @@
 # app/utils/scraper.py
 
-from newspaper import Article
+import asyncio
+
 import validators
 
+from app.services.extractor import extract_main_content
+from app.services.fetcher import Fetcher
+
 def is_valid_url(input_str: str) -> bool:
     return validators.url(input_str)
 
+async def _download(url: str):
+    # A private fetcher, since this runs outside the app's event loop
+    fetcher = Fetcher()
+    try:
+        return await fetcher.fetch(url)
+    finally:
+        await fetcher.close()
+
 def scrape_article(url: str) -> dict:
     try:
-        article = Article(url)
-        article.download()
-        article.parse()
+        page = asyncio.run(_download(url))
+        if page is None:
+            raise ValueError("download failed")
+        extraction = extract_main_content(page.html)
         return {
-            "title": article.title,
-            "text": article.text
+            "title": extraction.title,
+            "text": extraction.text
         }
     except Exception as e:
         return {
@@ -0,0 +1,31 @@
+"""Compare the int8 and ONNX backends against fp32 PyTorch on a fixed corpus.
+
+    python -m benchmarks.backend_parity [--backends torch torch-int8 onnx] [--json]
+"""
+import argparse
+import json
+
+from benchmarks.corpus import all_texts
+from app.services.backends import BACKENDS, compare_backends
+from app.services.model import MODEL_NAME, load_fp32_model
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    model, tokenizer = load_fp32_model()
+    report = compare_backends(model, tokenizer, MODEL_NAME, all_texts(), args.backends, args.batch_size)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'backend':<12} {'agreement':>10} {'mean Δconf':>11} {'max Δconf':>10} {'ms/batch':>9} {'speedup':>8}")
+    for name, row in report.items():
+        print(f"{name:<12} {row['label_agreement']:>10.1%} {row['mean_confidence_delta']:>11.4f} "
+              f"{row['max_confidence_delta']:>10.4f} {row['batch_latency_ms']:>9.1f} {row['speedup']:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
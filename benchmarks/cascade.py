@@ -0,0 +1,119 @@
+"""Distill the cascade's linear first stage from the transformer and measure what each threshold trades.
+
+    python -m benchmarks.cascade [--texts texts.txt] [--test-share 0.3] [--save] [--json]
+
+Texts (one per line with --texts, by default the corpus split into
+sentences) are labelled by the transformer, the linear model is fit on
+part of them and, on the rest, each threshold's escalation rate, agreement
+with the transformer and throughput are reported. --save writes the model
+fit on all texts to CASCADE_MODEL_PATH, so a deployment starts out ready
+instead of learning from its first CASCADE_MIN_TRAINED requests.
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+import numpy as np
+
+from app.services.cascade import CASCADE_MODEL_PATH, CascadeScorer
+from app.services.features import extract_features
+from app.services.sentiment import analyze_sentiment_batch
+from benchmarks.corpus import SAMPLE_TEXTS, SHORT_TEXTS
+
+THRESHOLDS = (0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+def corpus_texts():
+    sentences = [s.strip() for text in SAMPLE_TEXTS.values() for s in re.split(r"(?<=[.!?])\s+", text)]
+    return [s for s in sentences if len(s.split()) >= 4] + SHORT_TEXTS + list(SAMPLE_TEXTS.values())
+
+def labels_of(texts):
+    return [int(r["sentiment"] == "POSITIVE") for r in analyze_sentiment_batch(texts)]
+
+def fit(texts, labels, epochs: int) -> CascadeScorer:
+    scorer = CascadeScorer(None, min_trained=0)
+    features = [extract_features(text) for text in texts]
+    order = list(range(len(texts)))
+    rng = random.Random(0)
+    for _ in range(epochs):
+        rng.shuffle(order)
+        scorer.learn([texts[i] for i in order], [features[i] for i in order], np.full(len(order), 0.5),
+                     [labels[i] for i in order], "training")
+    return scorer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", help="file with one text per line")
+    parser.add_argument("--test-share", type=float, default=0.3)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--save", action="store_true", help="save a model fit on all texts")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = corpus_texts()
+    labels = labels_of(texts)
+    order = list(range(len(texts)))
+    random.Random(1).shuffle(order)
+    split = int(len(order) * (1 - args.test_share))
+    train, test = order[:split], order[split:]
+
+    scorer = fit([texts[i] for i in train], [labels[i] for i in train], args.epochs)
+    test_texts = [texts[i] for i in test]
+    test_labels = np.array([labels[i] for i in test])
+
+    start = time.perf_counter()
+    features = [extract_features(text) for text in test_texts]
+    probabilities = scorer.predict(test_texts, features)
+    linear_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    analyze_sentiment_batch(test_texts)
+    transformer_seconds = time.perf_counter() - start
+
+    confidence = np.maximum(probabilities, 1 - probabilities)
+    agrees = (probabilities >= 0.5).astype(int) == test_labels
+    reports = []
+    for threshold in THRESHOLDS:
+        accepted = confidence >= threshold
+        # Escalated texts get the transformer's own answer
+        agreement = float(np.mean(np.where(accepted, agrees, True)))
+        seconds = linear_seconds + transformer_seconds * (1 - accepted.mean())
+        reports.append({
+            "threshold": threshold,
+            "escalation_rate": round(float(1 - accepted.mean()), 3),
+            "agreement": round(agreement, 3),
+            "texts_per_second": round(len(test_texts) / seconds, 1),
+        })
+    summary = {
+        "train_texts": len(train),
+        "test_texts": len(test),
+        "linear_ms_per_text": round(linear_seconds / len(test_texts) * 1000, 3),
+        "transformer_ms_per_text": round(transformer_seconds / len(test_texts) * 1000, 3),
+        "thresholds": reports,
+    }
+
+    if args.save:
+        if CASCADE_MODEL_PATH is None:
+            parser.error("--save needs CASCADE_MODEL_PATH set to the .npz file to write")
+        scorer = fit(texts, labels, args.epochs)
+        scorer.path = CASCADE_MODEL_PATH
+        scorer.save()
+        summary["saved"] = CASCADE_MODEL_PATH
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{summary['train_texts']} training texts, {summary['test_texts']} test texts; "
+          f"linear {summary['linear_ms_per_text']} ms/text, transformer {summary['transformer_ms_per_text']} ms/text")
+    print(f"{'threshold':>9} {'escalated':>10} {'agreement':>10} {'texts/s':>9}")
+    for r in reports:
+        print(f"{r['threshold']:>9} {r['escalation_rate']:>10.1%} {r['agreement']:>10.1%} {r['texts_per_second']:>9.1f}")
+    if args.save:
+        print(f"Saved to {CASCADE_MODEL_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure claim index build time, size, search latency and recall on synthetic corpora.
+
+    python -m benchmarks.claim_index [--sizes 10000 100000 1000000] [--queries 500] [--json]
+
+Queries are paraphrases of indexed claims (words dropped, reordered, filler
+added); recall@k is the share of queries whose source claim is in the top k.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.claim_index import ClaimIndex
+
+FILLER = ("reportedly", "experts", "say", "new", "claims", "that", "actually", "officials", "according")
+STOP = ("the", "a", "of", "in", "is", "are", "to", "and")
+
+def vocabulary(size: int, rng: random.Random):
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "zi", "pe", "shu", "dra", "gle", "bo", "fi", "qua", "te"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+def claims(count: int, rng: random.Random):
+    words = vocabulary(50000, rng)
+    # Zipf-like word frequencies, as in real text
+    weights = 1 / np.arange(1, len(words) + 1)
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    picks = np_rng.choice(len(words), size=(count, 14), p=weights / weights.sum())
+    lengths = np_rng.integers(6, 15, size=count)
+    for row, length in zip(picks, lengths):
+        tokens = [words[i] for i in row[:length]]
+        tokens.insert(1, rng.choice(STOP))
+        yield " ".join(tokens).capitalize() + "."
+
+def paraphrase(claim: str, rng: random.Random) -> str:
+    tokens = claim.rstrip(".").lower().split()
+    del tokens[rng.randrange(len(tokens))]
+    i = rng.randrange(len(tokens) - 1)
+    tokens[i], tokens[i + 1] = tokens[i + 1], tokens[i]
+    tokens[rng.randrange(len(tokens)):0] = rng.sample(FILLER, 2)
+    return " ".join(tokens) + "."
+
+def run(size: int, queries: int, seed: int, directory: str) -> dict:
+    rng = random.Random(seed)
+    corpus_path = os.path.join(directory, f"corpus-{size}.jsonl")
+    texts = []
+    with open(corpus_path, "w") as f:
+        for i, claim in enumerate(claims(size, rng)):
+            texts.append(claim)
+            f.write(json.dumps({"claim": claim, "rating": "FALSE", "source": "bench", "url": f"#{i}"}) + "\n")
+
+    index = ClaimIndex(os.path.join(directory, f"index-{size}"), corpus_path)
+    start = time.perf_counter()
+    index._refresh(force=True)
+    build_seconds = time.perf_counter() - start
+    generation = os.path.join(index.directory, index.stats()["generation"])
+    index_bytes = sum(os.path.getsize(os.path.join(generation, name)) for name in os.listdir(generation))
+
+    targets = rng.sample(range(size), queries)
+    latencies, hits_at_1, hits_at_5 = [], 0, 0
+    for target in targets:
+        query = paraphrase(texts[target], rng)
+        start = time.perf_counter()
+        matches = index.search(query, k=5)
+        latencies.append((time.perf_counter() - start) * 1000)
+        urls = [match.url for match in matches]
+        hits_at_1 += urls[:1] == [f"#{target}"]
+        hits_at_5 += f"#{target}" in urls
+
+    added = [{"claim": claim, "rating": "TRUE"} for claim in claims(100, rng)]
+    start = time.perf_counter()
+    index.add(added)
+    add_ms = (time.perf_counter() - start) * 1000
+    return {
+        "claims": size,
+        "build_seconds": round(build_seconds, 2),
+        "index_mib": round(index_bytes / 2 ** 20, 1),
+        "search_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "search_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "recall_at_1": round(hits_at_1 / queries, 3),
+        "recall_at_5": round(hits_at_5 / queries, 3),
+        "add_100_ms": round(add_ms, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        reports = [run(size, args.queries, args.seed, directory) for size in args.sizes]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'claims':>9} {'build s':>8} {'MiB':>7} {'p50 ms':>7} {'p95 ms':>7} {'R@1':>6} {'R@5':>6} {'add 100 ms':>11}")
+    for r in reports:
+        print(f"{r['claims']:>9} {r['build_seconds']:>8.2f} {r['index_mib']:>7.1f} {r['search_p50_ms']:>7.3f} "
+              f"{r['search_p95_ms']:>7.3f} {r['recall_at_1']:>6.3f} {r['recall_at_5']:>6.3f} {r['add_100_ms']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
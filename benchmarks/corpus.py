@@ -0,0 +1,68 @@
+"""Fixed text corpus shared by the offline benchmarks and parity checks."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test_content import test_texts
+
+# Longer, article-like samples covering each content type the heuristics know about
+SAMPLE_TEXTS = {category: " ".join(text.split()) for category, text in test_texts.items()}
+
+# Short, single-sentence inputs like the ones the extension sends for a selection
+SHORT_TEXTS = [
+    "The city council approved the new budget on Tuesday.",
+    "This is the worst product I have ever bought.",
+    "Researchers found no link between the supplement and weight loss.",
+    "You won't believe what this celebrity did next!",
+    "The museum will be closed for renovations until March.",
+    "According to the CDC, flu cases rose 12 percent this week.",
+    "I absolutely loved the new season, the writing is brilliant.",
+    "Officials warned that the bridge may be unsafe after the storm.",
+    "SHOCKING secret doctors don't want you to know about!!",
+    "The company reported quarterly earnings in line with expectations.",
+    "Traffic was terrible and the meeting was a waste of time.",
+    "NASA confirmed the launch window opens next Friday.",
+    "This miracle tea melts fat instantly, experts hate it.",
+    "The study, published in Nature, analyzed data from 40 countries.",
+    "Heavy rain is expected tonight with wind gusts up to 50 mph.",
+    "Nobody could have predicted such an amazing comeback.",
+]
+
+def all_texts():
+    return list(SAMPLE_TEXTS.values()) + SHORT_TEXTS
+
+# Page layouts covering each extraction strategy, most common first
+_LAYOUTS = ("article", "main", "content-div", "body", "document")
+
+def _page(title: str, paragraphs, layout: str, seed: int) -> str:
+    """A news-style page: heavy head, navigation, scripts and widgets around the story."""
+    script = "<script>window.__STATE__ = %s;</script>" % ('{"k":"' + "v" * 2000 + '"}')
+    nav = "<nav><ul>" + "".join(f'<li><a href="/s/{i}">Section {i}</a></li>' for i in range(40)) + "</ul></nav>"
+    widgets = "".join(
+        f'<div class="widget w{i}"><span>Trending {i + seed}</span><img src="/i/{i}.png"></div>' for i in range(30)
+    )
+    body = "".join(f"<p>{p} <a href='/x'>link</a> <em>emphasis</em>.</p>" for p in paragraphs)
+    story = f"<h1>{title}</h1><div class='byline'>By Staff</div>{body}<aside>Related stories</aside>"
+    if layout == "article":
+        story = f"<article>{story}</article>"
+    elif layout == "main":
+        story = f"<main>{story}</main>"
+    elif layout == "content-div":
+        story = f"<div class='story-content'>{story}</div>"
+    head = f"<head><title>{title}</title>" + '<meta name="x" content="y">' * 20 + script * 5 + "<style>p{margin:0}</style></head>"
+    if layout == "document":
+        return f"<html>{head}{story}</html>"
+    return f"<html>{head}<body><header>Site header</header>{nav}{widgets}{story}{script * 3}<footer>Footer</footer></body></html>"
+
+def html_pages(repeat: int = 4):
+    """Synthetic pages built from the sample texts, one per (sample, layout) pair.
+
+    Benchmarks that read saved pages accept a directory of real ones instead.
+    """
+    pages = {}
+    for seed, (category, text) in enumerate(SAMPLE_TEXTS.items()):
+        sentences = [s.strip() for s in text.split(".") if s.strip()] * repeat
+        for layout in _LAYOUTS:
+            pages[f"{category}-{layout}"] = _page(category.replace("_", " ").title(), sentences, layout, seed)
+    return pages
@@ -0,0 +1,63 @@
+"""Time domain reputation lookups as the lists grow.
+
+    python -m benchmarks.domain_reputation [--sizes 1000 100000] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.services.reputation import DomainReputation, PUBLIC_SUFFIX_LIST_PATH
+
+TLDS = ("com", "org", "net", "co.uk", "com.au", "de", "io")
+
+def write_list(path: str, size: int, rng: random.Random):
+    with open(path, "w") as f:
+        for tier, score in (("high", 0.4), ("moderate", 0.25), ("low", -0.2)):
+            f.write(f"[{tier} {score}]\n")
+            for i in range(size // 3):
+                f.write(f"site{rng.randrange(10 ** 9)}-{i}.{rng.choice(TLDS)}\n")
+
+def time_lookups(lookup, hosts) -> float:
+    """Mean microseconds per lookup."""
+    start = time.perf_counter()
+    for host in hosts:
+        lookup(host)
+    return (time.perf_counter() - start) / len(hosts) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hosts = [f"www.news{rng.randrange(1000)}.{rng.choice(TLDS)}" for _ in range(args.lookups)]
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"reputation-{size}.txt")
+            write_list(path, size, rng)
+            reputation = DomainReputation(path, PUBLIC_SUFFIX_LIST_PATH, reload_seconds=3600)
+            start = time.perf_counter()
+            reputation.reload(force=True)
+            load_ms = (time.perf_counter() - start) * 1000
+            report[size] = {
+                "load_ms": load_ms,
+                # The trie walk itself, then repeat lookups answered from the per-host cache
+                "uncached_us": time_lookups(reputation._match, hosts),
+                "cached_us": time_lookups(reputation.lookup, hosts),
+            }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'entries':>8} {'load ms':>8} {'uncached µs':>12} {'cached µs':>10}")
+    for size, row in report.items():
+        print(f"{size:>8} {row['load_ms']:>8.1f} {row['uncached_us']:>12.2f} {row['cached_us']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
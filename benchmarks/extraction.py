@@ -0,0 +1,122 @@
+"""Compare the streaming main-content extractor with BeautifulSoup and newspaper3k.
+
+    python -m benchmarks.extraction [--pages DIR] [--extractors ...] [--repeat N] [--json]
+
+Without --pages, synthetic news-style pages are used; point --pages at a
+directory of saved .html files to measure real sites.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.corpus import html_pages
+from app.services.extractor import extract_main_content
+
+def extract_beautifulsoup(html: str) -> str:
+    """The BeautifulSoup tree-building extractor this module replaced."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    main_content = soup.find('article') or soup.find('main') or soup.find('div', class_=lambda x: x and ('content' in x or 'article' in x))
+    if main_content:
+        for element in main_content.find_all(['nav', 'footer', 'aside', 'script', 'style']):
+            element.decompose()
+        return main_content.get_text(strip=True)
+    body = soup.find('body')
+    if body:
+        for element in body.find_all(['nav', 'footer', 'aside', 'script', 'style', 'header']):
+            element.decompose()
+        return body.get_text(strip=True)
+    return soup.get_text(strip=True)
+
+def extract_newspaper(html: str) -> str:
+    """newspaper3k's extractor, as app/utils/scraper.py used to call it."""
+    from newspaper import Article
+    article = Article("http://example.com/")
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+EXTRACTORS = {
+    "streaming": lambda html: extract_main_content(html).text,
+    "beautifulsoup": extract_beautifulsoup,
+    "newspaper3k": extract_newspaper,
+}
+
+def load_pages(directory: str):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                pages[name] = f.read()
+    return pages
+
+def measure(extract, pages, repeat: int):
+    """Median milliseconds per page, peak traced memory per page, and the outputs."""
+    outputs = {name: extract(html) for name, html in pages.items()}
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages.values():
+            extract(html)
+        timings.append((time.perf_counter() - start) * 1000 / len(pages))
+    peaks = []
+    for html in pages.values():
+        tracemalloc.start()
+        extract(html)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings), max(peaks), outputs
+
+def same_text(a: str, b: str) -> bool:
+    # BeautifulSoup's get_text(strip=True) glues strings together, so compare without whitespace
+    return "".join(a.split()) == "".join(b.split())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help="directory of saved .html pages (default: synthetic pages)")
+    parser.add_argument("--extractors", nargs="+", default=list(EXTRACTORS), choices=list(EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else html_pages()
+    strategies = {name: extract_main_content(html).strategy for name, html in pages.items()}
+    report = {"pages": len(pages), "page_kib": sum(map(len, pages.values())) / len(pages) / 1024, "extractors": {}}
+    reference = None
+    for name in args.extractors:
+        extract = EXTRACTORS[name]
+        try:
+            ms, peak, outputs = measure(extract, pages, args.repeat)
+        except ImportError as e:
+            report["extractors"][name] = {"error": str(e)}
+            continue
+        row = {"ms_per_page": ms, "peak_kib": peak / 1024}
+        if name == "beautifulsoup":
+            reference = outputs
+        report["extractors"][name] = row
+        row["outputs"] = outputs
+    if reference is not None:
+        for row in report["extractors"].values():
+            if "outputs" in row:
+                row["same_text_as_beautifulsoup"] = sum(same_text(row["outputs"][p], reference[p]) for p in pages) / len(pages)
+    for row in report["extractors"].values():
+        row.pop("outputs", None)
+    report["strategies"] = {s: sum(1 for v in strategies.values() if v == s) for s in sorted(set(strategies.values()))}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['pages']} pages, {report['page_kib']:.0f} KiB on average, strategies: {report['strategies']}")
+    print(f"{'extractor':<14} {'ms/page':>8} {'peak KiB':>9} {'same text':>10}")
+    for name, row in report["extractors"].items():
+        if "error" in row:
+            print(f"{name:<14} skipped: {row['error']}")
+            continue
+        same = row.get("same_text_as_beautifulsoup")
+        print(f"{name:<14} {row['ms_per_page']:>8.2f} {row['peak_kib']:>9.0f} {'' if same is None else f'{same:>9.0%}':>10}")
+
+if __name__ == "__main__":
+    main()
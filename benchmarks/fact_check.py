@@ -0,0 +1,100 @@
+"""Time fact-check lookups per article against a local stub of the claims search API.
+
+    python -m benchmarks.fact_check [--latency-ms 150] [--articles 50] [--json]
+    python -m benchmarks.fact_check --serve [--port 8099]
+
+With --serve the stub just runs; point the app at it with
+FACT_CHECK_API_URL=http://127.0.0.1:8099/claims:search.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from aiohttp import web
+
+from app.services.fact_check import FactCheckClient
+from app.services.features import extract_features
+from app.services.fetcher import fetcher
+from benchmarks.corpus import all_texts
+
+RATINGS = ("True", "Mostly true", "Half true", "False")
+
+def stub_app(latency: float, fail_rate: float, rng: random.Random) -> web.Application:
+    """Claims search stub: reviews for about half the queries, the rest unknown."""
+    async def search(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        if rng.random() < fail_rate:
+            return web.Response(status=503)
+        query = request.query.get("query", "")
+        if zlib.crc32(query.encode()) % 2:
+            return web.json_response({})
+        review = {
+            "publisher": {"name": "Stub Checks", "site": "stub.example"},
+            "url": "https://stub.example/review",
+            "title": f"Review of: {query[:60]}",
+            "textualRating": RATINGS[zlib.crc32(query.encode()) % len(RATINGS)],
+        }
+        return web.json_response({"claims": [{"text": query, "claimReview": [review]}]})
+    app = web.Application()
+    app.router.add_get("/claims:search", search)
+    return app
+
+async def start_stub(port: int, latency: float, fail_rate: float, seed: int) -> web.AppRunner:
+    runner = web.AppRunner(stub_app(latency, fail_rate, random.Random(seed)))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+async def run(args) -> dict:
+    runner = await start_stub(args.port, args.latency_ms / 1000, args.fail_rate, args.seed)
+    client = FactCheckClient(f"http://127.0.0.1:{args.port}/claims:search", api_key=None, enabled=True)
+    # Rate limiting is measured separately; here every lookup should reach the stub
+    client.bucket.rate, client.bucket.burst, client.bucket.tokens = 1e9, 10 ** 9, 1e9
+    articles = [extract_features(text).claim_sentences for text in all_texts()][:args.articles]
+    articles = [claims for claims in articles if claims]
+    try:
+        report = {"latency_ms": args.latency_ms, "articles": len(articles),
+                  "claims": sum(len(claims) for claims in articles)}
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            for claims in articles:
+                await client.check_claims(claims)
+            report[f"{label}_ms_per_article"] = (time.perf_counter() - start) / max(len(articles), 1) * 1000
+        report["stats"] = client.stats()
+        return report
+    finally:
+        await fetcher.close()
+        await runner.cleanup()
+
+async def serve(args):
+    await start_stub(args.port, args.latency_ms / 1000, args.fail_rate, args.seed)
+    print(f"Fact-check stub listening on http://127.0.0.1:{args.port}/claims:search")
+    await asyncio.Event().wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help="only run the stub server")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['articles']} articles, {report['claims']} claims, stub latency {args.latency_ms:.0f} ms")
+    print(f"cold: {report['cold_ms_per_article']:.1f} ms/article   warm: {report['warm_ms_per_article']:.2f} ms/article")
+    print(f"stats: {report['stats']}")
+
+if __name__ == "__main__":
+    main()
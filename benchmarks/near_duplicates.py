@@ -0,0 +1,100 @@
+"""Measure how well the near-duplicate index finds edited copies, and what it costs.
+
+    python -m benchmarks.near_duplicates [--entries 10000] [--threshold 0.85] [--json]
+
+The index is filled with synthetic articles, then queried with lightly
+edited copies of some of them (spacing and case changed, a tracking line
+appended, a sentence added, a few words replaced) and with articles it has
+never seen. Reported per edit: the share found (recall) and the mean
+estimated similarity; for unseen articles, the share wrongly matched; plus
+signature and lookup latency and memory per stored text.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.near_duplicates import NEAR_DUPLICATE_THRESHOLD, NearDuplicateIndex, signature
+from benchmarks.corpus import SAMPLE_TEXTS
+
+EDITS = {
+    "whitespace_and_case": lambda text, rng: "  ".join(text.upper().split(" ")),
+    "tracking_line": lambda text, rng: text + "\n\nShared via NewsApp - download now at https://example.com/?utm_source=share",
+    "added_sentence": lambda text, rng: text + " " + sentence(rng),
+    "three_words_replaced": lambda text, rng: replace_words(text, 3, rng),
+}
+
+WORDS = sorted({word for text in SAMPLE_TEXTS.values() for word in text.lower().split()})
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+def article(rng: random.Random) -> str:
+    """A few hundred words of random corpus vocabulary, so articles share words but rarely phrases."""
+    return " ".join(sentence(rng) for _ in range(rng.randint(12, 24)))
+
+def replace_words(text: str, count: int, rng: random.Random) -> str:
+    words = text.split()
+    for i in rng.sample(range(len(words)), count):
+        words[i] = rng.choice(("allegedly", "reportedly", "officially", "recently"))
+    return " ".join(words)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    texts = [article(rng) for _ in range(args.entries)]
+    start = time.perf_counter()
+    signatures = [signature(text) for text in texts]
+    signature_seconds = time.perf_counter() - start
+    # Signatures are copied, so the traced memory includes them
+    tracemalloc.start()
+    index = NearDuplicateIndex(None, threshold=args.threshold, max_entries=args.entries)
+    for i, sig in enumerate(signatures):
+        index.add(sig.copy(), {"sentiment": "POSITIVE", "confidence": 0.9, "id": i})
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    report = {"entries": args.entries, "threshold": args.threshold,
+              "signature_ms_per_text": round(signature_seconds / args.entries * 1000, 3),
+              "bytes_per_entry": round(memory / args.entries), "edits": {}}
+    chosen = rng.sample(range(args.entries), min(args.queries, args.entries))
+    lookup_seconds = []
+    for name, edit in EDITS.items():
+        found, scores = 0, []
+        for i in chosen:
+            start = time.perf_counter()
+            match = index.find(signature(edit(texts[i], rng)))
+            lookup_seconds.append(time.perf_counter() - start)
+            if match is not None and match[1]["id"] == i:
+                found += 1
+                scores.append(match[0])
+        report["edits"][name] = {"recall": round(found / len(chosen), 3),
+                                 "mean_similarity": round(float(np.mean(scores)), 3) if scores else None}
+    unseen = [article(rng) for _ in range(args.queries)]
+    false_matches = sum(index.find(signature(text)) is not None for text in unseen)
+    report["false_match_rate"] = round(false_matches / len(unseen), 4)
+    report["lookup_ms_p50"] = round(float(np.percentile(lookup_seconds, 50)) * 1000, 3)
+    report["lookup_ms_p95"] = round(float(np.percentile(lookup_seconds, 95)) * 1000, 3)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['entries']} texts at threshold {report['threshold']}: {report['signature_ms_per_text']} ms to sign each, "
+          f"~{report['bytes_per_entry']} bytes per entry")
+    for name, r in report["edits"].items():
+        similarity = "-" if r["mean_similarity"] is None else f"{r['mean_similarity']:.3f}"
+        print(f"  {name:<22} recall {r['recall']:>6.1%}  mean similarity {similarity}")
+    print(f"  {'unseen articles':<22} matched {report['false_match_rate']:>6.1%}")
+    print(f"lookup (signature + search) p50 {report['lookup_ms_p50']} ms, p95 {report['lookup_ms_p95']} ms")
+
+if __name__ == "__main__":
+    main()
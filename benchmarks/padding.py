@@ -0,0 +1,80 @@
+"""Compare padding waste and throughput of batched sentiment with and without length buckets.
+
+    python -m benchmarks.padding [--texts 256] [--long-share 0.1] [--buckets 32 64 128 256 512] [--json]
+
+Traffic is a mix of short texts and a share of long articles, shuffled as
+it would arrive. "in order" batches texts as they come (the old behavior),
+"sorted" sorts by length with a single 512 bucket.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services import sentiment, tokenization
+from app.services.tokenization import encoding_cache, padding_stats
+from benchmarks.corpus import SAMPLE_TEXTS, SHORT_TEXTS
+
+def traffic(count: int, long_share: float, rng: random.Random):
+    articles = list(SAMPLE_TEXTS.values())
+    texts = []
+    for _ in range(count):
+        if rng.random() < long_share:
+            texts.append(" ".join(rng.choice(articles) for _ in range(rng.randint(2, 6))))
+        else:
+            texts.append(rng.choice(SHORT_TEXTS + articles))
+    return texts
+
+def in_order_batches(sequences, max_batch_size: int):
+    """Batching before length buckets: consecutive chunks in arrival order."""
+    return [list(range(start, min(start + max_batch_size, len(sequences))))
+            for start in range(0, len(sequences), max_batch_size)]
+
+def run(texts, buckets, repeat: int, in_order: bool = False) -> dict:
+    tokenization.PADDING_BUCKETS = tuple(buckets)
+    sentiment.length_batches = in_order_batches if in_order else tokenization.length_batches
+    padding_stats.reset()
+    # Tokenize outside the timed loop so only the forward passes are compared
+    sentiment.analyze_sentiment_batch(texts)
+    padding_stats.reset()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        sentiment.analyze_sentiment_batch(texts)
+    elapsed = time.perf_counter() - start
+    stats = padding_stats.stats()
+    return {
+        "buckets": list(buckets),
+        "texts_per_second": round(len(texts) * repeat / elapsed, 1),
+        "waste": stats["waste"],
+        "batches": sum(counts["batches"] for counts in stats["buckets"].values()) // repeat,
+        "per_bucket": stats["buckets"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--long-share", type=float, default=0.1)
+    parser.add_argument("--buckets", type=int, nargs="+", default=list(tokenization.PADDING_BUCKETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    texts = traffic(args.texts, args.long_share, random.Random(args.seed))
+    encoding_cache.max_tokens = 10 ** 9
+    reports = {
+        "in order": run(texts, [tokenization.MAX_LENGTH], args.repeat, in_order=True),
+        "sorted": run(texts, [tokenization.MAX_LENGTH], args.repeat),
+        "bucketed": run(texts, sorted(args.buckets), args.repeat),
+    }
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'':>11} {'texts/s':>9} {'waste':>7} {'batches':>8}")
+    for name, r in reports.items():
+        print(f"{name:>11} {r['texts_per_second']:>9.1f} {r['waste']:>7.1%} {r['batches']:>8}")
+    for bucket, counts in reports["bucketed"]["per_bucket"].items():
+        print(f"  bucket {bucket:>4}: {counts['sequences']:>6} sequences, {counts['waste']:.1%} padding")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Offline benchmark suite for the analysis pipeline: per-stage, end-to-end and in-process load.
+
+    python -m benchmarks.pipeline [micro e2e load] [--repeat 5] [--concurrency 8] [--requests 400]
+                                  [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+
+Everything runs on the fixed corpus in benchmarks/corpus.py (the sample
+texts of test_content.py plus short texts and synthetic pages), with the
+fact-check API off and the tokenization and LIME prediction caches emptied,
+so two runs on the same machine measure the code rather than the network or
+warm caches. Latencies are in milliseconds. Save a run with --output and
+pass it as --compare on the next commit: the p95 of every benchmark, and
+the load test throughput, are checked against it and the exit status is 1
+when any got worse by more than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.corpus import SAMPLE_TEXTS, all_texts, html_pages
+
+LEVELS = ("micro", "e2e", "load")
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+def summarize(latencies, elapsed: float = None) -> dict:
+    """Percentiles of per-call latencies in seconds, reported in ms."""
+    ms = np.asarray(latencies) * 1000
+    report = {
+        "calls": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+    if elapsed is not None:
+        report["per_second"] = round(len(ms) / elapsed, 1)
+    return report
+
+def timed(fn, inputs, repeat: int) -> dict:
+    # Untimed first call, so one-off setup (allocator, thread pools) isn't a sample
+    fn(inputs[0])
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            call_start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+def cold_caches():
+    """Empty the caches that would make repeated corpus texts free."""
+    from app.services import explainability
+    from app.services.tokenization import encoding_cache
+    encoding_cache.max_tokens = 0
+    encoding_cache._entries.clear()
+    encoding_cache.tokens = 0
+    explainability._prediction_cache.max_entries = 0
+    explainability._prediction_cache._entries.clear()
+
+def micro(args) -> dict:
+    import torch
+    from app.routes.analyze import detect_scientific_content, detect_sensational_language, extract_claims
+    from app.services.explainability import explain_lime
+    from app.services.extractor import extract_main_content
+    from app.services.features import extract_features
+    from app.services.model import get_model_and_tokenizer
+    from app.services.tokenization import encode, encode_windows
+
+    model, tokenizer = get_model_and_tokenizer()
+    texts = all_texts()
+
+    def heuristics(text):
+        features = extract_features(text)
+        detect_scientific_content(text, features)
+        detect_sensational_language(text, features)
+        extract_claims(text, features)
+
+    inputs = [encode(tokenizer, [text], cache=False) for text in texts]
+
+    def forward(encoded):
+        with torch.no_grad():
+            model(**encoded)
+
+    pages = list(html_pages().values())
+    lime_texts = list(SAMPLE_TEXTS.values())[:args.lime_texts]
+    return {
+        "heuristics": timed(heuristics, texts, args.repeat),
+        "tokenization": timed(lambda text: encode_windows(tokenizer, [text], cache=False), texts, args.repeat),
+        "forward": timed(forward, inputs, args.repeat),
+        "lime": timed(lambda text: explain_lime(text, max_samples=args.lime_samples, time_budget_ms=10 ** 6),
+                      lime_texts, 1),
+        "extraction": timed(extract_main_content, pages, args.repeat),
+    }
+
+def e2e(args) -> dict:
+    from app.routes.analyze import analyze_text
+    texts = all_texts()
+    return {
+        "analyze_text": timed(analyze_text, texts, args.repeat),
+        "analyze_text_long": timed(analyze_text, list(SAMPLE_TEXTS.values()), args.repeat),
+    }
+
+async def _load(args) -> dict:
+    import httpx
+    from app.main import app
+
+    texts = all_texts()
+    latencies, statuses = [], {}
+    issued = iter(range(args.requests))
+
+    async def worker(client):
+        for i in issued:
+            # A unique suffix keeps the result cache from answering
+            text = f"{texts[i % len(texts)]} (request {i})"
+            start = time.perf_counter()
+            response = await client.post("/analyze/sentiment/text", json={"text": text})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+    report = summarize(latencies, elapsed)
+    report.update(concurrency=args.concurrency, statuses={str(code): count for code, count in sorted(statuses.items())})
+    return {"sentiment_text": report}
+
+def load(args) -> dict:
+    return asyncio.run(_load(args))
+
+def environment() -> dict:
+    import torch
+    from app.services.model import MODEL_NAME
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "model": MODEL_NAME,
+        "cpus": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Benchmarks whose p95 (or load throughput) got worse than the baseline by more than ``tolerance``."""
+    regressions = []
+    for level in LEVELS:
+        for name, current in report.get(level, {}).items():
+            previous = baseline.get(level, {}).get(name)
+            if previous is None:
+                continue
+            change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+            print(f"{level:>6} {name:<18} p95 {previous['p95_ms']:>9.2f} -> {current['p95_ms']:>9.2f} ms ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"{level}.{name} p95")
+            if level == "load" and previous.get("per_second"):
+                change = previous["per_second"] / current["per_second"] - 1
+                print(f"{'':>6} {'':<18} rps {previous['per_second']:>9.1f} -> {current['per_second']:>9.1f}")
+                if change > tolerance:
+                    regressions.append(f"{level}.{name} throughput")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("levels", nargs="*", metavar="level", help=f"any of {', '.join(LEVELS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus for micro and e2e")
+    parser.add_argument("--lime-samples", type=int, default=500)
+    parser.add_argument("--lime-texts", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--compare", help="JSON report of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    unknown = set(args.levels) - set(LEVELS)
+    if unknown:
+        parser.error(f"unknown level {', '.join(sorted(unknown))}, expected {', '.join(LEVELS)}")
+
+    from app.services import registry
+    from app.services.fact_check import fact_checker
+    fact_checker.enabled = False
+    registry.warmup()
+    cold_caches()
+
+    report = {"environment": environment()}
+    for level in LEVELS:
+        if level in (args.levels or LEVELS):
+            report[level] = globals()[level](args)
+            report.setdefault("peak_rss_mib", {})[level] = peak_rss_mib()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for level in LEVELS:
+            for name, r in report.get(level, {}).items():
+                rate = f"{r['per_second']:>9.1f}/s" if "per_second" in r else ""
+                print(f"{level:>6} {name:<18} p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+                      f"p99 {r['p99_ms']:>9.2f} ms {rate}")
+        print(f"peak RSS {report['peak_rss_mib']} MiB")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
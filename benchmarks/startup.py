@@ -0,0 +1,111 @@
+"""Measure how long a fresh server takes to become ready, and fail when it got slower.
+
+    python -m benchmarks.startup [--runs 3] [--gunicorn] [--output startup.json]
+                                 [--baseline startup.json] [--tolerance 0.2] [--max-seconds 30] [--json]
+
+Each run starts the app in a new process, polls /health/ready until it
+answers 200 and reads the startup timeline from /health/startup. The
+median time to ready is checked against --max-seconds and against a
+report saved earlier with --output; the exit status is 1 on a regression.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, None
+
+def run(gunicorn: bool, timeout: float) -> dict:
+    port = free_port()
+    if gunicorn:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                   "--workers", "1", "app.main:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, MODEL_WARMUP="1"))
+    try:
+        listening = None
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode} before it was ready")
+            status, _ = get(f"http://127.0.0.1:{port}/health/ready")
+            if status is not None and listening is None:
+                listening = time.perf_counter() - start
+            if status == 200:
+                ready = time.perf_counter() - start
+                _, startup = get(f"http://127.0.0.1:{port}/health/startup")
+                return {"listening_seconds": round(listening, 3), "ready_seconds": round(ready, 3),
+                        "timeline": startup}
+            time.sleep(0.05)
+        raise RuntimeError(f"Server not ready after {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--gunicorn", action="store_true", help="start through gunicorn.conf.py (preloading master)")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--max-seconds", type=float, help="fail when the median time to ready is above this")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    runs = [run(args.gunicorn, args.timeout) for _ in range(args.runs)]
+    report = {
+        "server": "gunicorn" if args.gunicorn else "uvicorn",
+        "median_listening_seconds": round(statistics.median(r["listening_seconds"] for r in runs), 3),
+        "median_ready_seconds": round(statistics.median(r["ready_seconds"] for r in runs), 3),
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['server']}: listening after {report['median_listening_seconds']:.2f}s, "
+              f"ready after {report['median_ready_seconds']:.2f}s (median of {len(runs)})")
+        for phase in (runs[-1]["timeline"] or {}).get("phases", []):
+            print(f"  {phase['phase']:<24} {phase['seconds']:>8.3f}s  (at {phase['at']:.3f}s)")
+
+    failures = []
+    if args.max_seconds is not None and report["median_ready_seconds"] > args.max_seconds:
+        failures.append(f"ready after {report['median_ready_seconds']:.2f}s, limit {args.max_seconds:.2f}s")
+    if args.baseline:
+        with open(args.baseline) as f:
+            previous = json.load(f)["median_ready_seconds"]
+        if report["median_ready_seconds"] > previous * (1 + args.tolerance):
+            failures.append(f"ready after {report['median_ready_seconds']:.2f}s, baseline {previous:.2f}s")
+    if failures:
+        print("Startup regressed: " + "; ".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Profile tokenization per analysis request with and without the encoding cache.
+
+    python -m benchmarks.tokenization [--repeat 3] [--json]
+
+A request tokenizes its text for sentiment (windows), for the gradient
+explanation and for the detailed analysis; each scenario is timed and its
+allocations counted with tracemalloc.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from transformers import AutoTokenizer
+
+from app.services.model import MODEL_NAME
+from app.services.tokenization import encode, encode_windows, encoding_cache
+from benchmarks.corpus import SAMPLE_TEXTS
+
+def request(tokenizer, text: str):
+    encode_windows(tokenizer, [text])  # sentiment
+    encode(tokenizer, [text])  # gradient explanation
+    encode(tokenizer, [text])  # detailed analysis
+
+def profile(tokenizer, texts, repeat: int, cached: bool) -> dict:
+    encoding_cache.max_tokens = 10 ** 9 if cached else 0
+    encoding_cache._entries.clear()
+    encoding_cache.tokens = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            request(tokenizer, text)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+    requests = repeat * len(texts)
+    return {
+        "cached": cached,
+        "ms_per_request": round(elapsed / requests * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(allocated / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="times each text is analyzed")
+    parser.add_argument("--scale", type=int, default=8, help="long texts are the samples repeated this often")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    texts = list(SAMPLE_TEXTS.values())
+    texts += [" ".join([text] * args.scale) for text in texts]
+    request(tokenizer, "Warm up the tokenizer.")
+    reports = [profile(tokenizer, texts, args.repeat, cached) for cached in (False, True)]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'cache':>6} {'ms/request':>11} {'peak KiB':>9} {'retained KiB':>13}")
+    for r in reports:
+        print(f"{'on' if r['cached'] else 'off':>6} {r['ms_per_request']:>11.3f} {r['peak_kib']:>9.1f} {r['retained_kib']:>13.1f}")
+
+if __name__ == "__main__":
+    main()
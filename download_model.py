@@ -1,7 +1,8 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from app.services import registry
+from app.services.model import MODEL_NAME
 
 print("Downloading model and tokenizer...")
-model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSequenceClassification.from_pretrained(model_name)
-print("Model and tokenizer downloaded successfully!") 
\ No newline at end of file
+print(f"Model: {MODEL_NAME}")
+# Only the transformer weights need fetching at build time
+registry.get("sentiment")
+print("Model and tokenizer downloaded successfully!") 
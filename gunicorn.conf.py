@@ -0,0 +1,48 @@
+# gunicorn -c gunicorn.conf.py app.main:app
+import gc
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app, and with it the model registry, once in the master process
+preload_app = True
+
+# Workers publish their metrics here so a scrape of any one reports all of them.
+# Set before the app is imported, which reads it at import time.
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"credibility-metrics-{os.getpid()}"))
+
+def on_starting(server):
+    # Counts left by an earlier master that used the same directory are not ours
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["METRICS_DIR"], exist_ok=True)
+
+def when_ready(server):
+    # Load weights in the master before any worker is forked. Workers then share
+    # the weight pages copy-on-write instead of each holding a private copy.
+    # Only load here: running inference would start torch's thread pool, which
+    # does not survive fork. Each worker warms up in its own startup hook.
+    from app.services import registry, startup
+    startup.preload_imports()
+    registry.load_all()
+    # Move everything allocated so far out of the GC's reach so collections in
+    # the workers don't touch (and thereby copy) the shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Each worker gets its own share of the cores for intra-op parallelism
+    torch_threads = os.getenv("TORCH_NUM_THREADS")
+    if torch_threads:
+        import torch
+        torch.set_num_threads(int(torch_threads))
+
+def child_exit(server, worker):
+    # The worker's counts stay in the totals; its gauges no longer describe anything
+    from app.services import metrics
+    metrics.retire(os.environ["METRICS_DIR"], worker.pid)
+
+def on_exit(server):
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
@@ -0,0 +1,20 @@
+import pytest
+from fastapi import HTTPException
+
+from app.routes import admin
+
+
+def test_admin_calls_are_refused_without_a_configured_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    for token in (None, "", "anything"):
+        with pytest.raises(HTTPException) as refused:
+            admin.require_admin(token)
+        assert refused.value.status_code == 403
+
+
+def test_admin_calls_need_the_configured_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "s3cr3t")
+    with pytest.raises(HTTPException) as refused:
+        admin.require_admin("wrong")
+    assert refused.value.status_code == 401
+    admin.require_admin("s3cr3t")
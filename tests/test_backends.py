@@ -0,0 +1,43 @@
+import os
+
+import pytest
+import torch
+from transformers import BertTokenizerFast, DistilBertConfig, DistilBertForSequenceClassification
+
+from app.services import backends
+
+WORDS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "exporting", "the", "sentiment", "model", "."]
+
+
+@pytest.fixture
+def tiny(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(backends, "ONNX_CACHE_DIR", str(tmp_path / "onnx"))
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(WORDS) + "\n")
+    torch.manual_seed(0)
+    config = DistilBertConfig(vocab_size=len(WORDS), dim=16, hidden_dim=32, n_layers=1, n_heads=2,
+                              max_position_embeddings=64)
+    return DistilBertForSequenceClassification(config).eval(), BertTokenizerFast(vocab_file=str(vocab))
+
+
+def test_truncated_graph_is_exported_again(tiny):
+    model, tokenizer = tiny
+    backend = backends.build_backend("onnx", model, tokenizer, "tiny/model")
+    path = backend.path
+    assert os.path.dirname(path).endswith(backends.weights_revision(model, "tiny/model"))
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    backend = backends.build_backend("onnx", model, tokenizer, "tiny/model")
+    inputs = tokenizer(["exporting the model ."], return_tensors="pt", return_token_type_ids=False)
+    expected = model(**inputs).logits.detach()
+    assert torch.allclose(backend(**inputs).logits, expected, atol=1e-4)
+
+
+def test_changed_weights_get_their_own_graph(tiny):
+    model, tokenizer = tiny
+    before = backends.weights_revision(model, "tiny/model")
+    with torch.no_grad():
+        model.classifier.bias += 1
+    assert backends.weights_revision(model, "tiny/model") != before
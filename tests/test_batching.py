@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+from app.services.batching import MicroBatcher
+from app.services.config import BATCH_MAX_SIZE
+from app.services.executor import INFERENCE_POOL_SIZE, BoundedExecutor
+
+
+def test_default_pool_lets_full_micro_batches_form():
+    sizes = []
+
+    def forward(texts):
+        sizes.append(len(texts))
+        time.sleep(0.05)
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher(forward, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=20, name="test-batcher")
+    pool = BoundedExecutor(INFERENCE_POOL_SIZE, 64, "test-inference")
+
+    async def requests():
+        # Like analyze_text: each request holds a pool thread while its text waits in the batcher
+        return await asyncio.gather(*(pool.run(batcher, "x" * i) for i in range(BATCH_MAX_SIZE * 2)))
+
+    assert asyncio.run(requests()) == list(range(BATCH_MAX_SIZE * 2))
+    assert INFERENCE_POOL_SIZE >= BATCH_MAX_SIZE
+    assert max(sizes) > 4
+    assert max(sizes) == BATCH_MAX_SIZE
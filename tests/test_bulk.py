@@ -0,0 +1,56 @@
+import json
+
+from app.bulk import Checkpoint, open_output, read_records
+
+
+def write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": i, "text": f"Story number {i} with ünïcode"}) + "\n")
+            if i == 3:
+                f.write("\n{not json\n")
+
+
+def test_jsonl_resumes_from_a_recorded_offset(tmp_path):
+    path = tmp_path / "in.jsonl"
+    write_jsonl(path, 10)
+    full = list(read_records(str(path), "jsonl"))
+    assert len(full) == 11
+    assert full[4][0]["_error"].startswith("invalid JSON")
+    offset = full[5][1]
+    assert list(read_records(str(path), "jsonl", offset)) == full[6:]
+
+
+def test_csv_resumes_after_records_spanning_lines(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_bytes(b'id,text\r\n1,"first\r\nstill first"\r\n2,second\r\n\r\n3,"third, ""quoted"""\r\n')
+    full = list(read_records(str(path), "csv"))
+    assert [record["text"] for record, _ in full] == ["first\r\nstill first", "second", 'third, "quoted"']
+    assert list(read_records(str(path), "csv", full[0][1])) == full[1:]
+    assert list(read_records(str(path), "csv", full[-1][1])) == []
+
+
+def resume(tmp_path, output_text):
+    output = tmp_path / "out.jsonl"
+    checkpoint = Checkpoint(str(output), str(tmp_path / "in.jsonl"))
+    checkpoint.records, checkpoint.errors, checkpoint.offset, checkpoint.input_offset = 2, 1, 10, 123
+    checkpoint.save()
+    if output_text is not None:
+        output.write_text(output_text)
+    checkpoint = Checkpoint(str(output), str(tmp_path / "in.jsonl"))
+    with open_output(str(output), checkpoint):
+        pass
+    return checkpoint, output.read_text()
+
+
+def test_resume_truncates_lines_written_after_the_checkpoint(tmp_path):
+    checkpoint, text = resume(tmp_path, "0123456789partial")
+    assert text == "0123456789"
+    assert (checkpoint.records, checkpoint.errors, checkpoint.input_offset) == (2, 1, 123)
+
+
+def test_missing_or_short_output_starts_over(tmp_path):
+    for output_text in (None, "01234"):
+        checkpoint, text = resume(tmp_path, output_text)
+        assert text == ""
+        assert (checkpoint.records, checkpoint.offset, checkpoint.input_offset) == (0, 0, 0)
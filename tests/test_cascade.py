@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.services.cascade import CascadeScorer
+from app.services.features import extract_features
+
+TEXTS = ["What a wonderful, uplifting story about the community garden.",
+         "This is a terrible disaster and everyone involved should be ashamed.",
+         "Great news: the new hospital wing opened early and under budget.",
+         "Awful service, broken promises and a shocking waste of money."] * 5
+LABELS = [1, 0, 1, 0] * 5
+
+
+def fit(path) -> CascadeScorer:
+    scorer = CascadeScorer(path, min_trained=1)
+    features = [extract_features(text) for text in TEXTS]
+    scorer.learn(TEXTS, features, np.full(len(TEXTS), 0.5), LABELS, "escalated")
+    return scorer
+
+
+def test_saves_and_loads_without_pickle(tmp_path):
+    path = str(tmp_path / "cascade.npz")
+    scorer = fit(path)
+    scorer.save()
+    loaded = CascadeScorer(path, min_trained=1).load()
+    features = [extract_features(text) for text in TEXTS]
+    assert loaded.trained == scorer.trained
+    assert np.allclose(loaded.predict(TEXTS, features), scorer.predict(TEXTS, features))
+    # Learning carries on from the loaded weights
+    loaded.learn(TEXTS[:4], features[:4], loaded.predict(TEXTS[:4], features[:4]), LABELS[:4], "audited")
+    assert loaded.trained == scorer.trained + 4
+
+
+def test_unreadable_or_missing_model_is_ignored(tmp_path):
+    assert CascadeScorer(None).load().model is None
+    path = tmp_path / "cascade.npz"
+    path.write_bytes(b"not a model")
+    assert CascadeScorer(str(path)).load().model is None
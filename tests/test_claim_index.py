@@ -0,0 +1,109 @@
+import json
+import threading
+
+import pytest
+
+from app.services.claim_index import ClaimIndex
+
+CLAIMS = [
+    ("Global temperatures have risen about 1.1 degrees Celsius since pre-industrial times.", "TRUE"),
+    ("Vaccines cause autism in children.", "FALSE"),
+    ("The Great Wall of China is visible from space with the naked eye.", "FALSE"),
+    ("Drinking eight glasses of water a day is required for good health.", "MISLEADING"),
+]
+
+
+def make_index(tmp_path, **kwargs) -> ClaimIndex:
+    corpus = tmp_path / "fact_checks.jsonl"
+    corpus.write_text("".join(json.dumps({"claim": claim, "rating": rating}) + "\n" for claim, rating in CLAIMS))
+    return ClaimIndex(str(tmp_path / "index"), str(corpus), **kwargs)
+
+
+def test_finds_known_and_added_claims(tmp_path):
+    index = make_index(tmp_path, reload_seconds=0)
+    assert index.best_match("vaccines cause autism").rating == "FALSE"
+    assert index.best_match("Bananas grow on the moon.") is None
+    index.add([{"claim": "Bananas grow on the moon.", "rating": "FALSE"}])
+    assert index.best_match("Bananas grow on the moon.").claim == "Bananas grow on the moon."
+    assert index.stats()["addedClaims"] == 1
+
+
+def test_rebuild_merges_added_claims_into_a_new_generation(tmp_path):
+    index = make_index(tmp_path, reload_seconds=0)
+    index.add([{"claim": "Bananas grow on the moon.", "rating": "FALSE"}])
+    before = index.stats()["generation"]
+    index.rebuild()
+    stats = index.stats()
+    assert stats["generation"] != before
+    assert stats["claims"] == len(CLAIMS) + 1
+    assert stats["addedClaims"] == 0
+
+
+def test_searches_during_generation_swaps_stay_consistent(tmp_path):
+    index = make_index(tmp_path, reload_seconds=0, delta_limit=3)
+    index.search("warm up")
+    errors = []
+    done = threading.Event()
+
+    def search():
+        while not done.is_set():
+            try:
+                for claim, _ in CLAIMS:
+                    assert index.best_match(claim) is not None
+                index.search("moon bananas claim number")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        # Every third claim crosses delta_limit and swaps in a new generation
+        for i in range(30):
+            index.add([{"claim": f"Bananas grow on the moon, claim number {i}.", "rating": "FALSE"}])
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    assert index.stats()["claims"] + index.stats()["addedClaims"] == len(CLAIMS) + 30
+
+
+def test_without_a_directory_the_index_is_built_in_memory(tmp_path):
+    corpus = tmp_path / "fact_checks.jsonl"
+    corpus.write_text("".join(json.dumps({"claim": claim, "rating": rating}) + "\n" for claim, rating in CLAIMS))
+    index = ClaimIndex(None, str(corpus))
+    assert index.best_match("vaccines cause autism").rating == "FALSE"
+    assert index.stats() == {"generation": "memory", "claims": len(CLAIMS), "addedClaims": 0, "embeddingModel": None}
+    with pytest.raises(RuntimeError):
+        index.add([{"claim": "Bananas grow on the moon.", "rating": "FALSE"}])
+    assert list(tmp_path.iterdir()) == [corpus]
+
+
+def test_unusable_directory_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    index = make_index(tmp_path, reload_seconds=0)
+    index.directory = str(blocker / "index")
+    assert index.best_match("vaccines cause autism").rating == "FALSE"
+    assert index.directory is None
+
+
+def test_unreadable_corpus_gives_an_empty_index(tmp_path):
+    corpus = tmp_path / "fact_checks.jsonl"
+    corpus.write_text('{"claim": "no rating"}\n')
+    index = ClaimIndex(None, str(corpus))
+    assert index.search("no rating") == []
+    assert index.stats()["claims"] == 0
+
+
+def test_claim_lookup_falls_back_to_all_sentences_when_the_index_fails(monkeypatch):
+    from app.routes import analyze
+
+    def broken(sentence):
+        raise OSError("index files gone")
+
+    monkeypatch.setattr(analyze.claim_index, "best_match", broken)
+    text = "Scientists say the new vaccine is 100% safe. Officials confirmed that crime fell by 20% last year."
+    assert analyze.unknown_claim_sentences(text) == analyze.extract_features(text).claim_sentences
@@ -0,0 +1,39 @@
+import random
+import string
+
+from app.services.crawl_cache import CrawlCache
+
+
+def page(i: int) -> str:
+    # Random letters barely compress, so each page adds about 1.5 KB
+    return "".join(random.Random(i).choices(string.ascii_letters, k=2000))
+
+
+def test_evicts_least_recently_used_pages_past_the_size_bound(tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"), max_bytes=20_000)
+    for i in range(40):
+        cache.put(f"https://example.com/{i}", page(i), "text")
+        if i == 5:
+            cache.get("https://example.com/0")
+    stats = cache.stats()
+    assert stats["bytes"] <= 20_000
+    assert cache.get("https://example.com/39") is not None
+    assert cache.get("https://example.com/1") is None
+
+
+def test_running_size_matches_the_table_after_replace_and_purge(tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"), max_bytes=10 ** 9)
+    for i in range(10):
+        cache.put(f"https://example.com/{i % 4}", page(i), "text" * i)
+    assert cache._bytes == cache.stats()["bytes"]
+    cache.purge(url="https://example.com/2")
+    assert cache._bytes == cache.stats()["bytes"]
+    cache.purge()
+    assert cache._bytes == 0
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"), max_bytes=10 ** 9, enabled=False)
+    cache.put("https://example.com/", page(0), "text")
+    assert cache.get("https://example.com/") is None
+    assert not (tmp_path / "crawl.sqlite3").exists()
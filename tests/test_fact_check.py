@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+
+import aiohttp
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from app.services import fact_check
+from app.services.fact_check import CircuitBreaker, FactCheckClient, TokenBucket, TTLCache
+
+
+class Clock:
+    """Stands in for the time module inside fact_check only, so the event loop keeps real time."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fact_check, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(max_failures=3, reset_seconds=30)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_success()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_trial_through_and_its_outcome_decides(clock):
+    breaker = CircuitBreaker(max_failures=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_abandoned_trial_is_released(clock):
+    breaker = CircuitBreaker(max_failures=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    trial_id = breaker.trial_id
+    breaker.end_trial(trial_id)
+    assert breaker.allow()
+    # A trial ending late doesn't release the one that replaced it
+    breaker.end_trial(trial_id)
+    assert not breaker.allow()
+
+
+def test_trial_that_never_reports_times_out(clock):
+    breaker = CircuitBreaker(max_failures=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+class HangingSession:
+    @contextlib.asynccontextmanager
+    async def get(self, *args, **kwargs):
+        await asyncio.sleep(3600)
+        yield
+
+
+class FailingSession:
+    @contextlib.asynccontextmanager
+    async def get(self, *args, **kwargs):
+        raise aiohttp.ClientConnectionError("refused")
+        yield
+
+
+def client(monkeypatch, session) -> FactCheckClient:
+    monkeypatch.setattr(fact_check.fetcher, "session", lambda: session)
+    checker = FactCheckClient(api_url="http://fact-check.invalid/claims:search", api_key=None, enabled=True)
+    checker.breaker = CircuitBreaker(max_failures=1, reset_seconds=30)
+    return checker
+
+
+def test_cancelled_trial_lookup_does_not_wedge_the_breaker(clock, monkeypatch):
+    checker = client(monkeypatch, FailingSession())
+    asyncio.run(checker.check_claims(["The moon is made of cheese."]))
+    assert checker.breaker.state == "open"
+    clock.now += 30
+
+    monkeypatch.setattr(fact_check.fetcher, "session", lambda: HangingSession())
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(checker.check_claims(["The moon is made of cheese."]))
+        await asyncio.sleep(0.01)
+        assert checker.breaker.trial_started is not None
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert checker.breaker.trial_started is None
+    assert checker.breaker.allow()
+
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_ttl_cache_expires_and_evicts(clock):
+    cache = TTLCache(max_entries=2)
+    cache.set("a", [1], ttl=10)
+    cache.set("b", [2], ttl=100)
+    clock.now += 10
+    assert cache.get("a") is None
+    cache.set("c", [3], ttl=100)
+    cache.set("d", [4], ttl=100)
+    assert cache.get("b") is None
+    assert cache.get("d") == [4]
+
+
+class RejectingSession:
+    @contextlib.asynccontextmanager
+    async def get(self, url, params=None, **kwargs):
+        request_url = URL(url).with_query(params)
+        info = aiohttp.RequestInfo(request_url, "GET", CIMultiDictProxy(CIMultiDict()), request_url)
+        raise aiohttp.ClientResponseError(info, (), status=403, message="Forbidden")
+        yield
+
+
+def test_failed_lookup_logs_no_api_key(monkeypatch, caplog):
+    monkeypatch.setattr(fact_check.fetcher, "session", lambda: RejectingSession())
+    checker = FactCheckClient(api_url="http://fact-check.invalid/claims:search", api_key="s3cr3t-key", enabled=True)
+    with caplog.at_level("INFO", logger=fact_check.__name__):
+        asyncio.run(checker.check_claims(["The moon is made of cheese."]))
+    assert checker.counts["errors"] == 1
+    assert "HTTP 403" in caplog.text
+    assert "s3cr3t-key" not in caplog.text
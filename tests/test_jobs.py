@@ -0,0 +1,55 @@
+import threading
+import time
+
+from app.services.jobs import CANCELLED, DONE, QUEUED, RUNNING, JobQueue
+
+
+def wait_for(jobs, job_id, status):
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        job = jobs.get(job_id)
+        if job is not None and job.status == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never became {status}")
+
+
+def test_finished_jobs_expire_without_new_submissions(tmp_path):
+    jobs = JobQueue(workers=1, max_queue=4, ttl=0, name="test", path=str(tmp_path / "jobs.sqlite3"))
+    job = jobs.submit(lambda job: 42)
+    deadline = time.time() + 5
+    while jobs.get(job.id) is not None and time.time() < deadline:
+        time.sleep(0.01)
+    # Polling alone forgets a job once its ttl has passed
+    assert jobs.get(job.id) is None
+    assert jobs.cancel(job.id) is None
+
+
+def test_jobs_are_visible_and_cancellable_from_another_queue(tmp_path):
+    # Two queues on one file stand in for two gunicorn workers
+    path = str(tmp_path / "jobs.sqlite3")
+    submitter = JobQueue(workers=1, max_queue=4, ttl=60, name="test", path=path)
+    other = JobQueue(workers=1, max_queue=4, ttl=60, name="test", path=path)
+
+    finished = submitter.submit(lambda job: {"answer": 42})
+    assert wait_for(other, finished.id, DONE).result == {"answer": 42}
+
+    started = threading.Event()
+
+    def until_cancelled(job):
+        started.set()
+        while not job.cancel_requested.is_set():
+            time.sleep(0.01)
+
+    running = submitter.submit(until_cancelled)
+    waiting = submitter.submit(lambda job: 1)
+    assert started.wait(5)
+    assert other.get(running.id).status == RUNNING
+    assert other.get(waiting.id).status == QUEUED
+    assert submitter.queue_depth() == 1
+
+    # A cancelled job that is still queued no longer counts toward the limit
+    assert other.cancel(waiting.id).status == CANCELLED
+    assert submitter.queue_depth() == 0
+    other.cancel(running.id)
+    assert wait_for(submitter, running.id, CANCELLED).status == CANCELLED
@@ -0,0 +1,33 @@
+import json
+import os
+
+from app.services import metrics
+
+REQUESTS = metrics.Counter("test_requests_total", "Requests", ["route"])
+DEPTH = metrics.Gauge("test_queue_depth", "Queue depth", function=lambda: 3)
+
+
+def write_worker(directory, pid, requests):
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump({"test_requests_total": [["", ["/a"], "", requests]], "test_queue_depth": [["", [], "", 7]]}, f)
+
+
+def sample_lines(text, name):
+    return sorted(line for line in text.splitlines() if line.startswith(name))
+
+
+def test_all_workers_are_reported_and_counters_stay_monotonic(tmp_path):
+    directory = str(tmp_path)
+    REQUESTS.inc(route="/a")
+    write_worker(directory, 1, 5)
+    text = metrics.render_all_workers(directory)
+    # Counters are summed, gauges are per worker
+    assert sample_lines(text, "test_requests_total") == ['test_requests_total{route="/a"} 6']
+    assert sample_lines(text, "test_queue_depth") == sorted([
+        f'test_queue_depth{{worker="{os.getpid()}"}} 3', 'test_queue_depth{worker="1"} 7'])
+
+    # A worker that exits keeps counting towards the totals but its gauges go away
+    metrics.retire(directory, 1)
+    text = metrics.render_all_workers(directory)
+    assert sample_lines(text, "test_requests_total") == ['test_requests_total{route="/a"} 6']
+    assert sample_lines(text, "test_queue_depth") == [f'test_queue_depth{{worker="{os.getpid()}"}} 3']
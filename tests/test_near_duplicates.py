@@ -0,0 +1,101 @@
+import random
+
+import numpy as np
+
+from app.services import near_duplicates
+from app.services.near_duplicates import NearDuplicateIndex, reuse_near_duplicates, signature
+
+WORDS = ("market council storm vaccine energy report school river budget court election harbor "
+         "festival museum railway factory hospital village climate senate").split()
+
+
+def article(seed: int, words: int = 300) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 99)) for _ in range(words))
+
+
+def result(i: int) -> dict:
+    return {"sentiment": "POSITIVE", "confidence": 0.9, "id": i}
+
+
+def test_edited_copies_match_and_unrelated_texts_dont():
+    index = NearDuplicateIndex(None, threshold=0.85)
+    texts = [article(i) for i in range(20)]
+    for i, text in enumerate(texts):
+        index.add(signature(text), result(i))
+    similarity, found = index.find(signature("  " + texts[3].upper() + "\n\nShared via NewsApp"))
+    assert found["id"] == 3 and similarity >= 0.85
+    assert index.find(signature(article(1000))) is None
+    # Rewriting a third of the words puts it well below the threshold
+    words = texts[5].split()
+    rewritten = " ".join("changed" if i % 3 == 0 else word for i, word in enumerate(words))
+    assert index.find(signature(rewritten)) is None
+
+
+def test_threshold_decides_borderline_matches():
+    text = article(7)
+    words = text.split()
+    # Replacing every fiftieth word leaves about 0.8 of the shingles shared, where LSH
+    # nearly always finds the pair and the threshold alone decides
+    edited = " ".join("changed" if i % 50 == 0 else word for i, word in enumerate(words))
+    similarity = float(np.mean(signature(text) == signature(edited)))
+    assert 0.7 < similarity < 0.95
+    loose = NearDuplicateIndex(None, threshold=similarity - 0.05)
+    strict = NearDuplicateIndex(None, threshold=similarity + 0.05)
+    for index in (loose, strict):
+        index.add(signature(text), result(0))
+    assert loose.find(signature(edited)) is not None
+    assert strict.find(signature(edited)) is None
+
+
+def test_a_negation_in_a_long_text_stays_above_the_default_threshold():
+    # Why reuse is off by default: the words barely change, the meaning does
+    text = article(3) + " the new bridge is safe for traffic " + article(4)
+    negated = text.replace("is safe", "is not safe")
+    assert float(np.mean(signature(text) == signature(negated))) >= 0.85
+
+
+def test_least_recently_matched_entries_are_evicted():
+    index = NearDuplicateIndex(None, max_entries=3)
+    texts = [article(i) for i in range(4)]
+    for i, text in enumerate(texts[:3]):
+        index.add(signature(text), result(i))
+    assert index.find(signature(texts[0])) is not None
+    index.add(signature(texts[3]), result(3))
+    assert len(index) == 3 and index.evictions == 1
+    assert index.find(signature(texts[1])) is None
+    assert index.find(signature(texts[0])) is not None
+
+
+def test_saves_and_loads_without_pickle(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = NearDuplicateIndex(path, max_entries=2)
+    texts = [article(i) for i in range(3)]
+    for i, text in enumerate(texts):
+        index.add(signature(text), result(i))
+    index.save()
+    loaded = NearDuplicateIndex(path).load()
+    assert len(loaded) == 2
+    assert loaded.find(signature(texts[0])) is None
+    assert loaded.find(signature(texts[2]))[1] == result(2)
+    # A file that isn't a saved index is ignored
+    (tmp_path / "broken.npz").write_bytes(b"not an index")
+    assert len(NearDuplicateIndex(str(tmp_path / "broken.npz")).load()) == 0
+
+
+def test_reused_results_look_like_scored_ones(monkeypatch):
+    index = NearDuplicateIndex(None)
+    monkeypatch.setattr(near_duplicates, "NEAR_DUPLICATE_ENABLED", True)
+    monkeypatch.setattr(near_duplicates.registry, "get", lambda name: index)
+    scored = []
+
+    def score(texts):
+        scored.extend(texts)
+        return [{"sentiment": "NEGATIVE", "confidence": 0.7} for _ in texts]
+
+    text = article(11)
+    first = reuse_near_duplicates([text], score)
+    second = reuse_near_duplicates([text + " Read more.", article(12)], score)
+    assert scored == [text, article(12)]
+    assert second[0] == first[0] == {"sentiment": "NEGATIVE", "confidence": 0.7}
+    assert second[0] is not first[0]
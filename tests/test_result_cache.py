@@ -0,0 +1,45 @@
+from app.services.cache import CacheEntry, ResultCache, SQLiteBackend
+
+
+def entry(i: int, size: int = 500) -> CacheEntry:
+    return CacheEntry({"id": i, "text": "x" * size}, stored_at=1e12)
+
+
+def table_bytes(backend: SQLiteBackend) -> int:
+    return backend.stats()["bytes"]
+
+
+def test_running_size_matches_the_table(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite3"), max_bytes=10 ** 9, max_age=10 ** 9)
+    for i in range(10):
+        backend.set(f"key-{i % 4}", entry(i, size=100 * i))
+    assert backend._bytes == table_bytes(backend)
+    backend.delete("key-2")
+    backend.delete("missing")
+    assert backend._bytes == table_bytes(backend)
+    backend.clear()
+    assert backend._bytes == table_bytes(backend) == 0
+
+
+def test_evicts_least_recently_used_rows_past_the_size_bound(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite3"), max_bytes=5_000, max_age=10 ** 9)
+    for i in range(20):
+        backend.set(f"key-{i}", entry(i))
+        if i == 5:
+            backend.get("key-0")
+    assert backend._bytes == table_bytes(backend) <= 5_000
+    assert backend.get("key-19") is not None
+    assert backend.get("key-1") is None
+
+
+def test_expired_rows_are_not_returned(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite3"), max_bytes=10 ** 9, max_age=60)
+    backend.set("old", CacheEntry({"id": 0}, stored_at=0))
+    assert backend.get("old") is None
+
+
+def test_keys_depend_on_the_model():
+    first, second = ResultCache(None, 60, model="a@1/torch"), ResultCache(None, 60, model="a@2/torch")
+    assert first.text_key("Same text.") != second.text_key("Same text.")
+    assert first.url_key("https://example.com/a") != second.url_key("https://example.com/a")
+    assert first.text_key("Same  text.") == first.text_key("Same text.")